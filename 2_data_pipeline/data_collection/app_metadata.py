@@ -0,0 +1,89 @@
+"""
+2_data_pipeline/data_collection/app_metadata.py
+
+Purpose:
+--------
+Disk cache and per-run snapshot table for Google Play app metadata:
+    ✓ Caches app() results (title, installs, score, version, ...) with a
+      TTL so repeated runs skip the validation round trips
+    ✓ Appends one snapshot row per package per run to app_snapshots.csv,
+      so rating and version changes can be analysed over time
+"""
+
+import os
+import csv
+import json
+import threading
+from datetime import datetime, timedelta
+
+METADATA_FIELDS = ["title", "installs", "realInstalls", "score", "ratings", "reviews", "version", "updated"]
+SNAPSHOT_FIELDS = ["run_id", "snapshot_at", "package_name", "bank_name", "from_cache", "fetched_at"] + METADATA_FIELDS
+
+
+class AppMetadataCache:
+    def __init__(self, path, ttl_hours=24):
+        self.path = path
+        self.ttl = timedelta(hours=float(ttl_hours))
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable app metadata cache {self.path}: {e}")
+            return {}
+
+    def get(self, package_name):
+        """Return the cached entry if it is younger than the TTL, else None."""
+        with self._lock:
+            entry = self._entries.get(package_name)
+        if not entry:
+            return None
+        try:
+            fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        except (KeyError, ValueError):
+            return None
+        return entry if datetime.now() - fetched_at < self.ttl else None
+
+    def put(self, package_name, app_info):
+        entry = {field: app_info.get(field) for field in METADATA_FIELDS}
+        entry["fetched_at"] = datetime.now().isoformat()
+        with self._lock:
+            self._entries[package_name] = entry
+        return entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+
+def append_snapshots(path, run_id, snapshots):
+    """
+    Append this run's metadata to the snapshot table.
+    `snapshots` is a list of (package_name, bank_name, entry, from_cache).
+    """
+    if not snapshots:
+        return
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    snapshot_at = datetime.now().isoformat()
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SNAPSHOT_FIELDS, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        for package_name, bank_name, entry, from_cache in snapshots:
+            writer.writerow(dict(
+                entry,
+                run_id=run_id,
+                snapshot_at=snapshot_at,
+                package_name=package_name,
+                bank_name=bank_name,
+                from_cache=from_cache,
+            ))
@@ -1,10 +1,22 @@
 """
 2_data_pipeline/data_collection/data_validation.py
 Validates raw review files from data/raw/
+
+Files are streamed in fixed-size chunks, so memory stays bounded, and
+the per-bank files are validated in parallel in a process pool. The
+combined all_reviews.csv holds the same rows as the per-bank files, so
+its report is merged from theirs instead of parsing every row twice;
+it is only parsed itself when its lines differ from theirs.
 """
 
 import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+from pandas.util import hash_array
 
 # ---------------------------------------------------------
 # Paths - CORRECTED to use data/raw directory
@@ -15,6 +27,11 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 RAW_DIR = os.path.join(ROOT, "2_data_pipeline", "data", "raw")
 ALL_RAW_PATH = os.path.join(RAW_DIR, "all_reviews.csv")
 
+CHUNK_SIZE = 50_000
+MAX_DATE_SAMPLES = 3
+DIGEST_MASK = (1 << 64) - 1
+DIGEST_BLOCK_SIZE = 1 << 24
+
 # ---------------------------------------------------------
 # Utility: Pretty print
 # ---------------------------------------------------------
@@ -23,42 +40,180 @@ def line():
 
 
 # ---------------------------------------------------------
-# Validate a single CSV file
+# Partial results
 # ---------------------------------------------------------
-def validate_file(path: str):
-    if not os.path.exists(path):
-        print(f"❌ File not found: {path}")
-        return None
+def empty_result(name):
+    return {
+        "file": name,
+        "records": 0,
+        "missing": {},
+        "bank_distribution": {},
+        "unparseable_dates": 0,
+        "invalid_date_samples": [],
+    }
 
-    print(f"\n📌 Validating: {os.path.basename(path)}")
-    df = pd.read_csv(path, dtype=str)
 
-    print(f"📊 Total records: {len(df)}")
-    print("\n❓ Missing values:")
-    print(df.isna().sum())
+def merge_results(name, results):
+    """Combine partial results (of chunks or of whole files) into one."""
+    merged = empty_result(name)
+    for result in results:
+        merged["records"] += result["records"]
+        for col, count in result["missing"].items():
+            merged["missing"][col] = merged["missing"].get(col, 0) + count
+        if result.get("bank_distribution") is not None:
+            for bank, count in result["bank_distribution"].items():
+                merged["bank_distribution"][bank] = merged["bank_distribution"].get(bank, 0) + count
+        merged["unparseable_dates"] += result["unparseable_dates"]
+        room = MAX_DATE_SAMPLES - len(merged["invalid_date_samples"])
+        merged["invalid_date_samples"].extend(result["invalid_date_samples"][:room])
+        merged.setdefault("columns", [])
+        for col in result.get("columns", []):
+            if col not in merged["columns"]:
+                merged["columns"].append(col)
+    return merged
+
+
+def validate_chunk(df, name, date_format=None):
+    result = empty_result(name)
+    result["columns"] = list(df.columns)
+    result["records"] = len(df)
+    result["missing"] = {col: int(n) for col, n in df.isna().sum().items()}
 
     if "bank_name" in df.columns:
-        print("\n🏦 Bank distribution:")
-        print(df["bank_name"].value_counts(dropna=False))
+        counts = df["bank_name"].value_counts(dropna=False)
+        result["bank_distribution"] = {
+            (None if pd.isna(bank) else bank): int(n) for bank, n in counts.items()
+        }
 
     if "at" in df.columns:
-        parsed = pd.to_datetime(df["at"], errors="coerce")
-        invalid_dates = parsed.isna().sum()
-        print(f"\n📅 Unparseable dates: {invalid_dates}")
-        if invalid_dates > 0:
+        parsed = pd.to_datetime(df["at"], errors="coerce", format=date_format)
+        invalid = parsed.isna()
+        result["unparseable_dates"] = int(invalid.sum())
+        result["invalid_date_samples"] = df.loc[invalid, "at"].head(MAX_DATE_SAMPLES).tolist()
+    return result
+
+
+def scan_file(path, chunksize=CHUNK_SIZE):
+    """Validate one CSV chunk by chunk. Runs in the worker processes."""
+    name = os.path.basename(path)
+    partials = []
+    date_format = None
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        if not partials and "at" in chunk.columns:
+            # Parse every chunk with the format inferred from the file's
+            # first date, as a whole-file to_datetime() would
+            first = chunk["at"].dropna()
+            if len(first):
+                date_format = guess_datetime_format(first.iloc[0])
+        partials.append(validate_chunk(chunk, name, date_format))
+    if not partials:
+        return empty_result(name)
+    return merge_results(name, partials)
+
+
+# ---------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------
+def print_result(result, note=None):
+    print(f"\n📌 Validating: {result['file']}")
+    if note:
+        print(f"   ({note})")
+
+    print(f"📊 Total records: {result['records']}")
+    print("\n❓ Missing values:")
+    print(pd.Series(result["missing"], dtype="int64"))
+
+    if "bank_name" in result.get("columns", []):
+        print("\n🏦 Bank distribution:")
+        print(pd.Series(result["bank_distribution"], dtype="int64").sort_values(ascending=False))
+
+    if "at" in result.get("columns", []):
+        print(f"\n📅 Unparseable dates: {result['unparseable_dates']}")
+        if result["unparseable_dates"] > 0:
             print("   Sample invalid dates:")
-            invalid_samples = df[parsed.isna()]["at"].head(3).tolist()
-            for sample in invalid_samples:
+            for sample in result["invalid_date_samples"]:
                 print(f"     - {sample}")
 
     line()
-    return df
+
+
+# ---------------------------------------------------------
+# Validate a single CSV file
+# ---------------------------------------------------------
+def validate_file(path: str, chunksize=CHUNK_SIZE):
+    if not os.path.exists(path):
+        print(f"❌ File not found: {path}")
+        return None
+
+    result = scan_file(path, chunksize)
+    print_result(result)
+    return result
+
+
+def _header_size(path):
+    with open(path, "rb") as f:
+        return len(f.readline())
+
+
+def body_digest(path):
+    """
+    (header, lines, digest) of a CSV: the digest adds up a hash of every
+    body line, so it depends on which lines the file holds, not on their
+    order
+    """
+    lines = digest = 0
+    with open(path, "rb") as f:
+        header = f.readline().rstrip(b"\r\n")
+        # Blocks of whole lines, hashed all at once
+        for block in iter(lambda: f.readlines(DIGEST_BLOCK_SIZE), []):
+            body = np.array([body_line.rstrip(b"\r\n") for body_line in block], dtype=object)
+            digest = (digest + int(hash_array(body).sum(dtype=np.uint64))) & DIGEST_MASK
+            lines += len(block)
+    return header, lines, digest
+
+
+def scan_bank_file(path, chunksize=CHUNK_SIZE):
+    """scan_file() and body_digest() of a per-bank file. Runs in the worker processes."""
+    return scan_file(path, chunksize), body_digest(path)
+
+
+def bodies_same_size(combined_path, bank_paths):
+    """Cheap precondition: the bodies of the bank files add up to the combined file's"""
+    if not bank_paths:
+        return False
+    combined_body = os.path.getsize(combined_path) - _header_size(combined_path)
+    banks_body = sum(os.path.getsize(p) - _header_size(p) for p in bank_paths)
+    return combined_body == banks_body
+
+
+def combined_matches_banks(combined_digest, bank_digests):
+    """
+    Whether all_reviews.csv holds exactly the rows of the per-bank files,
+    in any order: same header, same number of lines, same line digest
+    """
+    header, lines, digest = combined_digest
+    if not bank_digests or any(bank_header != header for bank_header, _, _ in bank_digests):
+        return False
+    bank_lines = sum(count for _, count, _ in bank_digests)
+    bank_digest = sum(line_digest for _, _, line_digest in bank_digests) & DIGEST_MASK
+    return lines == bank_lines and digest == bank_digest
+
+
+def _run_now(function, *args):
+    """A finished Future, for running validate_all() without a pool"""
+    future = Future()
+    future.set_result(function(*args))
+    return future
 
 
 # ---------------------------------------------------------
 # Main validation
 # ---------------------------------------------------------
-def validate_all():
+def validate_all(workers=None, chunksize=CHUNK_SIZE):
+    """
+    Validate every raw file and return the structured report:
+    {"directory", "combined", "combined_source", "banks": {file: result}}
+    """
     line()
     print("🔍 RAW DATA VALIDATION REPORT")
     print(f"📁 Directory: {RAW_DIR}")
@@ -68,24 +223,66 @@ def validate_all():
     if not os.path.exists(RAW_DIR):
         print(f"❌ Directory not found: {RAW_DIR}")
         print("➡️ Run the scraper first to create the directory and files.")
-        return
+        return None
+
+    bank_paths = [
+        os.path.join(RAW_DIR, fname)
+        for fname in sorted(os.listdir(RAW_DIR))
+        if fname.endswith("_reviews.csv") and fname != "all_reviews.csv"
+    ]
+    has_combined = os.path.exists(ALL_RAW_PATH)
+    maybe_derived = has_combined and bodies_same_size(ALL_RAW_PATH, bank_paths)
+
+    files = len(bank_paths) + int(has_combined)
+    workers = max(1, min(workers or os.cpu_count() or 1, files or 1))
+    parallel = files > 1 and workers > 1
+    with ProcessPoolExecutor(max_workers=workers) if parallel else nullcontext() as pool:
+        submit = pool.submit if parallel else _run_now
+        bank_futures = {path: submit(scan_bank_file, path, chunksize) for path in bank_paths}
+
+        # The combined file is hashed while the workers scan the bank files,
+        # and only scanned itself when its lines differ from theirs
+        derive_combined = maybe_derived and combined_matches_banks(
+            body_digest(ALL_RAW_PATH),
+            [bank_futures[path].result()[1] for path in bank_paths],
+        )
+        if has_combined and not derive_combined:
+            combined_future = submit(scan_file, ALL_RAW_PATH, chunksize)
+
+        results = {path: future.result()[0] for path, future in bank_futures.items()}
+        if has_combined and not derive_combined:
+            results[ALL_RAW_PATH] = combined_future.result()
+
+    report = {
+        "directory": RAW_DIR,
+        "combined": None,
+        "combined_source": None,
+        "banks": {os.path.basename(p): results[p] for p in bank_paths},
+    }
 
     # Validate combined raw file
-    validate_file(ALL_RAW_PATH)
+    if derive_combined:
+        report["combined"] = merge_results("all_reviews.csv", [results[p] for p in bank_paths])
+        report["combined_source"] = "per_bank_files"
+        print_result(report["combined"], note="merged from the per-bank files, which hold the same rows")
+    elif has_combined:
+        report["combined"] = results[ALL_RAW_PATH]
+        report["combined_source"] = "file"
+        print_result(report["combined"])
+    else:
+        print(f"❌ File not found: {ALL_RAW_PATH}")
 
     # Validate each bank file
     print("\n🔎 Validating per-bank raw files...")
-    bank_files_found = 0
-    for fname in os.listdir(RAW_DIR):
-        if fname.endswith("_reviews.csv") and fname != "all_reviews.csv":
-            validate_file(os.path.join(RAW_DIR, fname))
-            bank_files_found += 1
-    
-    if bank_files_found == 0:
+    for path in bank_paths:
+        print_result(results[path])
+
+    if not bank_paths:
         print("ℹ️  No individual bank files found in the directory.")
 
     print("\n✅ Validation completed successfully.")
+    return report
 
 
 if __name__ == "__main__":
-    validate_all()
\ No newline at end of file
+    validate_all()
@@ -0,0 +1,209 @@
+"""
+2_data_pipeline/data_collection/rate_limiter.py
+
+Purpose:
+--------
+Adaptive token-bucket rate limiter shared by every scraper thread:
+    ✓ One global bucket caps total requests/second across all packages
+    ✓ One bucket per package replaces the fixed sleep between pages
+    ✓ Additive increase while requests succeed, multiplicative decrease
+      on errors, and a much sharper cut when Google Play throttles us
+    ✓ Exponential backoff with jitter for retries
+    ✓ Per-package latency and error histograms for the end-of-run report
+"""
+
+import time
+import random
+import threading
+from collections import Counter, defaultdict
+
+LATENCY_BUCKETS = [0.25, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf")]
+THROTTLE_MARKERS = ("PlayGatewayError", "429", "Too Many Requests", "rate limit")
+
+
+def is_throttle_error(error):
+    """google_play_scraper reports throttling only through the error text."""
+    message = str(error)
+    return any(marker.lower() in message.lower() for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1.0
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+
+class PackageStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.consecutive_failures = 0
+        self.latency_sum = 0.0
+        self.latency_histogram = [0] * len(LATENCY_BUCKETS)
+        self.error_types = Counter()
+
+    def observe_latency(self, latency):
+        self.latency_sum += latency
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if latency <= upper:
+                self.latency_histogram[i] += 1
+                break
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=2.0, burst=2, min_rate=0.1, max_rate=5.0,
+                 increase_step=0.05, decrease_factor=0.5, throttle_factor=0.25,
+                 backoff_base=2.0, backoff_max=60.0, jitter=0.5,
+                 package_rate=1.0, package_rates=None):
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase_step = float(increase_step)
+        self.decrease_factor = float(decrease_factor)
+        self.throttle_factor = float(throttle_factor)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.jitter = min(max(float(jitter), 0.0), 1.0)
+        self.package_rate = float(package_rate)
+        self.package_rates = dict(package_rates or {})
+
+        # requests_per_second is the ceiling of the global rate: it adapts
+        # below it on throttling and recovers back up to it, never past it
+        self.global_max_rate = float(rate)
+        self.global_bucket = TokenBucket(rate, capacity=burst)
+        self._package_buckets = {}
+        self._stats = defaultdict(PackageStats)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg, default_package_rate, package_rates=None):
+        """Build a limiter from the `rate_limit` section of config.yaml."""
+        cfg = cfg or {}
+        return cls(
+            rate=cfg.get("requests_per_second", 2.0),
+            burst=cfg.get("burst", 2),
+            min_rate=cfg.get("min_rate", 0.1),
+            max_rate=cfg.get("max_rate", 5.0),
+            increase_step=cfg.get("increase_step", 0.05),
+            decrease_factor=cfg.get("decrease_factor", 0.5),
+            throttle_factor=cfg.get("throttle_factor", 0.25),
+            backoff_base=cfg.get("backoff_base", 2.0),
+            backoff_max=cfg.get("backoff_max", 60.0),
+            jitter=cfg.get("jitter", 0.5),
+            package_rate=default_package_rate,
+            package_rates=package_rates,
+        )
+
+    def _bucket(self, package):
+        with self._lock:
+            if package not in self._package_buckets:
+                rate = self.package_rates.get(package, self.package_rate)
+                self._package_buckets[package] = TokenBucket(rate, capacity=1.0)
+            return self._package_buckets[package]
+
+    def _clamp(self, rate, max_rate=None):
+        return min(self.max_rate if max_rate is None else max_rate, max(self.min_rate, rate))
+
+    # -----------------------------------------------------
+    # Request lifecycle
+    # -----------------------------------------------------
+    def acquire(self, package):
+        """Block until both the package's and the global bucket allow a request."""
+        wait = max(self._bucket(package).reserve(), self.global_bucket.reserve())
+        if wait > 0:
+            time.sleep(wait)
+
+    def record_success(self, package, latency):
+        bucket = self._bucket(package)
+        with self._lock:
+            stats = self._stats[package]
+            stats.requests += 1
+            stats.consecutive_failures = 0
+            stats.observe_latency(latency)
+        bucket.set_rate(self._clamp(bucket.rate + self.increase_step))
+        self.global_bucket.set_rate(self._clamp(self.global_bucket.rate + self.increase_step, self.global_max_rate))
+
+    def record_failure(self, package, error, latency=None):
+        """
+        Slow down after a failed request and return how long to back off
+        before retrying: exponential in the package's consecutive failures,
+        with jitter so threads do not retry in lockstep.
+        """
+        throttled = is_throttle_error(error)
+        factor = self.throttle_factor if throttled else self.decrease_factor
+        bucket = self._bucket(package)
+        with self._lock:
+            stats = self._stats[package]
+            stats.requests += 1
+            stats.errors += 1
+            stats.throttled += int(throttled)
+            stats.consecutive_failures += 1
+            stats.error_types[type(error).__name__] += 1
+            if latency is not None:
+                stats.observe_latency(latency)
+            failures = stats.consecutive_failures
+
+        bucket.set_rate(self._clamp(bucket.rate * factor))
+        if throttled:
+            # Throttling is per client, not per app: slow everyone down
+            self.global_bucket.set_rate(self._clamp(self.global_bucket.rate * factor, self.global_max_rate))
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (failures - 1)))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    # -----------------------------------------------------
+    # Reporting
+    # -----------------------------------------------------
+    def stats(self):
+        """Per-package counters, current rate and latency/error histograms."""
+        with self._lock:
+            snapshot = {}
+            for package, s in self._stats.items():
+                snapshot[package] = {
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "throttled": s.throttled,
+                    "avg_latency": round(s.latency_sum / s.requests, 3) if s.requests else 0.0,
+                    "latency_histogram": {
+                        f"<={upper}s": count for upper, count in zip(LATENCY_BUCKETS, s.latency_histogram)
+                    },
+                    "error_types": dict(s.error_types),
+                    "rate": round(self._package_buckets[package].rate, 3)
+                    if package in self._package_buckets else None,
+                }
+            return snapshot
+
+    def report(self):
+        print("\n📈 Request statistics per package:")
+        print(f"  • Global rate now: {self.global_bucket.rate:.2f} req/s")
+        for package, s in self.stats().items():
+            print(
+                f"  • {package}: {s['requests']} requests, {s['errors']} errors "
+                f"({s['throttled']} throttled), avg latency {s['avg_latency']}s, "
+                f"rate now {s['rate']} req/s"
+            )
+            buckets = ", ".join(f"{k}: {v}" for k, v in s["latency_histogram"].items() if v)
+            if buckets:
+                print(f"      latency: {buckets}")
+            if s["error_types"]:
+                print(f"      errors: {s['error_types']}")
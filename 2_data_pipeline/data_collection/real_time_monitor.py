@@ -12,12 +12,24 @@ Real-time lightweight monitoring tool to check:
     ✓ Early warning for missing columns
 
 This helps track scraper progress without loading heavy notebooks.
+
+The monitor tails all_reviews.csv: it remembers the byte offset it has
+read up to and keeps running aggregates, so every poll parses only the
+rows appended since the last one. Run with --watch to poll in a loop:
+
+    python real_time_monitor.py --watch --interval 5
 """
 
+import io
 import os
-import pandas as pd
+import time
+import argparse
+import hashlib
+from collections import Counter
 from datetime import datetime
 
+import pandas as pd
+
 # ---------------------------------------------------------
 # Paths - CORRECTED to use data/raw directory
 # ---------------------------------------------------------
@@ -26,98 +38,243 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 # Updated path to match the raw directory
 RAW_PATH = os.path.join(ROOT, "2_data_pipeline", "data", "raw", "all_reviews.csv")
 
-def report():
-    print("\n📌 REAL-TIME SCRAPER MONITOR")
-    print("───────────────────────────────────────────────")
+REQUIRED_COLS = ["package_name", "review", "bank_name", "at"]
 
-    if not os.path.exists(RAW_PATH):
-        print("❌ No all_reviews.csv file found.")
-        print(f"➡️ Expected at: {RAW_PATH}")
-        print("➡️ Run the scraper before monitoring.\n")
-        return
 
-    # Load dataset
-    try:
-        df = pd.read_csv(RAW_PATH, dtype=str)
-    except Exception as e:
-        print(f"❌ Error loading CSV: {e}")
-        return
+def _text_key(text):
+    """Compact key for the duplicate-text set (missing texts share one key)."""
+    if text is None or pd.isna(text):
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
 
-    print(f"📄 Loaded file: all_reviews.csv")
-    print(f"📁 Location: {RAW_PATH}")
-    print(f"🧮 Total reviews collected so far: {len(df):,}")
 
-    # Track last modified time of the CSV file
-    last_update = datetime.fromtimestamp(os.path.getmtime(RAW_PATH))
-    print(f"⏱ Last updated: {last_update.strftime('%Y-%m-%d %H:%M:%S')}\n")
+def _complete_length(chunk):
+    """
+    Length of the leading part of `chunk` that ends in a complete CSV
+    record: the last newline outside a quoted field. Reviews can contain
+    newlines, so a line break inside quotes does not end a row.
+    """
+    complete = 0
+    quotes = 0
+    pos = 0
+    for line in chunk.split(b"\n")[:-1]:
+        quotes += line.count(b'"')
+        pos += len(line) + 1
+        if quotes % 2 == 0:
+            complete = pos
+    return complete
 
-    # --------------------------
-    # CHECK REQUIRED COLUMNS
-    # --------------------------
-    required_cols = ["package_name", "review", "bank_name", "at"]
-    missing = [c for c in required_cols if c not in df.columns]
 
-    if missing:
-        print(f"⚠️ Missing columns: {missing}\n")
-    else:
-        print("✅ All required columns present.\n")
-
-    # --------------------------
-    # COUNTS PER PACKAGE
-    # --------------------------
-    if "package_name" in df.columns:
-        print("📦 Review counts per mobile app package:")
-        pkg_counts = df["package_name"].value_counts()
-        for pkg, cnt in pkg_counts.items():
-            print(f"  • {pkg}: {cnt:,}")
-        print()
-
-    # --------------------------
-    # COUNTS PER BANK
-    # --------------------------
-    if "bank_name" in df.columns:
-        print("🏦 Review counts per bank:")
-        bank_counts = df["bank_name"].value_counts()
-        for bank, cnt in bank_counts.items():
-            print(f"  • {bank}: {cnt:,}")
-        print()
-
-    # --------------------------
-    # DUPLICATE CHECK
-    # --------------------------
-    if "review" in df.columns:
-        dup_count = df["review"].duplicated().sum()
-        print(f"🔁 Possible duplicate review texts: {dup_count:,}")
-        
-        # Show a few examples of duplicates if any exist
-        if dup_count > 0:
-            duplicates = df[df["review"].duplicated(keep=False)]
-            print(f"   Example duplicate review texts:")
-            sample_dups = duplicates["review"].value_counts().head(3)
-            for review_text, count in sample_dups.items():
-                print(f"     - '{review_text[:50]}...' (appears {count} times)")
-    else:
-        print("⚠️ Cannot check duplicates — 'review' column missing.")
+class ReviewMonitor:
+    """Running aggregates over a CSV that is only ever appended to."""
+
+    def __init__(self, path=RAW_PATH):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.inode = None
+        self.header = None
+        self.columns = []
+        self.total = 0
+        self.package_counts = Counter()
+        self.bank_counts = Counter()
+        self.text_counts = Counter()
+        self.duplicate_count = 0
+        self.duplicate_examples = {}
+        self.score_histogram = Counter()
+        self.score_sum = 0.0
+        self.length_sum = 0
+        self.length_count = 0
+        self.empty_reviews = 0
+
+    def read_path(self):
+        """A full scrape builds `all_reviews.csv.part` and renames it on commit."""
+        part_path = self.path + ".part"
+        return part_path if os.path.exists(part_path) else self.path
+
+    def poll(self):
+        """Parse rows appended since the last poll. Returns the number of new rows."""
+        path = self.read_path()
+        if not os.path.exists(path):
+            return 0
+
+        stat = os.stat(path)
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # Replaced or truncated (e.g. a full scrape rewrote it): start over
+            self.reset()
+            self.inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return 0
+
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(stat.st_size - self.offset)
+
+        if self.header is None:
+            header_end = chunk.find(b"\n")
+            if header_end < 0:
+                return 0
+            self.header = chunk[:header_end + 1]
+            self.columns = pd.read_csv(io.BytesIO(self.header), dtype=str, nrows=0).columns.tolist()
+            self.offset += header_end + 1
+            chunk = chunk[header_end + 1:]
+
+        length = _complete_length(chunk)
+        if length == 0:
+            return 0
+        df = pd.read_csv(io.BytesIO(self.header + chunk[:length]), dtype=str)
+        self.offset += length
+        self._update(df)
+        return len(df)
+
+    def _update(self, df):
+        self.total += len(df)
+        if "package_name" in df.columns:
+            self.package_counts.update(df["package_name"].dropna())
+        if "bank_name" in df.columns:
+            self.bank_counts.update(df["bank_name"].dropna())
+
+        if "review" in df.columns:
+            for text in df["review"]:
+                key = _text_key(text)
+                self.text_counts[key] += 1
+                if self.text_counts[key] > 1:
+                    self.duplicate_count += 1
+                    if key is not None and key not in self.duplicate_examples:
+                        self.duplicate_examples[key] = text
+            lengths = df["review"].str.len()
+            self.length_sum += int(lengths.sum())
+            self.length_count += int(lengths.notna().sum())
+            self.empty_reviews += int(df["review"].isna().sum())
+
+        if "score" in df.columns:
+            scores = pd.to_numeric(df["score"], errors="coerce").dropna()
+            self.score_histogram.update(scores)
+            self.score_sum += float(scores.sum())
 
-    # --------------------------
-    # DATA QUALITY CHECKS
-    # --------------------------
-    print("\n📊 Data Quality Summary:")
-    if "score" in df.columns:
-        try:
-            scores = pd.to_numeric(df["score"], errors='coerce')
-            print(f"  • Average rating: {scores.mean():.2f}/5")
-            print(f"  • Rating distribution: {dict(scores.value_counts().sort_index())}")
-        except:
-            print("  • Could not calculate rating statistics")
+    def print_report(self):
+        print("\n📌 REAL-TIME SCRAPER MONITOR")
+        print("───────────────────────────────────────────────")
 
-    if "review" in df.columns:
-        review_lengths = df["review"].str.len()
-        print(f"  • Average review length: {review_lengths.mean():.1f} characters")
-        print(f"  • Empty reviews: {df['review'].isna().sum()}")
+        path = self.read_path()
+        if not os.path.exists(path):
+            print("❌ No all_reviews.csv file found.")
+            print(f"➡️ Expected at: {self.path}")
+            print("➡️ Run the scraper before monitoring.\n")
+            return
 
-    print("\n✅ Monitoring complete.\n")
+        print(f"📄 Loaded file: {os.path.basename(path)}")
+        print(f"📁 Location: {path}")
+        print(f"🧮 Total reviews collected so far: {self.total:,}")
+
+        # Track last modified time of the CSV file
+        last_update = datetime.fromtimestamp(os.path.getmtime(path))
+        print(f"⏱ Last updated: {last_update.strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+        # --------------------------
+        # CHECK REQUIRED COLUMNS
+        # --------------------------
+        missing = [c for c in REQUIRED_COLS if c not in self.columns]
+
+        if missing:
+            print(f"⚠️ Missing columns: {missing}\n")
+        else:
+            print("✅ All required columns present.\n")
+
+        # --------------------------
+        # COUNTS PER PACKAGE
+        # --------------------------
+        if "package_name" in self.columns:
+            print("📦 Review counts per mobile app package:")
+            for pkg, cnt in self.package_counts.most_common():
+                print(f"  • {pkg}: {cnt:,}")
+            print()
+
+        # --------------------------
+        # COUNTS PER BANK
+        # --------------------------
+        if "bank_name" in self.columns:
+            print("🏦 Review counts per bank:")
+            for bank, cnt in self.bank_counts.most_common():
+                print(f"  • {bank}: {cnt:,}")
+            print()
+
+        # --------------------------
+        # DUPLICATE CHECK
+        # --------------------------
+        if "review" in self.columns:
+            print(f"🔁 Possible duplicate review texts: {self.duplicate_count:,}")
+
+            # Show a few examples of duplicates if any exist
+            if self.duplicate_examples:
+                print(f"   Example duplicate review texts:")
+                top = sorted(self.duplicate_examples, key=lambda k: -self.text_counts[k])[:3]
+                for key in top:
+                    review_text = self.duplicate_examples[key]
+                    print(f"     - '{review_text[:50]}...' (appears {self.text_counts[key]} times)")
+        else:
+            print("⚠️ Cannot check duplicates — 'review' column missing.")
+
+        # --------------------------
+        # DATA QUALITY CHECKS
+        # --------------------------
+        print("\n📊 Data Quality Summary:")
+        if "score" in self.columns:
+            scored = sum(self.score_histogram.values())
+            if scored:
+                print(f"  • Average rating: {self.score_sum / scored:.2f}/5")
+                print(f"  • Rating distribution: {dict(sorted(self.score_histogram.items()))}")
+            else:
+                print("  • Could not calculate rating statistics")
+
+        if "review" in self.columns:
+            average_length = self.length_sum / self.length_count if self.length_count else float("nan")
+            print(f"  • Average review length: {average_length:.1f} characters")
+            print(f"  • Empty reviews: {self.empty_reviews}")
+
+        print("\n✅ Monitoring complete.\n")
+
+
+# Shared by report(), so calling it in a loop only parses new rows
+_MONITOR = ReviewMonitor()
+
+
+def report():
+    try:
+        _MONITOR.poll()
+    except Exception as e:
+        print(f"❌ Error loading CSV: {e}")
+        return
+    _MONITOR.print_report()
+
+
+def watch(interval=5.0, path=RAW_PATH):
+    """Poll the file every `interval` seconds and report whenever rows were added."""
+    monitor = _MONITOR if path == RAW_PATH else ReviewMonitor(path)
+    print(f"👀 Watching {path} every {interval:g}s (Ctrl+C to stop)")
+    try:
+        first = True
+        while True:
+            new_rows = monitor.poll()
+            if new_rows or first:
+                monitor.print_report()
+                if not first:
+                    print(f"➕ {new_rows:,} new reviews since the last poll")
+                first = False
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching.")
 
 
 if __name__ == "__main__":
-    report()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Monitor scraper output")
+    parser.add_argument("--watch", action="store_true", help="keep polling for new reviews")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls in watch mode")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.interval)
+    else:
+        report()
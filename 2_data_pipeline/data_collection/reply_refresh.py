@@ -0,0 +1,131 @@
+"""
+2_data_pipeline/data_collection/reply_refresh.py
+
+Purpose:
+--------
+Helpers for scraper.py's reply refresh mode (scrape_mode: replies), which
+re-reads a sliding window of recent reviews and picks up developer
+replies posted after the review was first scraped:
+    ✓ Compares freshly fetched reply fields with the stored ones
+    ✓ Rewrites only the changed reply_text / reply_date values in a CSV,
+      atomically via `<name>.part`
+    ✓ Logs every change to reply_updates.csv with the bank's response
+      time, for response-time metrics
+"""
+
+import os
+import csv
+from datetime import datetime
+
+import pandas as pd
+
+REPLY_FIELDS = ["reply_text", "reply_date"]
+REPLY_LOG_FIELDS = [
+    "run_id", "detected_at", "review_id", "package_name", "bank_name", "locale", "review_at",
+    "old_reply_text", "new_reply_text", "old_reply_date", "new_reply_date", "response_hours",
+]
+
+
+def _text(value):
+    return "" if value is None or pd.isna(value) else str(value)
+
+
+def _date(value):
+    """Reply dates as ISO strings, whether they were stored as text or timestamps."""
+    if value is None or value == "" or pd.isna(value):
+        return ""
+    return pd.Timestamp(value).isoformat()
+
+
+def find_reply_changes(stored, fetched_rows):
+    """
+    Return one change record per fetched review whose reply differs from
+    the stored row. `stored` is a DataFrame with review_id, at and the
+    reply columns; fetched reviews that are not stored yet are skipped,
+    since adding them is the regular scrape's job.
+    """
+    if stored is None or stored.empty:
+        return []
+    stored = stored.drop_duplicates("review_id", keep="last").set_index("review_id")
+
+    changes = []
+    for row in fetched_rows:
+        review_id = row["review_id"]
+        if review_id not in stored.index:
+            continue
+        old = stored.loc[review_id]
+        old_text, new_text = _text(old.get("reply_text")), _text(row["reply_text"])
+        old_date, new_date = _date(old.get("reply_date")), _date(row["reply_date"])
+        if (old_text, old_date) == (new_text, new_date):
+            continue
+
+        response_hours = ""
+        if new_date and row.get("at"):
+            delta = pd.Timestamp(new_date) - pd.Timestamp(row["at"])
+            response_hours = round(delta.total_seconds() / 3600, 2)
+        changes.append({
+            "review_id": review_id,
+            "package_name": row["package_name"],
+            "bank_name": row["bank_name"],
+            "locale": row.get("locale", ""),
+            "review_at": row.get("at", ""),
+            "old_reply_text": old_text,
+            "new_reply_text": new_text,
+            "old_reply_date": old_date,
+            "new_reply_date": new_date,
+            "response_hours": response_hours,
+        })
+    return changes
+
+
+def reply_updates(changes):
+    """{review_id: {reply_text, reply_date}} for update_csv_replies / the Parquet store."""
+    return {
+        c["review_id"]: {"reply_text": c["new_reply_text"], "reply_date": c["new_reply_date"]}
+        for c in changes
+    }
+
+
+def update_csv_replies(path, updates):
+    """
+    Stream `path` into `path.part` with the reply fields of the rows in
+    `updates` replaced, then move it into place. The file is left alone
+    if none of its rows change. Returns the number of rows updated.
+    """
+    if not updates or not os.path.exists(path):
+        return 0
+
+    part_path = path + ".part"
+    updated = 0
+    with open(path, "r", encoding="utf-8", newline="") as src, \
+            open(part_path, "w", encoding="utf-8", newline="") as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for row in reader:
+            new = updates.get(row.get("review_id"))
+            if new is not None:
+                row.update(new)
+                updated += 1
+            writer.writerow(row)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    if updated:
+        os.replace(part_path, path)
+    else:
+        os.remove(part_path)
+    return updated
+
+
+def append_reply_log(path, run_id, changes):
+    if not changes:
+        return
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    detected_at = datetime.now().isoformat()
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPLY_LOG_FIELDS, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        for change in changes:
+            writer.writerow(dict(change, run_id=run_id, detected_at=detected_at))
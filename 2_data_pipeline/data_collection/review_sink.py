@@ -0,0 +1,210 @@
+"""
+2_data_pipeline/data_collection/review_sink.py
+
+Purpose:
+--------
+Streaming CSV writer used by scraper.py so a run never holds the whole
+corpus in memory:
+    ✓ Rows are written page by page and fsync'd after every batch
+    ✓ Rewritten files are built as `<name>.part` and atomically renamed
+      into place on commit, so readers never see a half-written file
+    ✓ A `.part` file left behind by a crash is continued on the next run
+    ✓ Appending to a file written with older columns rewrites it once
+      with the current header, so the columns never shift
+    ✓ Safe to share between scraper threads (one lock per sink)
+
+ParquetReviewSink does the same for the partitioned Parquet dataset
+described in data_storage/review_store.py: every page becomes a durable
+fragment file, and the partitions touched by the run are compacted into
+one file each on commit.
+"""
+
+import os
+import csv
+import uuid
+import shutil
+import threading
+
+import pandas as pd
+
+from data_storage.review_store import (
+    RAW_REVIEW_SCHEMA, add_review_month, partition_dir, write_partitioned,
+    compact_partition, swap_directory,
+)
+
+
+class ReviewSink:
+    def __init__(self, path, fieldnames, mode="rewrite"):
+        """
+        mode="rewrite": build `path.part` from scratch, rename on commit.
+        mode="append":  append straight to `path`.
+        mode="resume":  continue the `path.part` an interrupted run left
+                        behind, or append to `path` if there is none.
+        """
+        self.path = path
+        self.fieldnames = fieldnames
+        self.mode = mode
+        self.part_path = path + ".part"
+        self.rows_written = 0
+        self._lock = threading.Lock()
+
+        if mode == "rewrite" or (mode == "resume" and os.path.exists(self.part_path)):
+            self.write_path = self.part_path
+        else:
+            self.write_path = path
+
+        file_mode = "w" if mode == "rewrite" else "a"
+        if file_mode == "a" and self._existing_header() not in (None, list(fieldnames)):
+            self._migrate()
+        needs_header = (
+            file_mode == "w"
+            or not os.path.exists(self.write_path)
+            or os.path.getsize(self.write_path) == 0
+        )
+        self._file = open(self.write_path, file_mode, encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+        if needs_header:
+            self._writer.writeheader()
+            self._sync()
+
+    def _existing_header(self):
+        if not os.path.exists(self.write_path) or os.path.getsize(self.write_path) == 0:
+            return None
+        with open(self.write_path, "r", encoding="utf-8", newline="") as f:
+            return next(csv.reader(f), None)
+
+    def _migrate(self):
+        """Copy the file being appended to into `.part` under the current header."""
+        tmp_path = self.part_path + ".tmp"
+        with open(self.write_path, "r", encoding="utf-8", newline="") as src, \
+                open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+            writer = csv.DictWriter(dst, fieldnames=self.fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(csv.DictReader(src))
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.part_path)
+        self.write_path = self.part_path
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def write_rows(self, rows):
+        """Write one batch (normally one fetched page) and make it durable."""
+        if not rows:
+            return
+        with self._lock:
+            self._writer.writerows(rows)
+            self._sync()
+            self.rows_written += len(rows)
+
+    def copy_from(self, path):
+        """Stream the rows of an existing CSV file into this sink."""
+        if not path or not os.path.exists(path):
+            return 0
+        copied = 0
+        batch = []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= 1000:
+                    self.write_rows(batch)
+                    copied += len(batch)
+                    batch = []
+        self.write_rows(batch)
+        return copied + len(batch)
+
+    def commit(self):
+        """Close the file and, if it was built as `.part`, move it into place."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+            if self.write_path == self.part_path:
+                os.replace(self.part_path, self.path)
+
+    def close(self):
+        """Close without renaming; a `.part` file is kept for the next run."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def discard(self):
+        """Close and drop a `.part` file, leaving any existing `path` untouched."""
+        self.close()
+        if self.write_path == self.part_path and os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+
+class ParquetReviewSink:
+    def __init__(self, path, fieldnames, mode="rewrite"):
+        """
+        mode="rewrite": build the dataset in `path.part` (continuing one an
+                        interrupted run left behind) and swap it in on commit.
+        mode="append":  add fragments straight to the dataset at `path`.
+        """
+        self.path = path
+        self.fieldnames = fieldnames
+        self.mode = mode
+        self.write_root = path + ".part" if mode == "rewrite" else path
+        self.rows_written = 0
+        self._run_id = uuid.uuid4().hex
+        self._batches = 0
+        self._touched = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.write_root, exist_ok=True)
+
+    def prepare_bank(self, bank_name, resume=False):
+        """
+        Get a bank's partition ready before its first page is written. A
+        fresh scrape drops whatever an earlier attempt staged for the bank;
+        a resumed one keeps it, or carries the bank over from the current
+        dataset if the earlier attempt was already committed.
+        """
+        if self.mode != "rewrite":
+            return
+        staged = partition_dir(self.write_root, bank_name)
+        with self._lock:
+            if not resume:
+                shutil.rmtree(staged, ignore_errors=True)
+            elif not os.path.exists(staged) and os.path.exists(partition_dir(self.path, bank_name)):
+                shutil.copytree(partition_dir(self.path, bank_name), staged)
+
+    def write_rows(self, rows):
+        """Write one batch (normally one fetched page) as durable fragments."""
+        if not rows:
+            return
+        df = pd.DataFrame(rows, columns=self.fieldnames)
+        df["score"] = pd.to_numeric(df["score"], errors="coerce").astype("Int8")
+        for col in ("at", "reply_date"):
+            df[col] = pd.to_datetime(df[col].replace("", None), errors="coerce")
+        df = add_review_month(df, "at")
+
+        with self._lock:
+            self._batches += 1
+            written = write_partitioned(
+                df, self.write_root, schema=RAW_REVIEW_SCHEMA,
+                basename=f"{self._run_id}-{self._batches:06d}",
+            )
+            self._touched.update(written)
+            self.rows_written += len(rows)
+
+    def commit(self):
+        """Compact the partitions written this run and publish the dataset."""
+        with self._lock:
+            for part_dir in sorted(self._touched):
+                compact_partition(part_dir)
+            self._touched.clear()
+            if self.mode == "rewrite" and os.path.exists(self.write_root):
+                swap_directory(self.write_root, self.path)
+
+    def close(self):
+        """Fragments are already durable; a staged dataset is kept for the next run."""
+
+    def discard(self):
+        """Drop a staged dataset, leaving the published one untouched."""
+        if self.mode == "rewrite":
+            shutil.rmtree(self.write_root, ignore_errors=True)
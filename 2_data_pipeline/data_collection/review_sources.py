@@ -0,0 +1,252 @@
+"""
+2_data_pipeline/data_collection/review_sources.py
+
+Purpose:
+--------
+Review source backends behind scraper.py:
+    ✓ GooglePlaySource - live google_play_scraper calls; can record every
+      fetched page to disk for later replay
+    ✓ ReplaySource     - serves recorded pages, or synthetic ones, with
+      configurable latency, error and throttle rates
+
+The replay backend lets the whole scraper (concurrency, rate limiting,
+retries, resume, storage) run offline, e.g. for benchmarks in CI. Its
+output and scrape state go to 2_data_pipeline/data/replay/:
+
+    source:
+      backend: replay
+      replay:
+        latency: 0.2
+        error_rate: 0.05
+
+Every backend returns pages in google_play_scraper's review format
+(reviewId, content, score, at, userName, replyContent, repliedAt) and an
+opaque continuation token, or None when there are no more pages.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+
+RECORDED_PAGE = re.compile(r"^page_(\d+)\.json$")
+
+
+class ReviewSource(ABC):
+    """Interface every review backend implements."""
+
+    label = "Unknown"
+    # Subdirectory of 2_data_pipeline/data for this backend's output and
+    # scrape state; None means the live pipeline's own directories
+    data_subdir = None
+
+    @abstractmethod
+    def fetch_page(self, package_name, lang="en", country="et", count=100, token=None):
+        """Return (reviews, next_token); next_token is None on the last page."""
+
+    @abstractmethod
+    def app_info(self, package_name):
+        """Return app metadata in google_play_scraper's app() format."""
+
+    def token_to_dict(self, token):
+        """Serialize a continuation token for the scrape state file."""
+        return token
+
+    def token_from_dict(self, data):
+        return data
+
+
+# ---------------------------------------------------------
+# Google Play
+# ---------------------------------------------------------
+class GooglePlaySource(ReviewSource):
+    label = "Google Play"
+
+    def __init__(self, record_dir=None):
+        from google_play_scraper import reviews, app, Sort
+        from google_play_scraper.features.reviews import _ContinuationToken
+
+        self._reviews = reviews
+        self._app = app
+        self._sort = Sort.NEWEST
+        self._token_cls = _ContinuationToken
+        self.record_dir = record_dir
+        self._page_numbers = {}
+        self._lock = threading.Lock()
+
+    def fetch_page(self, package_name, lang="en", country="et", count=100, token=None):
+        results, next_token = self._reviews(
+            package_name,
+            lang=lang,
+            country=country,
+            sort=self._sort,
+            count=count,
+            continuation_token=token,
+        )
+        if next_token is not None and next_token.token is None:
+            next_token = None
+        if self.record_dir:
+            self._record(package_name, lang, country, results, next_token is not None)
+        return results, next_token
+
+    def app_info(self, package_name):
+        return self._app(package_name)
+
+    def token_to_dict(self, token):
+        if token is None or token.token is None:
+            return None
+        return {slot: getattr(token, slot) for slot in self._token_cls.__slots__}
+
+    def token_from_dict(self, data):
+        if not data:
+            return None
+        return self._token_cls(**{slot: data.get(slot) for slot in self._token_cls.__slots__})
+
+    def _record(self, package_name, lang, country, results, has_more):
+        """
+        Save a page in the layout ReplaySource reads back. Numbering
+        continues after the pages already recorded, so a resumed scrape
+        extends the recording instead of overwriting it.
+        """
+        key = (package_name, lang, country)
+        out_dir = os.path.join(self.record_dir, f"{lang}_{country}", package_name)
+        with self._lock:
+            if key not in self._page_numbers:
+                self._page_numbers[key] = _last_recorded_page(out_dir)
+            page = self._page_numbers[key] + 1
+            self._page_numbers[key] = page
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, f"page_{page:04d}.json"), "w", encoding="utf-8") as f:
+            json.dump({"results": results, "has_more": has_more}, f, default=_json_default)
+
+
+def _last_recorded_page(out_dir):
+    """Highest page number among out_dir's page_NNNN.json files, 0 if none"""
+    if not os.path.isdir(out_dir):
+        return 0
+    pages = [int(m.group(1)) for m in map(RECORDED_PAGE.match, os.listdir(out_dir)) if m]
+    return max(pages, default=0)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# ---------------------------------------------------------
+# Offline replay / stand-in server
+# ---------------------------------------------------------
+class ReplaySource(ReviewSource):
+    """
+    Serves pages from `replay_dir` (as written by GooglePlaySource with
+    record_dir set) or, without one, synthetic pages.
+
+    Synthetic packages receive one review every `arrival_minutes` since
+    `epoch`, so later runs see new reviews on top of the old ones, just
+    like the live store; the newest `reviews_per_package` are served.
+    """
+
+    label = "Replay"
+    data_subdir = "replay"
+
+    def __init__(self, replay_dir=None, reviews_per_package=1000, arrival_minutes=30,
+                 epoch="2024-01-01T00:00:00", latency=0.0, latency_jitter=0.5,
+                 error_rate=0.0, throttle_rate=0.0, seed=None):
+        self.replay_dir = replay_dir
+        self.reviews_per_package = int(reviews_per_package)
+        self.arrival = timedelta(minutes=float(arrival_minutes))
+        self.epoch = datetime.fromisoformat(str(epoch))
+        self.latency = float(latency)
+        self.latency_jitter = float(latency_jitter)
+        self.error_rate = float(error_rate)
+        self.throttle_rate = float(throttle_rate)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate_network(self):
+        with self._lock:
+            roll = self._random.random()
+            jitter = self._random.uniform(-self.latency_jitter, self.latency_jitter)
+        if self.latency > 0:
+            time.sleep(max(0.0, self.latency * (1 + jitter)))
+        if roll < self.throttle_rate:
+            raise RuntimeError("com.google.play.gateway.proto.PlayGatewayError (replay throttle)")
+        if roll < self.throttle_rate + self.error_rate:
+            raise RuntimeError("Replay: injected fetch error")
+
+    def fetch_page(self, package_name, lang="en", country="et", count=100, token=None):
+        self._simulate_network()
+        if self.replay_dir:
+            return self._recorded_page(package_name, lang, country, token)
+        return self._synthetic_page(package_name, lang, count, token)
+
+    def app_info(self, package_name):
+        self._simulate_network()
+        return {
+            "title": f"{package_name} (replay)",
+            "installs": "1,000,000+",
+            "realInstalls": 1000000,
+            "score": 4.0,
+            "ratings": self.reviews_per_package,
+            "reviews": self.reviews_per_package,
+            "version": "replay",
+            "updated": int(self.epoch.timestamp()),
+        }
+
+    def token_to_dict(self, token):
+        return None if token is None else {"position": token}
+
+    def token_from_dict(self, data):
+        return None if not data else data.get("position")
+
+    def _recorded_page(self, package_name, lang, country, token):
+        page = token or 1
+        path = os.path.join(self.replay_dir, f"{lang}_{country}", package_name, f"page_{page:04d}.json")
+        if not os.path.exists(path):
+            return [], None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        results = data.get("results", [])
+        for r in results:
+            for key in ("at", "repliedAt"):
+                if r.get(key):
+                    r[key] = datetime.fromisoformat(r[key])
+        return results, (page + 1 if data.get("has_more") else None)
+
+    def _synthetic_page(self, package_name, lang, count, token):
+        newest = int((datetime.now() - self.epoch) / self.arrival)
+        oldest = max(0, newest - self.reviews_per_package + 1)
+        start = newest if token is None else token
+
+        results = []
+        for k in range(start, max(oldest, start - count + 1) - 1, -1):
+            at = self.epoch + k * self.arrival
+            results.append({
+                "reviewId": f"replay-{package_name}-{lang}-{k:08d}",
+                "content": f"Synthetic review {k} for {package_name}: app works {'well' if k % 3 else 'badly'}",
+                "score": k % 5 + 1,
+                "at": at,
+                "userName": f"user{k % 997}",
+                "replyContent": "Thank you for your feedback" if k % 4 == 0 else None,
+                "repliedAt": at + timedelta(hours=6) if k % 4 == 0 else None,
+            })
+
+        next_position = start - len(results)
+        return results, (next_position if next_position >= oldest and results else None)
+
+
+def build_source(cfg):
+    """Create the backend selected by the `source` section of config.yaml."""
+    cfg = cfg or {}
+    backend = str(cfg.get("backend", "google_play")).lower()
+    if backend == "replay":
+        return ReplaySource(**(cfg.get("replay", {}) or {}))
+    if backend != "google_play":
+        print(f"⚠️ Unknown source backend '{backend}', using google_play")
+    return GooglePlaySource(record_dir=cfg.get("record_dir"))
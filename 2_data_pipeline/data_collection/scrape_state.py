@@ -0,0 +1,102 @@
+"""
+2_data_pipeline/data_collection/scrape_state.py
+
+Purpose:
+--------
+Small JSON checkpoint store used by scraper.py, one file per package
+(and per locale, see scraper.stream_key):
+    ✓ High-water mark: newest review `at` and the review IDs seen at it
+    ✓ Saved continuation token of an unfinished backfill
+    ✓ Number of rows the unfinished backfill has collected so far
+    ✓ Whether a backfill is still in progress
+
+Incremental runs stop paging once they reach the high-water mark, and an
+interrupted full scrape resumes from the saved token instead of page one.
+"""
+
+import os
+import json
+from datetime import datetime
+
+
+class ScrapeStateStore:
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+
+    def path_for(self, package_name):
+        return os.path.join(self.state_dir, f"{package_name}.json")
+
+    def load(self, package_name):
+        """Return the saved state for a package, or an empty dict."""
+        path = self.path_for(package_name)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable scrape state {path}: {e}")
+            return {}
+
+    def save(self, package_name, state):
+        """Write the state atomically so a crash never leaves half a file."""
+        state = dict(state, updated_at=datetime.now().isoformat())
+        path = self.path_for(package_name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def update(self, package_name, **fields):
+        state = self.load(package_name)
+        state.update(fields)
+        self.save(package_name, state)
+        return state
+
+    # -----------------------------------------------------
+    # High-water mark
+    # -----------------------------------------------------
+    def high_water_mark(self, package_name):
+        """Return (newest_at, ids seen at newest_at) for a package."""
+        state = self.load(package_name)
+        return state.get("newest_at"), set(state.get("newest_ids", []))
+
+    def advance_high_water_mark(self, package_name, rows):
+        """Move the high-water mark forward to the newest of `rows`."""
+        dated = [r for r in rows if r.get("at")]
+        if not dated:
+            return
+
+        newest_at = max(r["at"] for r in dated)
+        stored_at, stored_ids = self.high_water_mark(package_name)
+        if stored_at and stored_at > newest_at:
+            return
+
+        newest_ids = {r["review_id"] for r in dated if r["at"] == newest_at}
+        if stored_at == newest_at:
+            newest_ids |= stored_ids
+        self.update(package_name, newest_at=newest_at, newest_ids=sorted(newest_ids))
+
+    # -----------------------------------------------------
+    # Backfill checkpoint
+    # -----------------------------------------------------
+    def backfill_checkpoint(self, package_name):
+        """Return (token dict or None, rows collected so far)."""
+        state = self.load(package_name)
+        return state.get("backfill_token"), int(state.get("backfill_collected", 0))
+
+    def backfill_active(self, package_name):
+        """True while a backfill has started and not yet finished."""
+        state = self.load(package_name)
+        # State files from before this flag only carried the token
+        return bool(state.get("backfill_active", state.get("backfill_token")))
+
+    def start_backfill(self, package_name):
+        self.update(package_name, backfill_token=None, backfill_collected=0, backfill_active=True)
+
+    def save_backfill_checkpoint(self, package_name, token, collected):
+        self.update(package_name, backfill_token=token, backfill_collected=collected, backfill_active=True)
+
+    def clear_backfill_checkpoint(self, package_name):
+        self.update(package_name, backfill_token=None, backfill_collected=0, backfill_active=False)
@@ -4,20 +4,36 @@ Scrapes reviews for configured Google Play package IDs
 """
 
 import os
+import sys
 import time
 import csv
 import yaml
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from google_play_scraper import reviews, Sort, app
 
 # ---------------------------------------------------------
 # Paths
 # ---------------------------------------------------------
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from data_storage.review_store import (
+    PARQUET_ENABLED, CSV_EXPORT, dataset_path, reviews_exist, load_reviews, update_reviews_dataset,
+)
+from scrape_state import ScrapeStateStore
+from review_sink import ReviewSink, ParquetReviewSink
+from rate_limiter import AdaptiveRateLimiter, is_throttle_error
+from app_metadata import AppMetadataCache, append_snapshots
+from review_sources import build_source
+from seen_index import SeenReviewIndex
+from reply_refresh import find_reply_changes, reply_updates, update_csv_replies, append_reply_log
+from pipeline_metrics import (
+    start_metrics_server, track_stage, record_fetch, record_retry, record_reviews, record_duplicates,
+)
+
 CONFIG_PATH = os.path.join(ROOT, "3_configuration", "config.yaml")
-PROCESSED_DIR = os.path.join(ROOT, "2_data_pipeline", "data", "raw")
-ALL_RAW_PATH = os.path.join(PROCESSED_DIR, "all_reviews.csv")
-os.makedirs(PROCESSED_DIR, exist_ok=True)
 
 # ---------------------------------------------------------
 # Load configuration
@@ -35,118 +51,676 @@ PACKAGE_MAP = cfg.get("package_map", {})
 PER_BANK_TARGET = int(cfg.get("per_bank_target", 100))  # Reduced for testing
 SLEEP = float(cfg.get("sleep_between_requests", 2.0))
 MAX_RETRIES = int(cfg.get("max_retries", 3))
-SOURCE = "Google Play"
+# Where reviews come from: live Google Play, or the offline replay backend
+REVIEW_SOURCE = build_source(cfg.get("source", {}))
+SOURCE = REVIEW_SOURCE.label
+
+# Offline backends get their own data and state directories so replayed
+# reviews and tokens never mix with the live ones
+DATA_DIR = os.path.join(ROOT, "2_data_pipeline", "data")
+if REVIEW_SOURCE.data_subdir:
+    DATA_DIR = os.path.join(DATA_DIR, REVIEW_SOURCE.data_subdir)
+PROCESSED_DIR = os.path.join(DATA_DIR, "raw")
+ALL_RAW_PATH = os.path.join(PROCESSED_DIR, "all_reviews.csv")
+STATE_DIR = os.path.join(DATA_DIR, "state")
+APP_CACHE_PATH = os.path.join(STATE_DIR, "app_metadata.json")
+APP_SNAPSHOTS_PATH = os.path.join(PROCESSED_DIR, "app_snapshots.csv")
+os.makedirs(PROCESSED_DIR, exist_ok=True)
+
+RUN_ID = datetime.now().strftime("%Y%m%dT%H%M%S")
+APP_CACHE_TTL_HOURS = float((cfg.get("app_metadata", {}) or {}).get("cache_ttl_hours", 24))
+SCRAPE_MODE = str(cfg.get("scrape_mode", "full")).lower()  # "full", "incremental" or "replies"
+if SCRAPE_MODE not in ("full", "incremental", "replies"):
+    print(f"⚠️ Unknown scrape_mode '{SCRAPE_MODE}', falling back to 'full'")
+    SCRAPE_MODE = "full"
+
+CONCURRENCY = cfg.get("concurrency", {}) or {}
+CONCURRENT = bool(CONCURRENCY.get("enabled", False))
+MAX_WORKERS = max(1, int(CONCURRENCY.get("max_workers", 4)))
+PER_PACKAGE_SLEEP = {
+    pkg: float(delay) for pkg, delay in (cfg.get("per_package_sleep", {}) or {}).items()
+}
+DEDUP = cfg.get("dedup", {}) or {}
+REPLY_REFRESH = cfg.get("reply_refresh", {}) or {}
+REPLY_WINDOW_DAYS = float(REPLY_REFRESH.get("window_days", 30))
+REPLY_MAX_PAGES = max(1, int(REPLY_REFRESH.get("max_pages", 10)))
+REPLY_LOG_PATH = os.path.join(PROCESSED_DIR, "reply_updates.csv")
+
+# Locale matrix: every package is fetched once per (lang, country) pair,
+# `locales.default` unless it has its own list under `locales.per_package`
+LOCALES = cfg.get("locales", {}) or {}
+LEGACY_LOCALE = ("en", "et")
+
+
+def parse_locales(entries):
+    return [(str(e.get("lang", "en")), str(e.get("country", "et"))) for e in entries or []]
+
+
+DEFAULT_LOCALES = parse_locales(LOCALES.get("default")) or [LEGACY_LOCALE]
+PACKAGE_LOCALES = {
+    pkg: parse_locales(entries) for pkg, entries in (LOCALES.get("per_package", {}) or {}).items()
+}
+MAX_LOCALES_PER_PACKAGE = max(1, int(LOCALES.get("max_parallel_per_package", 2)))
+
+
+def locales_for(pkg):
+    return PACKAGE_LOCALES.get(pkg) or DEFAULT_LOCALES
+
+
+def locale_code(locale):
+    return f"{locale[0]}_{locale[1]}"
+
+
+def stream_key(pkg, locale):
+    """
+    Key of one (package, locale) stream in the scrape state and rate
+    limiter. en/et keeps the bare package name, so state saved before
+    locales existed carries over.
+    """
+    return pkg if locale == LEGACY_LOCALE else f"{pkg}@{locale_code(locale)}"
+
+# One adaptive limiter shared by all fetchers. The configured page delays
+# become each stream's starting rate; the limiter speeds up from there
+# while requests succeed and backs off on errors. Locales of a package get
+# their own buckets, so adding locales adds throughput; requests_per_second
+# still caps the total.
+RATE_LIMIT = cfg.get("rate_limit", {}) or {}
+LIMITER = AdaptiveRateLimiter.from_config(
+    RATE_LIMIT,
+    default_package_rate=1.0 / SLEEP if SLEEP > 0 else float(RATE_LIMIT.get("max_rate", 5.0)),
+    package_rates={
+        stream_key(pkg, locale): 1.0 / delay
+        for pkg, delay in PER_PACKAGE_SLEEP.items() if delay > 0
+        for locale in locales_for(pkg)
+    },
+)
 
 print(f"🎯 Target: {PER_BANK_TARGET} reviews per bank")
 print(f"📱 Apps to scrape: {len(PACKAGE_MAP)}")
+print(f"🔁 Scrape mode: {SCRAPE_MODE}")
+print(f"🌐 Review source: {SOURCE}")
+if CONCURRENT:
+    print(f"⚡ Concurrent mode: up to {MAX_WORKERS} packages in parallel")
+if any(len(locales_for(pkg)) > 1 for pkg in PACKAGE_MAP):
+    print(f"🗺️ Locale fan-out: up to {MAX_LOCALES_PER_PACKAGE} locales per package in parallel")
 
 # ---------------------------------------------------------
 # Package Validation
 # ---------------------------------------------------------
+def fetch_app_metadata(pkg, cache):
+    """Return (metadata, from_cache) for a package, asking the source only on a cache miss."""
+    cached = cache.get(pkg)
+    if cached is not None:
+        return cached, True
+
+    LIMITER.acquire(pkg)
+    started = time.monotonic()
+    try:
+        app_info = REVIEW_SOURCE.app_info(pkg)
+    except Exception as e:
+        LIMITER.record_failure(pkg, e, time.monotonic() - started)
+        raise
+    LIMITER.record_success(pkg, time.monotonic() - started)
+    return cache.put(pkg, app_info), False
+
+
 def validate_packages():
-    """Validate that all package names are correct"""
+    """
+    Validate that all package names are correct.
+
+    Packages are checked concurrently and app() metadata is cached on disk
+    for `app_metadata.cache_ttl_hours`. Every run appends the metadata it
+    used to app_snapshots.csv.
+    """
     print("\n🔍 Validating package names...")
     valid_packages = {}
-    
+    snapshots = []
+    cache = AppMetadataCache(APP_CACHE_PATH, ttl_hours=APP_CACHE_TTL_HOURS)
+
+    workers = max(1, min(MAX_WORKERS, len(PACKAGE_MAP)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validate") as pool:
+        futures = {pool.submit(fetch_app_metadata, pkg, cache): pkg for pkg in PACKAGE_MAP}
+        results = {}
+        for future in as_completed(futures):
+            pkg = futures[future]
+            try:
+                results[pkg] = future.result()
+            except Exception as e:
+                results[pkg] = e
+
+    # Report in config order so output stays stable between runs
     for pkg, bank_name in PACKAGE_MAP.items():
-        try:
-            app_info = app(pkg)
-            print(f"✅ {bank_name}: {pkg} → '{app_info['title']}'")
-            valid_packages[pkg] = bank_name
-        except Exception as e:
-            print(f"❌ {bank_name}: {pkg} → Error: {e}")
-    
+        result = results[pkg]
+        if isinstance(result, Exception):
+            print(f"❌ {bank_name}: {pkg} → Error: {result}")
+            continue
+        app_info, from_cache = result
+        cached_note = " (cached)" if from_cache else ""
+        print(f"✅ {bank_name}: {pkg} → '{app_info['title']}'{cached_note}")
+        valid_packages[pkg] = bank_name
+        snapshots.append((pkg, bank_name, app_info, from_cache))
+
+    cache.save()
+    append_snapshots(APP_SNAPSHOTS_PATH, RUN_ID, snapshots)
     return valid_packages
 
 # ---------------------------------------------------------
-# Scrape function
+# Scrape state
 # ---------------------------------------------------------
-def fetch_reviews_for_app(package_name, bank_name, target=PER_BANK_TARGET):
-    print(f"🔍 Starting scrape for {bank_name} ({package_name})...")
-    all_reviews = []
-    token = None
-    retries = 0
+STATE = ScrapeStateStore(STATE_DIR)
+SEEN = (
+    SeenReviewIndex(
+        os.path.join(STATE_DIR, "seen_reviews.sqlite"),
+        capacity=int(DEDUP.get("bloom_capacity", 1_000_000)),
+        error_rate=float(DEDUP.get("error_rate", 0.001)),
+    )
+    if DEDUP.get("enabled", True) else None
+)
 
-    pbar = tqdm(total=target, desc=f"Scraping {bank_name}", unit="rev")
 
-    while len(all_reviews) < target:
+def token_to_dict(token):
+    """Serialize the source's continuation token for the state file."""
+    return REVIEW_SOURCE.token_to_dict(token)
+
+
+def token_from_dict(data):
+    return REVIEW_SOURCE.token_from_dict(data)
+
+
+# ---------------------------------------------------------
+# Scrape function
+# ---------------------------------------------------------
+def fetch_page_with_retries(package_name, locale, token, label):
+    """
+    Fetch one page of a (package, locale) stream through the shared rate
+    limiter, backing off between attempts. Returns (results, next_token),
+    or None once MAX_RETRIES consecutive attempts have failed.
+    """
+    key = stream_key(package_name, locale)
+    lang, country = locale
+    for attempt in range(1, MAX_RETRIES + 1):
+        LIMITER.acquire(key)
+        started = time.monotonic()
         try:
-            results, token = reviews(
+            results, next_token = REVIEW_SOURCE.fetch_page(
                 package_name,
-                lang="en",
-                country="et",  # Changed to Ethiopia
-                sort=Sort.NEWEST,
+                lang=lang,
+                country=country,
                 count=100,
-                continuation_token=token
+                token=token
             )
         except Exception as e:
-            retries += 1
-            print(f"[{bank_name}] fetch error: {e} (retry {retries}/{MAX_RETRIES})")
+            latency = time.monotonic() - started
+            backoff = LIMITER.record_failure(key, e, latency)
+            record_fetch(package_name, latency, error=e, throttled=is_throttle_error(e))
+            tqdm.write(f"[{label}] fetch error: {e} (retry {attempt}/{MAX_RETRIES})")
+            if attempt < MAX_RETRIES:
+                record_retry(package_name)
+                time.sleep(backoff)
+            continue
+
+        latency = time.monotonic() - started
+        LIMITER.record_success(key, latency)
+        record_fetch(package_name, latency)
+        return results, next_token
+
+    tqdm.write(f"❌ Max retries reached for {label}. Moving to next bank.")
+    return None
+
+
+def review_row(r, package_name, bank_name, locale):
+    """One fetched review as a raw CSV row."""
+    return {
+        "review_id": r.get("reviewId", ""),
+        "review": r.get("content", ""),
+        "score": r.get("score", ""),
+        "at": r.get("at").isoformat() if r.get("at") else "",
+        "user_name": r.get("userName", ""),
+        "reply_text": r.get("replyContent") or "",
+        "reply_date": r.get("repliedAt").isoformat() if r.get("repliedAt") else "",
+        "package_name": package_name,
+        "bank_name": bank_name,
+        "source": SOURCE,
+        "locale": locale_code(locale)
+    }
+
+
+def iter_review_pages(package_name, bank_name, target=PER_BANK_TARGET, position=None, mode=None,
+                      locale=LEGACY_LOCALE, skip_completed=False):
+    """
+    Fetch up to `target` reviews for one package in one (lang, country)
+    locale, yielding one list of rows per fetched page. Nothing is
+    accumulated between pages.
+
+    Retry state and the progress bar are local to the call, so several
+    packages and locales can be fetched at once from worker threads.
+    `position` pins the tqdm bar to its own terminal line.
+
+    mode="incremental" pages until it reaches the stream's high-water mark
+    from the previous run, however many reviews are new; the mark only
+    advances once everything above it has been fetched. mode="full" checkpoints its continuation token after
+    every page and resumes from it if the previous full run was cut short;
+    with `skip_completed` a stream whose backfill already finished is not
+    fetched again. The checkpoint for a page is saved only once the
+    consumer asks for the next page, i.e. after it has persisted the rows
+    it was given.
+
+    Review IDs already in the seen index, or claimed by another locale of
+    the same run, are dropped as they arrive; a page's IDs are recorded
+    together with its checkpoint.
+    """
+    mode = mode or SCRAPE_MODE
+    key = stream_key(package_name, locale)
+    label = bank_name if locale == LEGACY_LOCALE else f"{bank_name} [{locale_code(locale)}]"
 
-            if retries >= MAX_RETRIES:
-                print(f"❌ Max retries reached for {bank_name}. Moving to next bank.")
+    collected = 0
+    newest_rows = []
+    unpersisted = []
+    token = None
+    failed = False
+    collected_before = 0
+    duplicates = 0
+
+    newest_at, newest_ids = STATE.high_water_mark(key)
+    incremental = mode == "incremental" and newest_at is not None
+    if mode == "full" and skip_completed and not STATE.backfill_active(key):
+        tqdm.write(f"ℹ️  {label}: backfill already complete")
+        return
+
+    tqdm.write(f"🔍 Starting scrape for {label} ({package_name})...")
+    if incremental:
+        tqdm.write(f"[{label}] Incremental: fetching reviews newer than {newest_at}")
+    elif mode == "full":
+        saved_token, collected_before = STATE.backfill_checkpoint(key)
+        token = token_from_dict(saved_token)
+        if token is not None:
+            tqdm.write(f"[{label}] Resuming interrupted scrape after {collected_before} reviews")
+
+    target = max(target - collected_before, 0)
+    # An incremental run has to reach the known reviews, or the ones
+    # between the target and the old mark would never be fetched
+    pbar = tqdm(total=None if incremental else target, desc=f"Scraping {label}", unit="rev", position=position)
+    reached_known = False
+
+    try:
+        while (incremental or collected < target) and not reached_known:
+            page = fetch_page_with_retries(package_name, locale, token, label)
+            if page is None:
+                failed = True
                 break
+            results, token = page
 
-            time.sleep(SLEEP * 2)
-            continue
+            if not results:
+                tqdm.write(f"ℹ️  No more results for {label}")
+                break
 
-        retries = 0
+            page_rows = []
+            duplicates_before = duplicates
+            for r in results:
+                row = review_row(r, package_name, bank_name, locale)
 
-        if not results:
-            print(f"ℹ️  No more results for {bank_name}")
-            break
+                if incremental and row["at"]:
+                    # NEWEST ordering: everything from here on was seen last run
+                    if row["at"] < newest_at:
+                        reached_known = True
+                        break
+                    if row["at"] == newest_at and row["review_id"] in newest_ids:
+                        continue
 
-        for r in results:
-            row = {
-                "review_id": r.get("reviewId", ""),
-                "review": r.get("content", ""),
-                "score": r.get("score", ""),
-                "at": r.get("at").isoformat() if r.get("at") else "",
-                "user_name": r.get("userName", ""),
-                "reply_text": r.get("replyContent") or "",
-                "reply_date": r.get("repliedAt").isoformat() if r.get("repliedAt") else "",
-                "package_name": package_name,
-                "bank_name": bank_name,
-                "source": SOURCE
-            }
-            all_reviews.append(row)
-            pbar.update(1)
-
-            if len(all_reviews) >= target:
+                if SEEN is not None and row["review_id"] and not SEEN.claim(row["review_id"]):
+                    duplicates += 1
+                    continue
+
+                page_rows.append(row)
+                pbar.update(1)
+
+                if not incremental and collected + len(page_rows) >= target:
+                    break
+
+            collected += len(page_rows)
+            record_reviews(package_name, locale_code(locale), len(page_rows))
+            record_duplicates(package_name, duplicates - duplicates_before)
+            if not newest_rows and page_rows:
+                # Pages arrive newest first; the first one holds the high-water rows
+                newest_rows = page_rows
+            if page_rows:
+                unpersisted = page_rows
+                yield page_rows
+                if SEEN is not None:
+                    SEEN.add(package_name, page_rows)
+                unpersisted = []
+            if mode == "full":
+                STATE.save_backfill_checkpoint(key, token_to_dict(token), collected_before + collected)
+
+            if reached_known:
+                tqdm.write(f"ℹ️  Reached reviews already collected for {label}")
                 break
 
-        if not token:
-            print(f"ℹ️  No continuation token for {bank_name}")
-            break
+            if not token:
+                tqdm.write(f"ℹ️  No continuation token for {label}")
+                break
+    finally:
+        pbar.close()
+        if SEEN is not None and unpersisted:
+            SEEN.release(unpersisted)
+
+    # A run that was not cut short by errors no longer needs its checkpoint.
+    # Yielded rows have been persisted by the consumer, so the high-water
+    # mark may advance, except when an incremental run failed before
+    # reaching the old mark: the reviews in between are still missing.
+    if mode == "full" and not failed:
+        STATE.clear_backfill_checkpoint(key)
+    if not (incremental and failed):
+        STATE.advance_high_water_mark(key, newest_rows)
 
-        time.sleep(SLEEP)
+    duplicate_note = f" ({duplicates} duplicates skipped)" if duplicates else ""
+    tqdm.write(f"✅ {label}: Collected {collected} reviews{duplicate_note}")
 
-    pbar.close()
-    print(f"✅ {bank_name}: Collected {len(all_reviews)} reviews")
-    return all_reviews
+
+def fetch_reviews_for_app(package_name, bank_name, target=PER_BANK_TARGET, position=None, mode=None,
+                          locale=LEGACY_LOCALE):
+    """Fetch up to `target` reviews for one package and locale and return them as a list."""
+    return [
+        row
+        for page in iter_review_pages(
+            package_name, bank_name, target=target, position=position, mode=mode, locale=locale
+        )
+        for row in page
+    ]
 
 # ---------------------------------------------------------
 # Save CSV
 # ---------------------------------------------------------
-def write_csv(path, rows):
-    fieldnames = [
-        "review_id", "review", "score", "at", "user_name",
-        "reply_text", "reply_date", "package_name", "bank_name", "source"
-    ]
+FIELDNAMES = [
+    "review_id", "review", "score", "at", "user_name",
+    "reply_text", "reply_date", "package_name", "bank_name", "source", "locale"
+]
+
 
+def write_csv(path, rows):
     with open(path, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(rows)
 
     print(f"💾 Saved {len(rows)} reviews → {path}")
 
+# ---------------------------------------------------------
+# Per-package job
+# ---------------------------------------------------------
+def bank_file_path(bank_name):
+    return os.path.join(PROCESSED_DIR, f"{bank_name.lower().replace(' ', '_')}_reviews.csv")
+
+
+def package_sink_mode(pkg):
+    """
+    How a package's outputs continue from the previous run: "append" (an
+    incremental delta on top of known reviews), "resume" (an interrupted
+    full scrape) or "rewrite".
+    """
+    keys = [stream_key(pkg, locale) for locale in locales_for(pkg)]
+    if SCRAPE_MODE == "incremental":
+        return "append" if any(STATE.high_water_mark(k)[0] is not None for k in keys) else "rewrite"
+    return "resume" if any(STATE.backfill_active(k) for k in keys) else "rewrite"
+
+
+def open_combined_sinks(valid_packages):
+    """
+    Sinks for the combined dataset: the Parquet dataset (primary) and/or
+    all_reviews.csv. The delta is appended when every package continues
+    an incremental run; otherwise the data is staged and moved into place
+    when the run commits, with the rows of continuing packages carried over.
+    """
+    appending = SCRAPE_MODE == "incremental" and all(
+        package_sink_mode(pkg) == "append" for pkg in valid_packages
+    )
+    sink_mode = "append" if appending else "rewrite"
+    sinks = []
+    if PARQUET_ENABLED:
+        sinks.append(ParquetReviewSink(dataset_path(ALL_RAW_PATH), FIELDNAMES, mode=sink_mode))
+    if CSV_EXPORT:
+        sinks.append(ReviewSink(ALL_RAW_PATH, FIELDNAMES, mode=sink_mode))
+    return sinks
+
+
+def scrape_package(pkg, bank_name, combined_sinks, position=None):
+    """
+    Scrape one package in all of its locales, streaming every page to its
+    per-bank CSV file and to the shared combined sinks. Locales are fetched
+    in parallel, up to `locales.max_parallel_per_package`, and merged with
+    cross-locale dedup on review_id. Returns the number of reviews fetched.
+
+    The per-bank file is appended to when continuing from a previous run
+    (incremental delta or resumed full scrape) and rebuilt otherwise; a
+    rebuild starts the package with an empty seen-set.
+    """
+    locales = locales_for(pkg)
+    keys = [stream_key(pkg, locale) for locale in locales]
+    sink_mode = package_sink_mode(pkg)
+
+    if sink_mode == "rewrite":
+        if SEEN is not None:
+            SEEN.forget_package(pkg)
+        if SCRAPE_MODE == "full":
+            # Mark every locale as in progress, so a resumed run knows
+            # which ones already finished
+            for k in keys:
+                STATE.start_backfill(k)
+
+    bank_sink = ReviewSink(bank_file_path(bank_name), FIELDNAMES, mode=sink_mode) if CSV_EXPORT else None
+    for sink in combined_sinks:
+        if isinstance(sink, ParquetReviewSink):
+            sink.prepare_bank(bank_name, resume=sink_mode != "rewrite")
+        elif sink_mode != "rewrite" and sink.mode == "rewrite":
+            # all_reviews.csv is being rebuilt; carry over the rows this bank
+            # already has (from earlier runs or the interrupted one)
+            sink.copy_from(bank_sink.write_path)
+
+    def fetch_locale(locale, locale_position):
+        count = 0
+        pages = iter_review_pages(
+            pkg, bank_name, target=PER_BANK_TARGET, position=locale_position,
+            locale=locale, skip_completed=sink_mode == "resume",
+        )
+        for page in pages:
+            if bank_sink is not None:
+                bank_sink.write_rows(page)
+            for sink in combined_sinks:
+                sink.write_rows(page)
+            count += len(page)
+        return count
+
+    fetched = 0
+    try:
+        if len(locales) == 1:
+            fetched = fetch_locale(locales[0], position)
+        else:
+            base = position or 0
+            workers = min(MAX_LOCALES_PER_PACKAGE, len(locales))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="locale") as pool:
+                futures = [
+                    pool.submit(fetch_locale, locale, base + i) for i, locale in enumerate(locales)
+                ]
+                errors = []
+                for future in futures:
+                    try:
+                        fetched += future.result()
+                    except Exception as e:
+                        errors.append(e)
+            if errors:
+                raise errors[0]
+    except BaseException:
+        if bank_sink is not None:
+            bank_sink.close()
+        raise
+
+    if bank_sink is not None:
+        if fetched or sink_mode == "resume":
+            bank_sink.commit()
+        else:
+            # Nothing fetched: keep the previous per-bank file as it was
+            bank_sink.discard()
+        if fetched:
+            action = "Saved" if sink_mode == "rewrite" else "Appended"
+            tqdm.write(f"💾 {action} {fetched} reviews → {bank_sink.path}")
+    return fetched
+
+
+def scrape_serial(valid_packages, combined_sinks):
+    """Scrape packages one after another. Yields (bank_name, count or exception)."""
+    for pkg, bank_name in valid_packages.items():
+        print(f"\n{'='*40}")
+        print(f"📱 Processing: {bank_name}")
+        print(f"{'='*40}")
+
+        try:
+            yield bank_name, scrape_package(pkg, bank_name, combined_sinks)
+        except Exception as e:
+            yield bank_name, e
+
+
+def scrape_concurrent(valid_packages, combined_sinks, max_workers=MAX_WORKERS):
+    """
+    Scrape all packages in parallel on a bounded thread pool.
+    Yields (bank_name, count or exception) as each package finishes.
+    """
+    workers = min(max_workers, len(valid_packages))
+    print(f"\n⚡ Scraping {len(valid_packages)} packages with {workers} workers...")
+
+    # One progress-bar line per (package, locale) stream
+    positions = {}
+    next_position = 0
+    for pkg in valid_packages:
+        positions[pkg] = next_position
+        next_position += len(locales_for(pkg))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as pool:
+        futures = {
+            pool.submit(scrape_package, pkg, bank_name, combined_sinks, positions[pkg]): bank_name
+            for pkg, bank_name in valid_packages.items()
+        }
+        for future in as_completed(futures):
+            bank_name = futures[future]
+            try:
+                yield bank_name, future.result()
+            except Exception as e:
+                yield bank_name, e
+
+# ---------------------------------------------------------
+# Reply refresh
+# ---------------------------------------------------------
+def fetch_recent_rows(package_name, bank_name, locale, since):
+    """
+    Re-fetch one stream's reviews posted since `since` (newest first, at
+    most REPLY_MAX_PAGES pages). Bypasses the seen index and scrape state.
+    """
+    label = bank_name if locale == LEGACY_LOCALE else f"{bank_name} [{locale_code(locale)}]"
+    rows = []
+    token = None
+    for _ in range(REPLY_MAX_PAGES):
+        page = fetch_page_with_retries(package_name, locale, token, label)
+        if page is None:
+            break
+        results, token = page
+
+        reached_window_end = False
+        for r in results:
+            row = review_row(r, package_name, bank_name, locale)
+            if row["at"] and row["at"] < since:
+                reached_window_end = True
+                break
+            rows.append(row)
+
+        if reached_window_end or not results or not token:
+            break
+    return rows
+
+
+def window_months(since, until):
+    """Review-month partitions ("YYYY-MM") covering since..until."""
+    months = []
+    year, month = since.year, since.month
+    while (year, month) <= (until.year, until.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def collect_reply_changes(pkg, bank_name):
+    """Reply changes of one package's reviews inside the refresh window."""
+    if not reviews_exist(ALL_RAW_PATH):
+        return []
+
+    now = datetime.now()
+    since = now - timedelta(days=REPLY_WINDOW_DAYS)
+    fetched = []
+    for locale in locales_for(pkg):
+        fetched.extend(fetch_recent_rows(pkg, bank_name, locale, since.isoformat()))
+
+    stored = load_reviews(
+        ALL_RAW_PATH,
+        columns=["review_id", "at", "reply_text", "reply_date", "bank_name"],
+        banks=[bank_name],
+        months=window_months(since, now),
+    )
+    changes = find_reply_changes(stored, fetched)
+    tqdm.write(f"🔁 {bank_name}: re-checked {len(fetched)} reviews, {len(changes)} replies changed")
+    return changes
+
+
+def apply_reply_changes(changes):
+    """Write changed reply fields to every stored copy of the raw reviews."""
+    by_bank = {}
+    for change in changes:
+        by_bank.setdefault(change["bank_name"], []).append(change)
+
+    for bank_name, bank_changes in by_bank.items():
+        updates = reply_updates(bank_changes)
+        if PARQUET_ENABLED:
+            months = sorted({c["review_at"][:7] for c in bank_changes if c["review_at"]})
+            update_reviews_dataset(dataset_path(ALL_RAW_PATH), updates, banks=[bank_name], months=months or None)
+        if CSV_EXPORT:
+            update_csv_replies(bank_file_path(bank_name), updates)
+    if CSV_EXPORT:
+        update_csv_replies(ALL_RAW_PATH, reply_updates(changes))
+    append_reply_log(REPLY_LOG_PATH, RUN_ID, changes)
+
+
+def refresh_replies(valid_packages):
+    """
+    scrape_mode "replies": re-check the last `reply_refresh.window_days`
+    of reviews and update only reply_text / reply_date where the bank has
+    answered (or edited its answer) since the review was stored.
+    """
+    print(f"\n💬 Refreshing developer replies from the last {REPLY_WINDOW_DAYS:g} days...")
+    changes = []
+    workers = min(MAX_WORKERS, len(valid_packages)) if CONCURRENT else 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="replies") as pool:
+        futures = {
+            pool.submit(collect_reply_changes, pkg, bank_name): bank_name
+            for pkg, bank_name in valid_packages.items()
+        }
+        for future in as_completed(futures):
+            try:
+                changes.extend(future.result())
+            except Exception as e:
+                print(f"❌ Error refreshing replies for {futures[future]}: {e}")
+
+    if changes:
+        apply_reply_changes(changes)
+        print(f"\n💾 Updated {len(changes)} replies; changes logged to {REPLY_LOG_PATH}")
+    else:
+        print("\nℹ️  No reply changes found.")
+    LIMITER.report()
+
 # ---------------------------------------------------------
 # Main
 # ---------------------------------------------------------
 def main():
-    print("\n🚀 STARTING GOOGLE PLAY REVIEW SCRAPER")
+    print(f"\n🚀 STARTING {SOURCE.upper()} REVIEW SCRAPER")
     print("=" * 50)
+    start_metrics_server()
+    track_stage("scrape")
     
     # Validate packages first
     valid_packages = validate_packages()
@@ -154,45 +728,58 @@ def main():
     if not valid_packages:
         print("❌ No valid packages found. Please check your config.yaml")
         return
+
+    if SCRAPE_MODE == "replies":
+        refresh_replies(valid_packages)
+        return
     
-    all_banks_reviews = []
+    total_reviews = 0
     successful_banks = []
     failed_banks = []
 
-    for pkg, bank_name in valid_packages.items():
-        print(f"\n{'='*40}")
-        print(f"📱 Processing: {bank_name}")
-        print(f"{'='*40}")
+    combined_sinks = open_combined_sinks(valid_packages)
 
-        try:
-            bank_reviews = fetch_reviews_for_app(pkg, bank_name, target=PER_BANK_TARGET)
+    if CONCURRENT and len(valid_packages) > 1:
+        results = scrape_concurrent(valid_packages, combined_sinks)
+    else:
+        results = scrape_serial(valid_packages, combined_sinks)
 
-            if bank_reviews:
-                # Store per-bank file
-                bank_file = os.path.join(PROCESSED_DIR, f"{bank_name.lower().replace(' ', '_')}_reviews.csv")
-                write_csv(bank_file, bank_reviews)
-                all_banks_reviews.extend(bank_reviews)
+    try:
+        for bank_name, bank_count in results:
+            if isinstance(bank_count, Exception):
+                print(f"❌ Error processing {bank_name}: {bank_count}")
+                failed_banks.append(bank_name)
+            elif bank_count:
+                total_reviews += bank_count
                 successful_banks.append(bank_name)
+            elif SCRAPE_MODE == "incremental":
+                print(f"ℹ️  No new reviews for {bank_name}")
             else:
                 failed_banks.append(bank_name)
                 print(f"❌ No reviews collected for {bank_name}")
-            
-        except Exception as e:
-            print(f"❌ Error processing {bank_name}: {e}")
-            failed_banks.append(bank_name)
-            continue
+    except BaseException:
+        for sink in combined_sinks:
+            sink.close()
+        raise
 
-    # Write combined dataset
-    if all_banks_reviews:
-        write_csv(ALL_RAW_PATH, all_banks_reviews)
+    if total_reviews or any(sink.rows_written for sink in combined_sinks):
+        for sink in combined_sinks:
+            sink.commit()
+            print(f"💾 Saved {sink.rows_written} reviews → {sink.path}")
         print(f"\n🎉 Scraping completed!")
-        print(f"📊 Total reviews collected: {len(all_banks_reviews)}")
+        print(f"📊 Total reviews collected: {total_reviews}")
         print(f"✅ Successful banks: {', '.join(successful_banks)}")
         if failed_banks:
             print(f"❌ Failed banks: {', '.join(failed_banks)}")
         print(f"📁 Output directory: {PROCESSED_DIR}")
+        LIMITER.report()
     else:
-        print("\n❌ No reviews were collected from any bank.")
+        for sink in combined_sinks:
+            sink.discard()
+        if SCRAPE_MODE == "incremental" and not failed_banks:
+            print("\nℹ️  No new reviews since the last run.")
+        else:
+            print("\n❌ No reviews were collected from any bank.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
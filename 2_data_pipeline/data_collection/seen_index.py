@@ -0,0 +1,121 @@
+"""
+2_data_pipeline/data_collection/seen_index.py
+
+Purpose:
+--------
+Seen-set of review IDs used by scraper.py to drop duplicates as they
+arrive, instead of leaving them for the text-hash pass in preprocessing:
+    ✓ In-memory Bloom filter answers "definitely new" without disk access
+    ✓ Exact SQLite index on disk confirms Bloom hits, so a false positive
+      never drops a real review
+    ✓ IDs are claimed in memory as they arrive and recorded on disk only
+      after their rows were persisted
+    ✓ Safe to share between scraper threads: concurrent locale fetches of
+      one package never both keep the same review
+"""
+
+import os
+import math
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+
+class BloomFilter:
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: two 64-bit halves of one digest give all k positions
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenReviewIndex:
+    def __init__(self, db_path, capacity=1_000_000, error_rate=0.001):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_reviews (
+                review_id TEXT PRIMARY KEY,
+                package_name TEXT NOT NULL,
+                first_seen_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_package ON seen_reviews (package_name)")
+        self._conn.commit()
+
+        self.bloom = BloomFilter(capacity, error_rate)
+        for (review_id,) in self._conn.execute("SELECT review_id FROM seen_reviews"):
+            self.bloom.add(review_id)
+
+    def _seen(self, review_id):
+        if review_id not in self.bloom:
+            return False
+        row = self._conn.execute(
+            "SELECT 1 FROM seen_reviews WHERE review_id = ?", (review_id,)
+        ).fetchone()
+        return row is not None
+
+    def claim(self, review_id):
+        """
+        Return True and reserve `review_id` if nobody has seen or claimed
+        it yet. The claim becomes permanent with add(); release() drops it.
+        """
+        with self._lock:
+            if review_id in self._pending or self._seen(review_id):
+                return False
+            self._pending.add(review_id)
+            return True
+
+    def release(self, rows):
+        """Give back the claims of rows that were never persisted."""
+        with self._lock:
+            self._pending.difference_update(row.get("review_id") for row in rows)
+
+    def add(self, package_name, rows):
+        """Record the review IDs of persisted rows."""
+        ids = [row["review_id"] for row in rows if row.get("review_id")]
+        if not ids:
+            return
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_reviews (review_id, package_name, first_seen_at) VALUES (?, ?, ?)",
+                [(review_id, package_name, now) for review_id in ids],
+            )
+            self._conn.commit()
+            for review_id in ids:
+                self.bloom.add(review_id)
+            self._pending.difference_update(ids)
+
+    def forget_package(self, package_name):
+        """
+        Drop a package's IDs before its data is rebuilt from scratch. The
+        Bloom filter keeps its bits; the exact index settles those lookups.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM seen_reviews WHERE package_name = ?", (package_name,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
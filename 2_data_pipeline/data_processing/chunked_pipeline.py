@@ -0,0 +1,379 @@
+# data_processing/chunked_pipeline.py
+"""
+Out-of-core version of DataCleaner.clean_pipeline for review tables larger
+than memory.
+
+The input is read in bounded chunks, twice:
+    1. A statistics pass collects what the cleaning steps need from the
+       whole table: the median rating (HistogramSketch) and how often each
+       exact review text occurs (on disk, for potential_duplicate_flag).
+    2. A cleaning pass runs the usual DataCleaner / DataPreprocessor steps
+       on each chunk with those global values, drops duplicates against an
+       on-disk fingerprint set and appends the cleaned chunk to the output.
+
+Quality metrics are merged from per-chunk sketches, so memory stays
+bounded by the chunk size however many reviews are processed. The rows
+written are the rows clean_pipeline would return for the whole table,
+with the same dtypes in every chunk. With a near-duplicate index, a
+review only finds the reviews before it, so the cluster labels are
+rewritten in a final pass over the output once every review is indexed
+(the index, and so this option, holds one signature per review in memory).
+
+keep_state=True keeps the fingerprints of earlier runs, so the output of
+such a run holds only reviews no earlier run stored; it refuses to
+replace an existing output file. A run's fingerprints only count as
+stored once its output is in place.
+
+    python chunked_pipeline.py raw_reviews.csv clean_reviews.csv --chunksize 100000
+"""
+import io
+import os
+import argparse
+import contextlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import DataCleaner
+from fingerprints import FINGERPRINT_COLUMN, FingerprintStore, add_text_fingerprints
+from near_duplicates import (
+    CLUSTER_COLUMN, SIMILARITY_COLUMN, NearDuplicateIndex, flag_near_duplicates, review_keys,
+)
+from sketches import HistogramSketch, MinMaxSketch, SumSketch
+from data_storage.review_schema import apply_review_schema
+
+CHUNK_SIZE = 100_000
+
+
+def read_chunks(source, chunksize=CHUNK_SIZE, column_mapping=None):
+    """
+    Chunks of `source`: a CSV path (read as text, like the raw files) or a
+    callable returning an iterable of DataFrames. `column_mapping` renames
+    raw columns (e.g. {'review': 'review_text'}).
+    """
+    if callable(source):
+        chunks = source()
+    else:
+        chunks = pd.read_csv(source, dtype=str, chunksize=chunksize)
+    for chunk in chunks:
+        if column_mapping:
+            chunk = chunk.rename(columns=column_mapping)
+        yield chunk
+
+
+class ChunkedCleaningPipeline:
+    def __init__(self, output_path, chunksize=CHUNK_SIZE, state_dir=None, keep_state=False,
+                 report_path=None, near_duplicate_index_path=None, text_workers=1):
+        self.output_path = output_path
+        self.chunksize = chunksize
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        self.state_dir = state_dir or os.path.join(output_dir, '.chunked_state')
+        # keep_state=True keeps the fingerprint set of earlier runs, so
+        # reviews they already stored are dropped as previously seen
+        self.keep_state = keep_state
+        self.report_path = report_path or os.path.join(output_dir, 'data_quality_report.txt')
+        # The near-duplicate index keeps every signature in memory, so it
+        # is only built when asked for
+        self.near_duplicate_index_path = near_duplicate_index_path
+        self.text_workers = text_workers
+        self.cleaner = DataCleaner(text_workers=text_workers)
+
+    # -----------------------------------------------------
+    # Pass 1: global statistics
+    # -----------------------------------------------------
+    def collect_statistics(self, source, column_mapping, store):
+        ratings = HistogramSketch()
+        rows = missing_texts = 0
+        # Whether the cleaned ratings hold anything but whole numbers
+        fractional_ratings = missing_ratings = False
+        for chunk in read_chunks(source, self.chunksize, column_mapping):
+            rows += len(chunk)
+            if 'rating' in chunk.columns:
+                # The ratings handle_missing_values sees, i.e. after validate_ratings
+                values = pd.to_numeric(chunk['rating'], errors='coerce').clip(1, 5)
+                ratings.update(values)
+                fractional_ratings = fractional_ratings or bool((values.dropna() % 1 != 0).any())
+                missing_ratings = missing_ratings or bool(values.isna().any())
+            if 'review_text' in chunk.columns:
+                missing_texts += int(chunk['review_text'].isnull().sum())
+                store.add_text_counts(chunk['review_text'])
+        rating_median = ratings.median()
+        # Missing ratings are filled with the median
+        if missing_ratings and pd.notna(rating_median) and rating_median % 1 != 0:
+            fractional_ratings = True
+        return rows, rating_median, missing_texts, fractional_ratings
+
+    def output_dtypes(self, missing_texts, fractional_ratings):
+        """
+        Dtypes the whole table would get, so every chunk is written alike
+        (a chunk without missing values would otherwise print 4, not 4.0)
+        """
+        return {
+            # The schema's Int8 only when every rating is a whole number
+            'rating': 'float64' if fractional_ratings else 'Int8',
+            'text_length': 'float64' if missing_texts else 'int64',
+        }
+
+    # -----------------------------------------------------
+    # Pass 2: clean, deduplicate, write
+    # -----------------------------------------------------
+    def clean_chunk(self, chunk, rating_median, missing_texts, store, run_id, near_duplicates,
+                    key_occurrences=None):
+        cleaner = self.cleaner
+        preprocessor = cleaner.preprocessor
+
+        chunk = cleaner.standardize_bank_names(chunk)
+        chunk = cleaner.clean_text_content(chunk)
+        chunk = cleaner.validate_ratings(chunk)
+        chunk, flags = cleaner.add_data_quality_flags(chunk)
+        # Duplicate texts are counted over the whole table, not this chunk
+        chunk['potential_duplicate_flag'] = store.text_counts(chunk['review_text']) > 1
+        flags['potential_duplicates'] = chunk['potential_duplicate_flag'].sum()
+        items = None
+        if near_duplicates is not None:
+            # Keys numbered across chunks, so copies in different chunks stay apart
+            keys = review_keys(chunk, occurrences=key_occurrences)
+            chunk, _ = flag_near_duplicates(chunk, near_duplicates, keys=keys)
+            # Index positions of the rows, to relabel them once every chunk is indexed
+            items = np.array([near_duplicates.key_ids.get(key, -1) for key in keys], dtype=np.int64)
+
+        chunk = preprocessor.handle_missing_values(chunk, rating_median=rating_median)
+        missing = preprocessor.quality_report['missing_values']
+        # Every chunk gets the flag column if any chunk has missing text
+        if missing_texts and 'review_text_missing_flag' not in chunk.columns:
+            chunk['review_text_missing_flag'] = chunk['review_text'].isnull()
+        chunk = preprocessor.normalize_dates(chunk)
+        dates = preprocessor.quality_report.get('date_normalization')
+
+        rows_in = len(chunk)
+        chunk = add_text_fingerprints(chunk)
+        duplicates, _ = preprocessor.duplicate_mask(chunk)
+        chunk = chunk[~duplicates]
+        is_seen, previously_seen = store.claim(chunk[FINGERPRINT_COLUMN], chunk['bank_name'], run_id)
+        chunk = chunk[~is_seen].copy()
+        chunk['text_length'] = chunk['review_text'].str.len()
+        kept = ~duplicates
+        kept[kept] = ~is_seen
+
+        return chunk, {
+            'flags': flags,
+            'missing': missing,
+            'dates': dates,
+            'rows_in': rows_in,
+            'previously_seen': previously_seen,
+            'items': items,
+            'kept': kept,
+        }
+
+    def relabel_near_duplicates(self, part_path, index, items, kept):
+        """
+        Rewrite the cluster labels of the output at `part_path` now that
+        every review is indexed (a review only met the reviews before it).
+        Returns how many of all `items` (every row, before deduplication)
+        are labelled.
+        """
+        cluster_ids, similarities = index.labels([None if item < 0 else item for item in items])
+        labelled = int((~cluster_ids.isna()).sum())
+        cluster_ids, similarities = cluster_ids[kept], similarities[kept]
+
+        relabelled_path = part_path + '.relabel'
+        offset = 0
+        # Every other field is copied through as the text it was written as
+        chunks = pd.read_csv(part_path, dtype=str, keep_default_na=False, chunksize=self.chunksize)
+        for number, chunk in enumerate(chunks):
+            end = offset + len(chunk)
+            chunk[CLUSTER_COLUMN] = cluster_ids[offset:end]
+            chunk[SIMILARITY_COLUMN] = similarities[offset:end]
+            chunk.to_csv(relabelled_path, mode='w' if number == 0 else 'a', header=number == 0,
+                         index=False, encoding='utf-8')
+            offset = end
+        os.replace(relabelled_path, part_path)
+        return labelled
+
+    def run(self, source, column_mapping=None, run_id=None):
+        """Clean `source` into self.output_path. Returns the quality report."""
+        run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        store = FingerprintStore(
+            os.path.join(self.state_dir, 'fingerprints.sqlite'), reset=not self.keep_state
+        )
+        if self.keep_state and store.has_seen() and os.path.exists(self.output_path):
+            # This run's output holds only new reviews; replacing the earlier
+            # output would lose the reviews it holds
+            print(f"[ERROR] {self.output_path} holds the output of an earlier run; "
+                  "choose a new output path when keeping state")
+            store.close()
+            return None
+        dropped = store.discard_pending()
+        if dropped:
+            print(f"[WARNING] Discarded {dropped:,} fingerprints of an interrupted run")
+        store.reset_text_counts()
+
+        print("[INFO] Starting chunked data cleaning pipeline...")
+        print(f"[INFO] Chunk size: {self.chunksize:,} reviews")
+        print("\n[PASS 1] Collecting global statistics...")
+        total_rows, rating_median, missing_texts, fractional_ratings = self.collect_statistics(
+            source, column_mapping, store
+        )
+        dtypes = self.output_dtypes(missing_texts, fractional_ratings)
+        print(f"[INFO] {total_rows:,} reviews, median rating {rating_median}")
+
+        near_duplicates = None
+        if self.near_duplicate_index_path:
+            path = self.near_duplicate_index_path
+            near_duplicates = NearDuplicateIndex.load(path) if os.path.exists(path) else NearDuplicateIndex()
+
+        missing_counts = {}
+        flags_summary = {}
+        date_totals = {'total': 0, 'valid_dates': 0, 'invalid_dates': 0, 'date_formats_found': []}
+        rows_in = previously_seen = 0
+        final_count = 0
+        banks = set()
+        date_range = MinMaxSketch()
+        kept_ratings = HistogramSketch()
+        text_lengths = SumSketch()
+        reviews_with_text = 0
+        key_occurrences = {}
+        items, kept = [], []
+
+        print("\n[PASS 2] Cleaning chunks...")
+        part_path = self.output_path + '.part'
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        first = True
+        columns = []
+        for number, chunk in enumerate(read_chunks(source, self.chunksize, column_mapping), 1):
+            # The per-step messages would repeat for every chunk
+            with contextlib.redirect_stdout(io.StringIO()):
+                chunk, stats = self.clean_chunk(
+                    chunk, rating_median, missing_texts, store, run_id, near_duplicates, key_occurrences
+                )
+            self.cleaner.cleaning_log.clear()
+            chunk = apply_review_schema(chunk)
+            chunk = chunk.astype({col: dtype for col, dtype in dtypes.items() if col in chunk.columns})
+            if stats['items'] is not None:
+                items.append(stats['items'])
+                kept.append(stats['kept'])
+
+            chunk.to_csv(part_path, mode='w' if first else 'a', header=first, index=False, encoding='utf-8')
+            first = False
+            columns = chunk.columns
+
+            for col, counts in stats['missing'].items():
+                merged = missing_counts.setdefault(col, [0, 0])
+                merged[0] += int(counts['missing_count'])
+                merged[1] += int(counts['total_values'])
+            for name, count in stats['flags'].items():
+                flags_summary[name] = flags_summary.get(name, 0) + int(count)
+            if stats['dates']:
+                for key in ('total', 'valid_dates', 'invalid_dates'):
+                    date_totals[key] += stats['dates'][key]
+                for fmt in stats['dates']['date_formats_found']:
+                    if fmt not in date_totals['date_formats_found']:
+                        date_totals['date_formats_found'].append(fmt)
+            rows_in += stats['rows_in']
+            previously_seen += stats['previously_seen']
+
+            final_count += len(chunk)
+            if 'bank_name' in chunk.columns:
+                banks.update(chunk['bank_name'].dropna().unique())
+            if 'review_date' in chunk.columns:
+                # On the values: to_datetime() of a categorical (the schema's
+                # review_date) can return a categorical, which has no min()
+                date_range.update(pd.to_datetime(chunk['review_date'].astype(object), errors='coerce'))
+            if 'rating' in chunk.columns:
+                kept_ratings.update(chunk['rating'])
+            if 'review_text' in chunk.columns:
+                text_lengths.update(chunk['text_length'])
+                reviews_with_text += int(chunk['review_text'].notnull().sum())
+
+            print(f"  Chunk {number}: kept {len(chunk):,} reviews ({final_count:,} so far)")
+
+        if first:
+            print("[ERROR] No data to clean!")
+            store.close()
+            return None
+        if near_duplicates is not None:
+            print("\n[PASS 3] Relabelling near-duplicate clusters...")
+            labelled = self.relabel_near_duplicates(
+                part_path, near_duplicates, np.concatenate(items), np.concatenate(kept)
+            )
+            for col in (CLUSTER_COLUMN, SIMILARITY_COLUMN):
+                if col in missing_counts:
+                    missing_counts[col][0] = missing_counts[col][1] - labelled
+        os.replace(part_path, self.output_path)
+        # Only now are this run's reviews stored
+        store.promote(run_id)
+        if near_duplicates is not None:
+            near_duplicates.save(self.near_duplicate_index_path)
+        store.close()
+
+        # -------------------------------------------------
+        # Merge the per-chunk results into one quality report
+        # -------------------------------------------------
+        preprocessor = self.cleaner.preprocessor
+        report = preprocessor.quality_report
+        report.clear()
+        report['missing_values'] = {
+            col: {
+                'missing_count': missing,
+                'missing_percentage': round(np.float64(missing) / total * 100, 2) if total else 0.0,
+                'total_values': total,
+            }
+            for col, (missing, total) in missing_counts.items()
+        }
+        if date_totals['total']:
+            report['date_normalization'] = date_totals
+        with contextlib.redirect_stdout(io.StringIO()):
+            preprocessor.record_duplicate_removal(rows_in, final_count, previously_seen)
+
+        metrics = {
+            'total_reviews': final_count,
+            'banks_covered': len(banks),
+            'date_range': {},
+            'rating_distribution': {},
+            'text_length_stats': {}
+        }
+        if date_range.minimum is not None:
+            metrics['date_range'] = {
+                'earliest': date_range.minimum.strftime('%Y-%m-%d'),
+                'latest': date_range.maximum.strftime('%Y-%m-%d'),
+                'span_days': (date_range.maximum - date_range.minimum).days
+            }
+        if 'rating' in columns:
+            metrics['rating_distribution'] = {
+                'average': round(kept_ratings.mean(), 2),
+                'median': kept_ratings.median(),
+                'distribution': kept_ratings.distribution()
+            }
+        if 'review_text' in columns:
+            lengths = text_lengths.range
+            # Lengths are floats once a review has no text, as in pandas
+            as_number = float if reviews_with_text < final_count else int
+            metrics['text_length_stats'] = {
+                'avg_length': round(text_lengths.mean(), 0),
+                'min_length': np.nan if lengths.minimum is None else as_number(lengths.minimum),
+                'max_length': np.nan if lengths.maximum is None else as_number(lengths.maximum),
+                'reviews_with_text': reviews_with_text
+            }
+        report['quality_metrics'] = metrics
+
+        print(f"\n[INFO] Data quality flags: {flags_summary}")
+        preprocessor.save_quality_report(self.report_path)
+        print(f"\n[SUCCESS] {final_count:,} of {total_rows:,} reviews written to: {self.output_path}")
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean a review CSV in bounded chunks")
+    parser.add_argument("input", help="review CSV with review_text, rating, bank_name, ... columns")
+    parser.add_argument("output", help="where to write the cleaned CSV")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--keep-state", action="store_true",
+                        help="also drop reviews stored by earlier runs with the same state directory "
+                             "(the output path must be new)")
+    parser.add_argument("--state-dir", default=None)
+    args = parser.parse_args()
+
+    ChunkedCleaningPipeline(
+        args.output, chunksize=args.chunksize, state_dir=args.state_dir, keep_state=args.keep_state
+    ).run(args.input)
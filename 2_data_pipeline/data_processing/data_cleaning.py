@@ -1,13 +1,27 @@
 # data_processing/data_cleaning.py - ENHANCED VERSION
 import pandas as pd
 import numpy as np
-import re
+import os
+import sys
 from preprocessing import DataPreprocessor
+from near_duplicates import NearDuplicateIndex, flag_near_duplicates, CLUSTER_COLUMN
+from text_cleaning import clean_text_series, factorize_texts
+from fingerprints import FINGERPRINT_COLUMN, text_fingerprints
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from data_storage.review_schema import apply_review_schema
 
 class DataCleaner:
-    def __init__(self):
+    def __init__(self, near_duplicate_index_path=None, text_workers=None):
         self.preprocessor = DataPreprocessor()
         self.cleaning_log = []
+        # Where the near-duplicate index is kept between runs (None: in memory only)
+        self.near_duplicate_index_path = near_duplicate_index_path
+        # Processes for cleaning very large text columns (None: all CPUs, 1: none)
+        self.text_workers = text_workers
     
     def standardize_bank_names(self, df):
         """Standardize bank names to ensure consistency"""
@@ -43,24 +57,11 @@ class DataCleaner:
         return df
     
     def clean_text_content(self, df):
-        """Clean review text content"""
+        """Clean review text content (see text_cleaning.clean_text)"""
         if 'review_text' not in df.columns:
             return df
         
-        def clean_text(text):
-            if pd.isna(text):
-                return text
-            
-            text = str(text)
-            # Remove excessive whitespace
-            text = re.sub(r'\s+', ' ', text)
-            # Remove special characters but keep basic punctuation
-            text = re.sub(r'[^\w\s.,!?\-]', '', text)
-            # Trim
-            text = text.strip()
-            return text
-        
-        df['review_text_cleaned'] = df['review_text'].apply(clean_text)
+        df['review_text_cleaned'] = clean_text_series(df['review_text'], workers=self.text_workers)
         
         # Flag empty or very short reviews
         df['text_length'] = df['review_text_cleaned'].str.len()
@@ -78,6 +79,10 @@ class DataCleaner:
         
         # Convert to numeric, coercing errors to NaN
         df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
+        if isinstance(df['rating'].dtype, pd.api.extensions.ExtensionDtype):
+            # Nullable integers (the schema's Int8) could not take a
+            # fractional median when missing ratings are filled
+            df['rating'] = df['rating'].astype('float64')
         
         # Ensure ratings are between 1-5
         invalid_ratings = df['rating'].isna().sum()
@@ -119,14 +124,30 @@ class DataCleaner:
         
         return df, flags_summary
     
-    def clean_pipeline(self, df):
-        """
-        Complete data cleaning pipeline
-        """
-        print("[INFO] Starting data cleaning pipeline...")
+    def detect_near_duplicates(self, df):
+        """Cluster reviews that are copies of each other up to small edits"""
+        path = self.near_duplicate_index_path
+        index = NearDuplicateIndex.load(path) if path and os.path.exists(path) else None
         
-        original_count = len(df)
+        df, index = flag_near_duplicates(df, index)
+        if path:
+            index.save(path)
+        
+        if CLUSTER_COLUMN in df.columns:
+            flagged = df[CLUSTER_COLUMN].notna()
+            clusters = df.loc[flagged, CLUSTER_COLUMN].nunique()
+            self.cleaning_log.append(
+                f"Found {flagged.sum()} near-duplicate reviews in {clusters} clusters"
+            )
         
+        return df
+    
+    def clean_stage(self, df):
+        """
+        Steps 1-5 of clean_pipeline, before preprocessing. Returns
+        (df, flags_summary); callers that checkpoint between stages run
+        this and preprocessor.preprocess_pipeline separately.
+        """
         # Step 1: Standardize bank names
         print("\n[STEP 1] Standardizing bank names...")
         df = self.standardize_bank_names(df)
@@ -143,8 +164,31 @@ class DataCleaner:
         print("\n[STEP 4] Adding data quality flags...")
         df, flags_summary = self.add_data_quality_flags(df)
         
-        # Step 5: Run preprocessing pipeline
-        print("\n[STEP 5] Running preprocessing pipeline...")
+        # Step 5: Detect near-duplicates
+        print("\n[STEP 5] Detecting near-duplicate reviews...")
+        df = self.detect_near_duplicates(df)
+        
+        return df, flags_summary
+    
+    def clean_pipeline(self, df, fused=False):
+        """
+        Complete data cleaning pipeline
+
+        fused=True runs fused_clean_pipeline, which gives the same result
+        in fewer passes over the data
+        """
+        if fused and self.can_fuse(df):
+            return self.fused_clean_pipeline(df)
+        
+        print("[INFO] Starting data cleaning pipeline...")
+        
+        original_count = len(df)
+        
+        # Steps 1-5: cleaning
+        df, flags_summary = self.clean_stage(df)
+        
+        # Step 6: Run preprocessing pipeline
+        print("\n[STEP 6] Running preprocessing pipeline...")
         df, quality_report = self.preprocessor.preprocess_pipeline(df)
         
         # Log summary
@@ -165,4 +209,115 @@ class DataCleaner:
         
         print("\n" + "=" * 60)
         
-        return df, quality_report
\ No newline at end of file
+        # Cleaned tables leave with the canonical dtypes (review_schema.py)
+        return apply_review_schema(df), quality_report
+    
+    def can_fuse(self, df):
+        """The fused pipeline needs the columns the steps use and text-only review_text"""
+        if not {'review_text', 'rating', 'bank_name'}.issubset(df.columns):
+            return False
+        return pd.api.types.infer_dtype(df['review_text'], skipna=True) in ('string', 'empty')
+    
+    def fused_clean_pipeline(self, df):
+        """
+        clean_pipeline with the per-text work shared between steps.
+
+        review_text is factorized once; cleaned text, blank and duplicate
+        flags and fingerprints are computed per distinct text from it, and
+        its lengths are reused by the quality metrics. Rows are removed
+        with a single mask at the end instead of a copy per step.
+        """
+        print("[INFO] Starting fused data cleaning pipeline...")
+        
+        original_count = len(df)
+        preprocessor = self.preprocessor
+        
+        print("\n[STEP 1] Standardizing bank names...")
+        df = self.standardize_bank_names(df)
+        
+        print("\n[STEP 2] Cleaning text content...")
+        texts = df['review_text']
+        factorized = factorize_texts(texts)
+        present, codes, uniques = factorized
+        df['review_text_cleaned'] = clean_text_series(texts, workers=self.text_workers, factorized=factorized)
+        df['text_length'] = df['review_text_cleaned'].str.len()
+        short_reviews = (df['text_length'] < 10).sum()
+        if short_reviews > 0:
+            self.cleaning_log.append(f"Found {short_reviews} reviews with less than 10 characters")
+        
+        print("\n[STEP 3] Validating ratings...")
+        df = self.validate_ratings(df)
+        
+        print("\n[STEP 4] Adding data quality flags...")
+        text_lengths = texts.str.len()
+        blank = np.array([text.strip() == '' for text in uniques], dtype=bool)
+        repeated = np.bincount(codes, minlength=len(uniques)) > 1
+        missing_text = ~present
+        missing_text[present] = blank[codes]
+        potential_duplicate = np.zeros(len(df), dtype=bool)
+        potential_duplicate[present] = repeated[codes]
+        
+        # In the dtype add_data_quality_flags gives it (bool, or boolean /
+        # bool[pyarrow] for nullable strings), so the summary counts match
+        head = texts.iloc[:1]
+        flag_dtype = (head.isna() | (head.str.strip() == '')).dtype
+        df['missing_text_flag'] = pd.array(missing_text, dtype=flag_dtype)
+        df['missing_rating_flag'] = df['rating'].isna()
+        df['short_text_flag'] = text_lengths < 20
+        df['potential_duplicate_flag'] = potential_duplicate
+        flags_summary = {
+            'missing_text': df['missing_text_flag'].sum(),
+            'missing_rating': df['missing_rating_flag'].sum(),
+            'short_text': df['short_text_flag'].sum(),
+            'potential_duplicates': df['potential_duplicate_flag'].sum()
+        }
+        self.cleaning_log.append(f"Data quality flags added: {flags_summary}")
+        
+        print("\n[STEP 5] Detecting near-duplicate reviews...")
+        df = self.detect_near_duplicates(df)
+        
+        print("\n[STEP 6] Running preprocessing pipeline...")
+        print("\n[STEP 6.1] Handling missing values...")
+        df = preprocessor.handle_missing_values(df)
+        
+        print("\n[STEP 6.2] Normalizing dates...")
+        df = preprocessor.normalize_dates(df)
+        
+        print("\n[STEP 6.3] Removing duplicates...")
+        before_dedup = len(df)
+        df[FINGERPRINT_COLUMN] = text_fingerprints(texts, factorized=factorized)
+        duplicates, previously_seen = preprocessor.duplicate_mask(df)
+        keep = ~duplicates
+        df = df[keep]
+        preprocessor.record_duplicate_removal(before_dedup, len(df), previously_seen)
+        
+        print("\n[STEP 6.4] Calculating quality metrics...")
+        kept_lengths = text_lengths[keep]
+        # str.len() gives floats only when a missing text is among the rows
+        if kept_lengths.dtype == 'float64' and not kept_lengths.isna().any():
+            kept_lengths = kept_lengths.astype('int64')
+        preprocessor.calculate_data_quality_metrics(df, text_lengths=kept_lengths)
+        
+        print("\n[STEP 6.5] Generating quality report...")
+        preprocessor.save_quality_report()
+        quality_report = preprocessor.quality_report
+        
+        final_count = len(df)
+        removed_count = original_count - final_count
+        
+        print("\n" + "=" * 60)
+        print("CLEANING PIPELINE COMPLETE")
+        print("=" * 60)
+        print(f"Original reviews: {original_count}")
+        print(f"Final reviews: {final_count}")
+        print(f"Removed during cleaning: {removed_count}")
+        
+        if self.cleaning_log:
+            print("\nCleaning actions performed:")
+            for log in self.cleaning_log:
+                print(f"  • {log}")
+        
+        print("\n" + "=" * 60)
+        
+        # Cleaned tables leave with the canonical dtypes (review_schema.py)
+        return apply_review_schema(df), quality_report
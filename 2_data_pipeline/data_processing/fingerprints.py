@@ -0,0 +1,240 @@
+# data_processing/fingerprints.py
+"""
+Stable content fingerprints for review text.
+
+Python's built-in hash() is salted per process, so anything derived from
+it changes between runs and between workers. These fingerprints are
+blake2b digests of the normalized text (lower-cased, stripped, first 500
+characters), so they are identical everywhere and can be stored in the
+`text_fingerprint` column and compared against later runs.
+
+FingerprintStore keeps fingerprint sets on disk for tables processed in
+chunks.
+"""
+import os
+import sqlite3
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from text_cleaning import factorize_texts
+
+FINGERPRINT_COLUMN = 'text_fingerprint'
+NORMALIZED_LENGTH = 500
+DIGEST_SIZE = 8
+
+
+def normalize_text(text):
+    """The text a fingerprint is computed over"""
+    return str(text).lower().strip()[:NORMALIZED_LENGTH]
+
+
+def fingerprint(*parts):
+    """Hex blake2b digest of `parts`, joined by a unit separator"""
+    data = '\x1f'.join(str(part) for part in parts)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def text_fingerprint(text):
+    """Fingerprint of one review text, None for missing text"""
+    if pd.isna(text):
+        return None
+    return fingerprint(normalize_text(text))
+
+
+def text_fingerprints(texts, factorized=None):
+    """
+    Fingerprints of a Series of texts; each distinct text is hashed once.
+    `factorized` can pass in text_cleaning.factorize_texts(texts).
+    """
+    # Not pd.factorize: on objects it merges strings that differ after a NUL
+    present, codes, uniques = factorized if factorized is not None else factorize_texts(texts)
+    # Factorized texts are never missing
+    lookup = np.array([fingerprint(normalize_text(text)) for text in uniques], dtype=object)
+    values = np.full(len(texts), None, dtype=object)
+    values[present] = lookup[codes] if len(lookup) else []
+    return pd.Series(values, index=texts.index, dtype=object)
+
+
+def frame_fingerprint(df):
+    """
+    Content fingerprint of a whole DataFrame (column names, dtypes and
+    values, not the index), e.g. to tell whether a stage's input changed
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\x1f'.join(f"{col}:{dtype}" for col, dtype in df.dtypes.items()).encode('utf-8'))
+    if len(df.columns):
+        # Stable per-row hashes (hash_pandas_object is not salted per process)
+        row_hashes = pd.util.hash_pandas_object(df, index=False, categorize=False)
+        digest.update(row_hashes.to_numpy(dtype=np.uint64).tobytes())
+    return digest.hexdigest()
+
+
+def add_text_fingerprints(df, text_column='review_text', column=FINGERPRINT_COLUMN):
+    """Add (or refresh) the fingerprint column of `df`"""
+    if text_column in df.columns:
+        df[column] = text_fingerprints(df[text_column])
+    return df
+
+
+def seen_mask(df, seen, keys=(FINGERPRINT_COLUMN, 'bank_name')):
+    """
+    Boolean array marking the rows of `df` whose `keys` already occur in
+    `seen`, a frame of previously stored fingerprints (e.g. the columns of
+    last run's output), or None when there is nothing to compare with.
+    """
+    keys = [key for key in keys if key in df.columns]
+    if seen is None or len(seen) == 0 or not keys or not all(key in seen.columns for key in keys):
+        return None
+
+    seen_keys = pd.MultiIndex.from_frame(seen[keys].drop_duplicates())
+    return pd.MultiIndex.from_frame(df[keys]).isin(seen_keys)
+
+
+def drop_seen(df, seen, keys=(FINGERPRINT_COLUMN, 'bank_name')):
+    """Drop the rows seen_mask() marks. Returns (remaining rows, number dropped)."""
+    is_seen = seen_mask(df, seen, keys)
+    if is_seen is None:
+        return df, 0
+    return df[~is_seen], int(is_seen.sum())
+
+
+class FingerprintStore:
+    """
+    On-disk fingerprint sets (SQLite) for the chunked pipeline, so global
+    duplicate state does not have to fit in memory:
+        - seen (text_fingerprint, bank_name) keys, with the last run that
+          claimed them; a store kept between runs drops reviews stored by
+          earlier runs. A run's keys are staged as pending and only join
+          the seen set (promote) once its output is in place, so a run
+          that crashes first does not hide its reviews from the next one.
+        - occurrence counts of exact review texts
+    Missing values are stored as MISSING_KEY, so they match each other the
+    way they do in DataFrame.duplicated().
+    """
+    MISSING_KEY = '<NA>'
+
+    def __init__(self, db_path, reset=False):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        if reset and os.path.exists(db_path):
+            os.remove(db_path)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS seen_fingerprints (
+                text_fingerprint TEXT NOT NULL,
+                bank_name TEXT NOT NULL,
+                run_id TEXT,
+                PRIMARY KEY (text_fingerprint, bank_name)
+            );
+            CREATE TABLE IF NOT EXISTS pending_fingerprints (
+                text_fingerprint TEXT NOT NULL,
+                bank_name TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                PRIMARY KEY (text_fingerprint, bank_name)
+            );
+            CREATE TABLE IF NOT EXISTS text_counts (
+                text_hash TEXT PRIMARY KEY,
+                occurrences INTEGER NOT NULL
+            );
+            CREATE TEMP TABLE chunk_keys (key_a TEXT, key_b TEXT);
+            """
+        )
+
+    def _key(self, value):
+        return self.MISSING_KEY if value is None or pd.isna(value) else str(value)
+
+    def _load_chunk_keys(self, rows):
+        self.conn.execute("DELETE FROM chunk_keys")
+        self.conn.executemany("INSERT INTO chunk_keys VALUES (?, ?)", rows)
+
+    def claim(self, fingerprints, banks, run_id):
+        """
+        Stage the (fingerprint, bank) keys for `run_id` and return a
+        boolean array marking those stored before (by an earlier run or
+        an earlier chunk of this one), plus how many were stored by
+        earlier runs and not yet met in this one.
+        """
+        keys = [(self._key(fp), self._key(bank)) for fp, bank in zip(fingerprints, banks)]
+        self._load_chunk_keys(keys)
+        earlier_runs = {
+            (fp, bank) for fp, bank in self.conn.execute(
+                """
+                SELECT c.key_a, c.key_b FROM chunk_keys c
+                JOIN seen_fingerprints s ON s.text_fingerprint = c.key_a AND s.bank_name = c.key_b
+                """
+            )
+        }
+        this_run = {
+            (fp, bank) for fp, bank in self.conn.execute(
+                """
+                SELECT c.key_a, c.key_b FROM chunk_keys c
+                JOIN pending_fingerprints p ON p.text_fingerprint = c.key_a AND p.bank_name = c.key_b
+                """
+            )
+        }
+        # Keys of earlier runs are staged too, so each is counted once
+        self.conn.execute(
+            "INSERT OR IGNORE INTO pending_fingerprints SELECT key_a, key_b, ? FROM chunk_keys", (run_id,)
+        )
+        self.conn.commit()
+
+        is_seen = np.array([key in earlier_runs or key in this_run for key in keys], dtype=bool)
+        from_earlier_runs = len({key for key in keys if key in earlier_runs and key not in this_run})
+        return is_seen, from_earlier_runs
+
+    def promote(self, run_id):
+        """Move the keys `run_id` staged into the seen set, once its output is saved"""
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO seen_fingerprints
+                SELECT text_fingerprint, bank_name, run_id FROM pending_fingerprints WHERE run_id = ?
+                ON CONFLICT(text_fingerprint, bank_name) DO UPDATE SET run_id = excluded.run_id
+                """, (run_id,)
+            )
+            self.conn.execute("DELETE FROM pending_fingerprints WHERE run_id = ?", (run_id,))
+
+    def discard_pending(self):
+        """Drop keys staged by runs that never completed; returns how many"""
+        with self.conn:
+            return self.conn.execute("DELETE FROM pending_fingerprints").rowcount
+
+    def has_seen(self):
+        """Whether a completed run has stored keys"""
+        return self.conn.execute("SELECT 1 FROM seen_fingerprints LIMIT 1").fetchone() is not None
+
+    def add_text_counts(self, texts):
+        """Count occurrences of exact (non-missing) texts"""
+        counts = pd.Series(texts).dropna().map(fingerprint).value_counts()
+        self.conn.executemany(
+            """
+            INSERT INTO text_counts VALUES (?, ?)
+            ON CONFLICT(text_hash) DO UPDATE SET occurrences = occurrences + excluded.occurrences
+            """,
+            ((text_hash, int(n)) for text_hash, n in counts.items()),
+        )
+        self.conn.commit()
+
+    def reset_text_counts(self):
+        self.conn.execute("DELETE FROM text_counts")
+        self.conn.commit()
+
+    def text_counts(self, texts):
+        """Stored occurrence counts of `texts` (0 for missing or unknown texts)"""
+        texts = pd.Series(texts)
+        hashes = texts.map(lambda text: None if pd.isna(text) else fingerprint(text))
+        unique_hashes = hashes.dropna().unique()
+        self._load_chunk_keys((text_hash, None) for text_hash in unique_hashes)
+        counts = dict(self.conn.execute(
+            """
+            SELECT c.key_a, t.occurrences FROM chunk_keys c
+            JOIN text_counts t ON t.text_hash = c.key_a
+            """
+        ))
+        return np.array([counts.get(text_hash, 0) for text_hash in hashes], dtype=np.int64)
+
+    def close(self):
+        self.conn.close()
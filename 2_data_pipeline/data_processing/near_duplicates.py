@@ -0,0 +1,310 @@
+# data_processing/near_duplicates.py
+"""
+Near-duplicate review detection with MinHash and LSH.
+
+Each review is reduced to the set of its character shingles and a MinHash
+signature estimating the Jaccard similarity of those sets. Signatures are
+split into bands and hashed into buckets, so only reviews sharing a
+bucket are compared: the cost grows with the number of reviews, not with
+the number of pairs. Identical signatures (exact copies) are collapsed
+before bucketing, so very common texts do not swell the buckets, and a
+bucket keeps only the latest few reviews of each cluster: a new review
+is compared (all at once) with those, so a large spam cluster costs a
+few comparisons, not one per copy.
+
+Matches above the threshold are merged into clusters with union-find.
+The index can be saved and loaded, so clusters are kept up to date as
+new reviews arrive instead of being rebuilt from the whole corpus.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from fingerprints import FINGERPRINT_COLUMN, normalize_text, text_fingerprints
+
+CLUSTER_COLUMN = 'near_duplicate_cluster_id'
+SIMILARITY_COLUMN = 'similarity'
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+SHINGLE_HASH_BASE = 1_000_003
+# Members of one cluster a bucket keeps (the latest ones)
+MEMBERS_PER_BUCKET = 8
+
+
+class NearDuplicateIndex:
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        # Powers of the shingle hash base, wrapping at 2**64
+        self.powers = np.array(
+            [pow(SHINGLE_HASH_BASE, shingle_size - 1 - i, 1 << 64) for i in range(shingle_size)],
+            dtype=np.uint64,
+        )
+
+        self.keys = []
+        self.key_ids = {}
+        self.signatures = []
+        self.parent = []
+        self.size = []
+        self.similarity = []
+        self.exact = {}
+        self.buckets = {}
+
+    # -----------------------------------------------------
+    # Signatures
+    # -----------------------------------------------------
+    def shingle_hashes(self, text):
+        """
+        32-bit hashes of the distinct character shingles of `text`: a
+        polynomial hash over each window of code points, all windows at once
+        """
+        text = ' '.join(normalize_text(text).split())
+        if not text:
+            return None
+        k = self.shingle_size
+        code_points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        if len(code_points) <= k:
+            hashes = np.array([code_points @ self.powers[k - len(code_points):]], dtype=np.uint64)
+        else:
+            windows = np.lib.stride_tricks.sliding_window_view(code_points, k)
+            hashes = np.unique(windows @ self.powers)
+        return hashes & MAX_HASH
+
+    def signature(self, text):
+        """MinHash signature of `text`, None for missing or empty text"""
+        if pd.isna(text):
+            return None
+        hashes = self.shingle_hashes(text)
+        if hashes is None:
+            return None
+        # Universal hashing a*x + b mod p, one permutation per column
+        permuted = ((np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME) & MAX_HASH
+        return permuted.min(axis=0)
+
+    def band_keys(self, signature):
+        r = self.rows
+        return [(band, signature[band * r:(band + 1) * r].tobytes()) for band in range(self.bands)]
+
+    # -----------------------------------------------------
+    # Clusters (union-find)
+    # -----------------------------------------------------
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        # The earliest review stays the root, so cluster ids do not churn
+        if second < first:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+
+    def _match(self, item, other, similarity):
+        self.union(item, other)
+        self.similarity[item] = max(self.similarity[item], similarity)
+        self.similarity[other] = max(self.similarity[other], similarity)
+
+    # -----------------------------------------------------
+    # Adding and labelling reviews
+    # -----------------------------------------------------
+    def add(self, key, text, signature=None):
+        """Index one review; returns its position, or None for empty text"""
+        if key in self.key_ids:
+            return self.key_ids[key]
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+
+        item = len(self.keys)
+        self.keys.append(key)
+        self.key_ids[key] = item
+        self.signatures.append(signature)
+        self.parent.append(item)
+        self.size.append(1)
+        self.similarity.append(0.0)
+
+        # Exact copies share a signature: join the first copy, skip the buckets
+        exact_key = signature.tobytes()
+        first_copy = self.exact.get(exact_key)
+        if first_copy is not None:
+            self._match(item, first_copy, 1.0)
+            return item
+        self.exact[exact_key] = item
+
+        band_keys = self.band_keys(signature)
+        # Buckets hold a few members per cluster, so this stays small
+        # however large the clusters are
+        candidates = set()
+        for band_key in band_keys:
+            candidates.update(self.buckets.get(band_key, ()))
+
+        if candidates:
+            members = list(candidates)
+            similarities = (np.stack([self.signatures[m] for m in members]) == signature).mean(axis=1)
+            for other, similarity in zip(members, similarities):
+                if similarity >= self.threshold:
+                    self._match(item, other, float(similarity))
+
+        self._add_to_buckets(item, band_keys)
+        return item
+
+    def _add_to_buckets(self, item, band_keys):
+        """
+        File `item` under its band keys. A bucket keeps the latest
+        MEMBERS_PER_BUCKET members of each cluster; older ones make way.
+        """
+        root = self.find(item)
+        for band_key in band_keys:
+            bucket = self.buckets.get(band_key)
+            if bucket is None:
+                self.buckets[band_key] = [item]
+                continue
+            same_cluster = [position for position, member in enumerate(bucket) if self.find(member) == root]
+            if len(same_cluster) >= MEMBERS_PER_BUCKET:
+                del bucket[same_cluster[0]]
+            bucket.append(item)
+
+    def add_reviews(self, keys, texts):
+        # Repeated texts reuse their signature
+        signatures = {}
+        items = []
+        for key, text in zip(keys, texts):
+            if key in self.key_ids:
+                items.append(self.key_ids[key])
+                continue
+            if isinstance(text, str):
+                if text not in signatures:
+                    signatures[text] = self.signature(text)
+                signature = signatures[text]
+                items.append(None if signature is None else self.add(key, text, signature))
+            else:
+                items.append(self.add(key, text))
+        return items
+
+    def labels(self, items):
+        """
+        (cluster ids, similarities) for index positions. Reviews without a
+        near-duplicate get <NA> and NaN; a cluster's id is the position of
+        its earliest review. A review's similarity is the highest one to a
+        cluster member it was compared with.
+        """
+        cluster_ids, similarities = [], []
+        for item in items:
+            if item is None or pd.isna(item):
+                cluster_ids.append(pd.NA)
+                similarities.append(np.nan)
+                continue
+            root = self.find(item)
+            if self.size[root] > 1:
+                cluster_ids.append(root)
+                similarities.append(self.similarity[item])
+            else:
+                cluster_ids.append(pd.NA)
+                similarities.append(np.nan)
+        return pd.array(cluster_ids, dtype='Int64'), np.array(similarities, dtype=float)
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+    def save(self, path):
+        """Write the index to an .npz file (atomically)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        roots = [self.find(item) for item in range(len(self.keys))]
+        np.savez_compressed(
+            tmp_path,
+            params=np.array([self.num_perm, self.bands, self.shingle_size, self.seed]),
+            threshold=np.array([self.threshold]),
+            keys=np.array([str(key) for key in self.keys], dtype=str),
+            signatures=np.array(self.signatures, dtype=np.uint64).reshape(-1, self.num_perm),
+            roots=np.array(roots, dtype=np.int64),
+            similarity=np.array(self.similarity, dtype=float),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        num_perm, bands, shingle_size, seed = (int(v) for v in data['params'])
+        index = cls(num_perm=num_perm, bands=bands, threshold=float(data['threshold'][0]),
+                    shingle_size=shingle_size, seed=seed)
+        index.keys = data['keys'].tolist()
+        index.key_ids = {key: item for item, key in enumerate(index.keys)}
+        index.signatures = list(data['signatures'])
+        index.parent = data['roots'].tolist()
+        index.similarity = data['similarity'].tolist()
+        index.size = [0] * len(index.keys)
+        for root in index.parent:
+            index.size[root] += 1
+
+        for item, signature in enumerate(index.signatures):
+            exact_key = signature.tobytes()
+            if exact_key in index.exact:
+                continue
+            index.exact[exact_key] = item
+            index._add_to_buckets(item, index.band_keys(signature))
+        return index
+
+
+def review_keys(df, text_column='review_text', key_column='review_id', occurrences=None):
+    """
+    Keys that identify the rows of `df` across runs: the review id, or for
+    rows without one the text fingerprint numbered by occurrence, so that
+    copies of a text stay separate reviews (<fingerprint>#0, #1, ...).
+    Pass the same `occurrences` dict for every chunk of one table to keep
+    numbering where the previous chunk stopped.
+    """
+    ids = df[key_column] if key_column in df.columns else pd.Series(np.nan, index=df.index)
+    keys = np.array([None if pd.isna(value) else str(value) for value in ids], dtype=object)
+    missing = pd.isna(keys)
+    if missing.any():
+        fingerprints = (
+            df[FINGERPRINT_COLUMN] if FINGERPRINT_COLUMN in df.columns
+            else text_fingerprints(df[text_column])
+        )
+        fingerprints = fingerprints.astype(object)[missing]
+        occurrence = fingerprints.groupby(fingerprints, dropna=False).cumcount()
+        if occurrences is not None:
+            occurrence = occurrence + fingerprints.map(lambda fp: occurrences.get(fp, 0)).astype('int64')
+            occurrences.update((occurrence + 1).groupby(fingerprints, dropna=False).max().items())
+        keys[missing] = [f"{fp}#{n}" for fp, n in zip(fingerprints, occurrence)]
+    return keys
+
+
+def flag_near_duplicates(df, index=None, text_column='review_text', key_column='review_id', keys=None):
+    """
+    Add near_duplicate_cluster_id and similarity columns to `df`. Rows are
+    added to `index` (a fresh one by default) under `keys`, by default
+    review_keys(), so a persisted index recognizes the same review in a
+    later run. Returns (df, index).
+    """
+    if index is None:
+        index = NearDuplicateIndex()
+    if text_column not in df.columns:
+        return df, index
+
+    if keys is None:
+        keys = review_keys(df, text_column, key_column)
+    items = index.add_reviews(keys, df[text_column])
+    df[CLUSTER_COLUMN], df[SIMILARITY_COLUMN] = index.labels(items)
+    return df, index
@@ -4,6 +4,96 @@ import numpy as np
 from datetime import datetime
 import re
 
+from fingerprints import FINGERPRINT_COLUMN, add_text_fingerprints, seen_mask
+
+DATE_FORMATS = [
+    '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y',
+    '%Y/%m/%d', '%b %d, %Y', '%B %d, %Y', '%d %b %Y'
+]
+
+# Purely numeric DATE_FORMATS, parsed in bulk. Each shape only admits what
+# strptime accepts for its formats (1-2 digit day/month, a year from 1000),
+# and no earlier format in DATE_FORMATS can match it; formats sharing a
+# shape are tried in DATE_FORMATS order.
+NUMERIC_DATE_SHAPES = [
+    (r'([1-9][0-9]{3})-([0-9]{1,2})-([0-9]{1,2})', [('%Y-%m-%d', ('year', 'month', 'day'))]),
+    (r'([0-9]{1,2})/([0-9]{1,2})/([1-9][0-9]{3})', [('%d/%m/%Y', ('day', 'month', 'year')),
+                                                     ('%m/%d/%Y', ('month', 'day', 'year'))]),
+    (r'([0-9]{1,2})-([0-9]{1,2})-([1-9][0-9]{3})', [('%d-%m-%Y', ('day', 'month', 'year'))]),
+    (r'([1-9][0-9]{3})/([0-9]{1,2})/([0-9]{1,2})', [('%Y/%m/%d', ('year', 'month', 'day'))]),
+]
+
+# Timestamps such as '2024-01-05 06:00:00' match none of DATE_FORMATS; their
+# date is the leading year-month-day the regex fallback picks out
+TIMESTAMP_SHAPE = r'([1-9][0-9]{3})[-/]([0-9]{1,2})[-/]([0-9]{1,2})[T ][0-9]'
+
+
+def parse_date_value(date_str):
+    """
+    Normalize one non-missing value: (YYYY-MM-DD or None, matched format).
+    Tries every format in DATE_FORMATS, then a year-month-day regex.
+    """
+    text = str(date_str)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt).strftime('%Y-%m-%d'), fmt
+        except ValueError:
+            continue
+    
+    # Try to extract date from string
+    match = re.search(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', text)
+    if match:
+        year, month, day = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day)).strftime('%Y-%m-%d'), None
+        except ValueError:
+            pass
+    return None, None
+
+
+def _dates_from_parts(parts, order):
+    """YYYY-MM-DD strings (NaN where invalid) from extracted digit groups."""
+    columns = {name: pd.to_numeric(parts[i]) for i, name in enumerate(order)}
+    dates = pd.to_datetime(pd.DataFrame(columns), errors='coerce')
+    return dates.dt.strftime('%Y-%m-%d')
+
+
+def normalize_unique_dates(values):
+    """
+    Vectorized parse_date_value over a list of distinct strings. Returns
+    (normalized dates, matched formats), both aligned with `values`.
+    Dates pandas cannot represent fall back to parse_date_value.
+    """
+    values = pd.Series(values, dtype=object)
+    stripped = values.str.strip()
+    parsed = [None] * len(values)
+    formats = [None] * len(values)
+    pending = pd.Series(True, index=values.index)
+    
+    for shape, candidates in NUMERIC_DATE_SHAPES:
+        parts = stripped[pending].str.extract(f'^{shape}$').dropna()
+        for fmt, order in candidates:
+            if parts.empty:
+                break
+            dates = _dates_from_parts(parts, order).dropna()
+            for i, date in dates.items():
+                parsed[i], formats[i] = date, fmt
+            pending[dates.index] = False
+            parts = parts.drop(dates.index)
+    
+    parts = stripped[pending].str.extract(f'^{TIMESTAMP_SHAPE}').dropna()
+    if not parts.empty:
+        dates = _dates_from_parts(parts, ('year', 'month', 'day')).dropna()
+        for i, date in dates.items():
+            parsed[i] = date
+        pending[dates.index] = False
+    
+    for i in pending[pending].index:
+        parsed[i], formats[i] = parse_date_value(values[i])
+    
+    return parsed, formats
+
+
 class DataPreprocessor:
     def __init__(self):
         self.quality_report = {}
@@ -12,55 +102,30 @@ class DataPreprocessor:
         """
         Convert dates to YYYY-MM-DD format
         Handles multiple date formats
+
+        Each distinct value is parsed once; numeric dates and timestamps
+        are parsed in bulk, anything else goes through parse_date_value
         """
         if date_column not in df.columns:
             print(f"[WARNING] Date column '{date_column}' not found")
             return df
         
-        original_dates = df[date_column].copy()
-        normalized_dates = []
-        date_formats_found = []
+        codes, uniques = pd.factorize(df[date_column])
+        parsed, formats = normalize_unique_dates([str(v) for v in uniques])
         
-        for date_str in df[date_column]:
-            if pd.isna(date_str):
-                normalized_dates.append(None)
-                continue
-                
-            # Try multiple date formats
-            date_formats = [
-                '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', 
-                '%Y/%m/%d', '%b %d, %Y', '%B %d, %Y', '%d %b %Y'
-            ]
-            
-            parsed_date = None
-            for fmt in date_formats:
-                try:
-                    parsed_date = datetime.strptime(str(date_str).strip(), fmt)
-                    if fmt not in date_formats_found:
-                        date_formats_found.append(fmt)
-                    break
-                except:
-                    continue
-            
-            if parsed_date:
-                normalized_dates.append(parsed_date.strftime('%Y-%m-%d'))
-            else:
-                # Try to extract date from string
-                match = re.search(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', str(date_str))
-                if match:
-                    year, month, day = match.groups()
-                    try:
-                        parsed_date = datetime(int(year), int(month), int(day))
-                        normalized_dates.append(parsed_date.strftime('%Y-%m-%d'))
-                    except:
-                        normalized_dates.append(None)
-                else:
-                    normalized_dates.append(None)
+        # Formats are reported in the order their first value appears
+        date_formats_found = []
+        for fmt in formats:
+            if fmt is not None and fmt not in date_formats_found:
+                date_formats_found.append(fmt)
         
+        # Missing values have code -1, which picks the trailing None
+        lookup = np.array(parsed + [None], dtype=object)
+        normalized_dates = lookup[codes].tolist()
         df[date_column] = normalized_dates
         
         # Quality metrics
-        valid_dates = sum(1 for d in normalized_dates if d is not None)
+        valid_dates = len(normalized_dates) - normalized_dates.count(None)
         self.quality_report['date_normalization'] = {
             'total': len(df),
             'valid_dates': valid_dates,
@@ -74,41 +139,61 @@ class DataPreprocessor:
         
         return df
     
-    def remove_duplicates(self, df, subset_columns=['review_text', 'user_name', 'bank_name']):
+    def remove_duplicates(self, df, subset_columns=['review_text', 'user_name', 'bank_name'], seen=None):
         """
         Remove duplicate reviews based on text content and metadata
+
+        Rows are keyed by their stable text fingerprint and bank, and the
+        fingerprint is kept as a column. Pass `seen` (a frame with the
+        text_fingerprint and bank_name of earlier output) to also drop
+        reviews stored by a previous run.
         """
         original_count = len(df)
         
-        # Create text hash for better duplicate detection
-        df['text_hash'] = df['review_text'].apply(
-            lambda x: hash(str(x).lower().strip()[:500]) if pd.notna(x) else None
-        )
+        # Stable text fingerprint, the same in every process and run
+        df = add_text_fingerprints(df)
         
-        # Remove duplicates
-        df = df.drop_duplicates(subset=['text_hash', 'bank_name'], keep='first')
+        # Remove duplicates, then reviews an earlier run already stored
+        duplicates, previously_seen = self.duplicate_mask(df, seen)
+        df = df[~duplicates]
         
-        # Remove the temporary column
-        if 'text_hash' in df.columns:
-            df = df.drop(columns=['text_hash'])
-        
-        duplicates_removed = original_count - len(df)
+        self.record_duplicate_removal(original_count, len(df), previously_seen)
+        return df
+    
+    def duplicate_mask(self, df, seen=None):
+        """
+        Rows remove_duplicates drops, as a boolean array, and how many of
+        them were stored by an earlier run. Needs the fingerprint column.
+        """
+        duplicates = df.duplicated(subset=[FINGERPRINT_COLUMN, 'bank_name'], keep='first').to_numpy()
+        is_seen = seen_mask(df, seen)
+        if is_seen is None:
+            return duplicates, 0
+        previously_seen = int((is_seen & ~duplicates).sum())
+        return duplicates | is_seen, previously_seen
+    
+    def record_duplicate_removal(self, original_count, final_count, previously_seen=0):
+        duplicates_removed = original_count - final_count
         
         self.quality_report['duplicate_removal'] = {
             'original_count': original_count,
-            'final_count': len(df),
+            'final_count': final_count,
             'duplicates_removed': duplicates_removed,
+            'previously_seen': previously_seen,
             'duplicate_rate': (duplicates_removed / original_count * 100) if original_count > 0 else 0
         }
         
         print(f"[INFO] Duplicate removal: Removed {duplicates_removed} duplicates")
-        print(f"[INFO] Remaining reviews: {len(df)}")
-        
-        return df
+        if previously_seen:
+            print(f"[INFO] Of these, {previously_seen} were stored by an earlier run")
+        print(f"[INFO] Remaining reviews: {final_count}")
     
-    def handle_missing_values(self, df):
+    def handle_missing_values(self, df, rating_median=None):
         """
         Systematically handle and flag missing values
+
+        `rating_median` overrides the median of this frame's ratings, for
+        callers that see the table in chunks
         """
         missing_report = {}
         
@@ -126,7 +211,7 @@ class DataPreprocessor:
             if missing_count > 0:
                 if column == 'rating':
                     # Fill missing ratings with median
-                    median_rating = df[column].median()
+                    median_rating = df[column].median() if rating_median is None else rating_median
                     df[column] = df[column].fillna(median_rating)
                     print(f"[INFO] Filled {missing_count} missing ratings with median: {median_rating}")
                 
@@ -138,6 +223,9 @@ class DataPreprocessor:
                 elif column in ['user_name', 'review_date']:
                     # Fill with placeholder
                     placeholder = 'Unknown' if column == 'user_name' else '0000-00-00'
+                    if isinstance(df[column].dtype, pd.CategoricalDtype):
+                        # The placeholder is not one of the categories
+                        df[column] = df[column].astype(object)
                     df[column] = df[column].fillna(placeholder)
                     print(f"[INFO] Filled {missing_count} missing {column} with '{placeholder}'")
         
@@ -151,9 +239,12 @@ class DataPreprocessor:
         
         return df
     
-    def calculate_data_quality_metrics(self, df):
+    def calculate_data_quality_metrics(self, df, text_lengths=None):
         """
         Calculate comprehensive data quality metrics
+
+        `text_lengths` can carry review_text.str.len() of these rows when
+        the caller has already computed it
         """
         metrics = {
             'total_reviews': len(df),
@@ -185,7 +276,9 @@ class DataPreprocessor:
         
         # Text length statistics
         if 'review_text' in df.columns:
-            df['text_length'] = df['review_text'].str.len()
+            if text_lengths is None:
+                text_lengths = df['review_text'].str.len()
+            df['text_length'] = text_lengths.array
             metrics['text_length_stats'] = {
                 'avg_length': round(df['text_length'].mean(), 0),
                 'min_length': df['text_length'].min(),
@@ -234,7 +327,7 @@ class DataPreprocessor:
         
         return "\n".join(report_lines)
     
-    def preprocess_pipeline(self, df):
+    def preprocess_pipeline(self, df, report_path="../data/processed/data_quality_report.txt"):
         """
         Complete preprocessing pipeline
         """
@@ -258,13 +351,16 @@ class DataPreprocessor:
         
         # Step 5: Generate report
         print("\n[STEP 5] Generating quality report...")
+        self.save_quality_report(report_path)
+        
+        return df, self.quality_report
+    
+    def save_quality_report(self, report_path="../data/processed/data_quality_report.txt"):
         report = self.generate_quality_report()
         print(report)
         
         # Save quality report to file
-        report_path = "../data/processed/data_quality_report.txt"
         with open(report_path, 'w') as f:
             f.write(report)
         print(f"[SUCCESS] Quality report saved to: {report_path}")
-        
-        return df, self.quality_report
\ No newline at end of file
+        return report
\ No newline at end of file
@@ -1,149 +1,472 @@
 # data_processing/quality_checks.py - NEW FILE
+"""
+Data quality checks as declarative rules.
+
+A rule is a dict naming a check type and its parameters; QUALITY_RULES is
+the set run_all_checks uses. Before touching the data, the engine collects
+what every rule needs from each column (missing count, pattern matches,
+range counts, distinct values) and then computes all of it in one pass per
+column: isnull() runs once per column, and patterns are matched against
+each distinct value instead of every row. New rules are added as data:
+
+    checker.engine.add_rule({'name': 'locale_format', 'check': 'pattern',
+                             'column': 'locale', 'pattern': r'^[a-z]{2}_[A-Z]{2}$',
+                             'label': 'locales'})
+
+run_approximate_checks() estimates the completeness, duplicate and
+missing-rate rules for quick gating from a sample stratified by bank,
+each with a confidence interval. A rule whose threshold falls inside its
+interval is re-checked exactly, so (at the stated confidence) an
+estimate does not flip a PASS/FAIL.
+"""
+from statistics import NormalDist
+
 import pandas as pd
 import numpy as np
 
-class DataQualityChecker:
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - object strings without pyarrow
+    pa = None
+
+QUALITY_RULES = [
+    {'name': 'completeness', 'check': 'completeness',
+     'columns': ['review_text', 'rating', 'bank_name'], 'min_completeness': 0.95},
+    {'name': 'duplicates', 'check': 'duplicates',
+     'subset': ['review_text', 'user_name', 'bank_name'], 'max_rate': 0.05},
+    {'name': 'date_format', 'check': 'pattern',
+     'column': 'review_date', 'pattern': r'^\d{4}-\d{2}-\d{2}$', 'label': 'dates'},
+    {'name': 'rating_range', 'check': 'range',
+     'column': 'rating', 'min': 1, 'max': 5, 'label': 'ratings'},
+    {'name': 'bank_coverage', 'check': 'coverage', 'column': 'bank_name', 'expected': 5},
+    {'name': 'missing_rates', 'check': 'missing_rates', 'high': 20, 'medium': 5},
+]
+
+
+# ---------------------------------------------------------
+# Column profiles: every statistic the rules need, one pass per column
+# ---------------------------------------------------------
+class ColumnRequest:
     def __init__(self):
+        self.patterns = set()
+        self.ranges = set()
+        self.distinct = False
+
+
+class ColumnProfile:
+    def __init__(self, series, request):
+        self.pattern_matches = {}
+        self.range_counts = {}
+        self.unique_values = None
+
+        if request.patterns or request.distinct:
+            # Missing values get code -1; everything else is computed per
+            # distinct value and expanded with the codes
+            codes, uniques = pd.factorize(series)
+            is_missing = codes == -1
+            self.null_count = np.int64(is_missing.sum())
+            counts = np.bincount(codes[~is_missing], minlength=len(uniques))
+            texts = pd.Series(uniques).astype(str)
+            for pattern in request.patterns:
+                matched = counts[texts.str.match(pattern).to_numpy(dtype=bool)].sum()
+                if self.null_count:
+                    # Missing values are matched as astype(str) prints them
+                    matched += series[is_missing].astype(str).str.match(pattern).sum()
+                self.pattern_matches[pattern] = np.int64(matched)
+            if request.distinct:
+                values = list(uniques)
+                if self.null_count:
+                    # unique() lists a missing value where it first appears
+                    first = int(np.argmax(is_missing))
+                    values.insert(int(codes[:first].max()) + 1 if first else 0, series.iloc[first])
+                self.unique_values = values
+        else:
+            self.null_count = series.isnull().sum()
+
+        for low, high in request.ranges:
+            self.range_counts[(low, high)] = series.between(low, high).sum()
+
+
+class TableProfile:
+    def __init__(self, df, requests, duplicate_subsets):
+        self.row_count = len(df)
+        # Only the columns some rule asked for, in table order
+        self.columns = {
+            column: ColumnProfile(df[column], requests[column])
+            for column in df.columns if column in requests
+        }
+        self.duplicates = {
+            subset: df.duplicated(subset=list(subset)).sum() for subset in duplicate_subsets
+        }
+
+
+# ---------------------------------------------------------
+# Check types: what a rule needs, and its result from the profile
+# ---------------------------------------------------------
+def _status(passed):
+    return 'PASS' if passed else 'FAIL'
+
+
+def _skip(reason):
+    return {'status': 'SKIP', 'reason': reason}
+
+
+def _completeness(rule, profile):
+    results = {}
+    total = profile.row_count
+    for column in rule['columns']:
+        if column in profile.columns:
+            missing = profile.columns[column].null_count
+            completeness = (total - missing) / total if total > 0 else 0
+            results[column] = {
+                'missing': missing,
+                'total': total,
+                'completeness': round(completeness * 100, 2),
+                'status': _status(completeness >= rule['min_completeness'])
+            }
+    return results, all(r['status'] == 'PASS' for r in results.values())
+
+
+def _duplicates(rule, profile):
+    duplicates = profile.duplicates[tuple(rule['subset'])]
+    total = profile.row_count
+    duplicate_rate = duplicates / total if total > 0 else 0
+    result = {
+        'duplicate_count': int(duplicates),
+        'total_records': total,
+        'duplicate_rate': round(duplicate_rate * 100, 2),
+        'status': _status(duplicate_rate <= rule['max_rate'])
+    }
+    return result, result['status'] == 'PASS'
+
+
+def _valid_counts(label, valid, total):
+    invalid = total - valid
+    return {
+        f'valid_{label}': int(valid),
+        f'invalid_{label}': int(invalid),
+        'valid_percentage': round(valid / total * 100, 2) if total > 0 else 0,
+        'status': _status(invalid == 0)
+    }
+
+
+def _pattern(rule, profile):
+    column = profile.columns.get(rule['column'])
+    if column is None:
+        return _skip(f"Column {rule['column']} not found"), None
+    valid = column.pattern_matches[rule['pattern']]
+    result = _valid_counts(rule['label'], valid, profile.row_count)
+    return result, result['status'] == 'PASS'
+
+
+def _range(rule, profile):
+    column = profile.columns.get(rule['column'])
+    if column is None:
+        return _skip(f"Column {rule['column']} not found"), None
+    valid = column.range_counts[(rule['min'], rule['max'])]
+    result = _valid_counts(rule['label'], valid, profile.row_count)
+    return result, result['status'] == 'PASS'
+
+
+def _coverage(rule, profile):
+    column = profile.columns.get(rule['column'])
+    if column is None:
+        return _skip(f"{rule['column']} column not found"), None
+    unique_values = column.unique_values
+    unique_count = sum(1 for value in unique_values if not pd.isna(value))
+    result = {
+        'unique_banks': int(unique_count),
+        'expected_banks': rule['expected'],
+        'bank_list': unique_values,
+        'status': _status(unique_count >= rule['expected'])
+    }
+    return result, result['status'] == 'PASS'
+
+
+def _missing_rates(rule, profile):
+    missing_rates = {}
+    total = profile.row_count
+    for name in rule.get('columns', list(profile.columns)):
+        if name not in profile.columns:
+            continue
+        missing_count = profile.columns[name].null_count
+        missing_rate = (missing_count / total * 100) if total > 0 else 0
+        missing_rates[name] = {
+            'missing_count': int(missing_count),
+            'total': total,
+            'missing_rate': round(missing_rate, 2),
+            'severity': 'HIGH' if missing_rate > rule['high'] else 'MEDIUM' if missing_rate > rule['medium'] else 'LOW'
+        }
+    # Informational only: not counted in the overall score
+    return missing_rates, None
+
+
+# check type -> (column statistics it needs given the table's columns, evaluator)
+CHECK_TYPES = {
+    'completeness': (lambda rule, columns: [(c, 'nulls') for c in rule['columns']], _completeness),
+    'duplicates': (lambda rule, columns: [], _duplicates),
+    'pattern': (lambda rule, columns: [(rule['column'], 'pattern', rule['pattern'])], _pattern),
+    'range': (lambda rule, columns: [(rule['column'], 'range', rule['min'], rule['max'])], _range),
+    'coverage': (lambda rule, columns: [(rule['column'], 'distinct')], _coverage),
+    'missing_rates': (lambda rule, columns: [(c, 'nulls') for c in rule.get('columns', columns)], _missing_rates),
+}
+
+
+class QualityRuleEngine:
+    def __init__(self, rules=None):
+        self.rules = [dict(rule) for rule in (QUALITY_RULES if rules is None else rules)]
+
+    def add_rule(self, rule):
+        if rule['check'] not in CHECK_TYPES:
+            raise ValueError(f"Unknown check type: {rule['check']}")
+        self.rules.append(dict(rule))
+
+    def compile(self, rules, columns):
+        """Column statistics and duplicate subsets `rules` need"""
+        requests = {}
+        duplicate_subsets = set()
+        for rule in rules:
+            if rule['check'] == 'duplicates':
+                duplicate_subsets.add(tuple(rule['subset']))
+            needs, _ = CHECK_TYPES[rule['check']]
+            for column, kind, *args in needs(rule, list(columns)):
+                request = requests.setdefault(column, ColumnRequest())
+                if kind == 'pattern':
+                    request.patterns.add(args[0])
+                elif kind == 'range':
+                    request.ranges.add(tuple(args))
+                elif kind == 'distinct':
+                    request.distinct = True
+        return requests, duplicate_subsets
+
+    def run(self, df, rules=None):
+        """
+        Evaluate `rules` (default: all registered) on `df`. Returns
+        ({rule name: result}, checks passed, checks counted); skipped and
+        informational rules are not counted.
+        """
+        rules = self.rules if rules is None else rules
+        profile = TableProfile(df, *self.compile(rules, df.columns))
+
+        results = {}
+        passed = counted = 0
+        for rule in rules:
+            _, evaluate = CHECK_TYPES[rule['check']]
+            result, rule_passed = evaluate(rule, profile)
+            results[rule['name']] = result
+            if rule_passed is not None:
+                counted += 1
+                passed += int(rule_passed)
+        return results, passed, counted
+
+
+# ---------------------------------------------------------
+# Approximate checks: stratified sampling
+# ---------------------------------------------------------
+APPROXIMATE_SAMPLE_SIZE = 50_000
+MIN_STRATUM_SAMPLE = 100
+APPROXIMATE_CHECKS = ('completeness', 'duplicates', 'missing_rates')
+
+
+class StratifiedSample:
+    """
+    Proportional random sample of a table's rows per stratum (bank), with
+    at least MIN_STRATUM_SAMPLE rows from every stratum that has them.
+    Rows with a missing stratum value form their own stratum.
+    """
+
+    def __init__(self, df, sample_size, strata_column='bank_name', seed=42):
+        rng = np.random.default_rng(seed)
+        if strata_column in df.columns:
+            codes, _ = pd.factorize(df[strata_column], use_na_sentinel=False)
+        else:
+            codes = np.zeros(len(df), dtype=np.intp)
+        self.sizes = np.bincount(codes).astype(float)
+        fraction = min(1.0, sample_size / len(df)) if len(df) else 1.0
+
+        positions, taken = [], []
+        for stratum, size in enumerate(self.sizes.astype(int)):
+            take = min(size, max(MIN_STRATUM_SAMPLE, int(np.ceil(fraction * size))))
+            members = np.flatnonzero(codes == stratum)
+            positions.append(np.sort(rng.choice(members, take, replace=False)))
+            taken.append(take)
+        self.taken = np.array(taken, dtype=float)
+        self.positions = np.concatenate(positions) if positions else np.array([], dtype=np.intp)
+        self.strata = codes[self.positions]
+
+    def proportion(self, flags, z):
+        """
+        Estimated share of flagged rows in the table from `flags` of the
+        sampled rows, and its interval: a Wilson interval over the
+        effective sample size of the stratified estimate. Flags may be
+        fractions in [0, 1]; p(1 - p) then bounds their variance.
+        """
+        hits = np.bincount(self.strata, weights=flags, minlength=len(self.sizes))
+        shares = hits / self.taken
+        weights = self.sizes / self.sizes.sum()
+        estimate = float(weights @ shares)
+        correction = 1 - self.taken / self.sizes
+        if not correction.any():
+            # Every row was sampled
+            return estimate, (estimate, estimate)
+        variance = float(np.sum(weights ** 2 * correction * shares * (1 - shares)
+                                / np.maximum(self.taken - 1, 1)))
+        effective_size = estimate * (1 - estimate) / variance if variance > 0 else self.taken.sum()
+        return estimate, wilson_interval(estimate, effective_size, z)
+
+
+def wilson_interval(share, n, z):
+    if n <= 0:
+        return 0.0, 1.0
+    denominator = 1 + z * z / n
+    centre = (share + z * z / (2 * n)) / denominator
+    half_width = z * np.sqrt(share * (1 - share) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+def _inside(threshold, interval):
+    low, high = interval
+    return low < threshold < high
+
+
+def _percent_interval(interval):
+    # Plain floats, so reports and JSON dumps show numbers, not np.float64(...)
+    return tuple(float(round(bound * 100, 2)) for bound in interval)
+
+
+def _approximate_completeness(rule, df, sample, z):
+    results, uncertain = {}, []
+    total = len(df)
+    for column in rule['columns']:
+        if column not in df.columns:
+            continue
+        flags = df[column].iloc[sample.positions].isnull().to_numpy(dtype=float)
+        missing_share, (low, high) = sample.proportion(flags, z)
+        interval = (1 - high, 1 - low)
+        results[column] = {
+            'missing': int(round(missing_share * total)),
+            'total': total,
+            'completeness': round((1 - missing_share) * 100, 2),
+            'confidence_interval': _percent_interval(interval),
+            'status': _status(1 - missing_share >= rule['min_completeness']),
+            'method': 'sample'
+        }
+        if _inside(rule['min_completeness'], interval):
+            uncertain.append(column)
+    return results, uncertain
+
+
+def _approximate_missing_rates(rule, df, sample, z):
+    results, uncertain = {}, []
+    total = len(df)
+    for column in rule.get('columns', list(df.columns)):
+        if column not in df.columns:
+            continue
+        flags = df[column].iloc[sample.positions].isnull().to_numpy(dtype=float)
+        share, interval = sample.proportion(flags, z)
+        missing_rate = share * 100
+        results[column] = {
+            'missing_count': int(round(share * total)),
+            'total': total,
+            'missing_rate': round(missing_rate, 2),
+            'confidence_interval': _percent_interval(interval),
+            'severity': 'HIGH' if missing_rate > rule['high'] else 'MEDIUM' if missing_rate > rule['medium'] else 'LOW',
+            'method': 'sample'
+        }
+        if any(_inside(limit / 100, interval) for limit in (rule['high'], rule['medium'])):
+            uncertain.append(column)
+    return results, uncertain
+
+
+def _isin(series, values):
+    """Boolean mask of series.isin(values); Arrow strings go through pyarrow, several times faster"""
+    if pa is not None and getattr(series.dtype, 'storage', None) == 'pyarrow':
+        array = pa.array(series)
+        return pc.is_in(array, value_set=pa.array(values, type=array.type)).to_numpy(zero_copy_only=False)
+    return series.isin(values).to_numpy(dtype=bool)
+
+
+def _approximate_duplicates(rule, df, sample, z):
+    """
+    A row with c copies of its key in the table adds 1 - 1/c to the
+    duplicate count (every copy but the first is a duplicate), so the
+    duplicate rate is the mean of 1 - 1/c over the sampled rows. Copies
+    are counted only among rows sharing the sampled values of the most
+    selective key column, not over the whole table.
+    """
+    total = len(df)
+    subset = rule['subset']
+    sampled = df[subset].iloc[sample.positions]
+    column = max(subset, key=lambda name: sampled[name].nunique(dropna=False))
+    values = sampled[column]
+    candidates = _isin(df[column], values.dropna().unique())
+    if values.isna().any():
+        candidates = candidates | df[column].isna().to_numpy()
+    positions = np.flatnonzero(candidates)
+
+    groups = df[subset].iloc[positions].groupby(subset, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    copies = np.bincount(groups)[groups]
+    flags = 1 - 1 / copies[np.searchsorted(positions, sample.positions)]
+    duplicate_rate, interval = sample.proportion(flags, z)
+    result = {
+        'duplicate_count': int(round(duplicate_rate * total)),
+        'total_records': total,
+        'duplicate_rate': round(duplicate_rate * 100, 2),
+        'confidence_interval': _percent_interval(interval),
+        'status': _status(duplicate_rate <= rule['max_rate']),
+        'method': 'sample'
+    }
+    return result, _inside(rule['max_rate'], interval)
+
+
+class DataQualityChecker:
+    def __init__(self, rules=None):
         self.checks_passed = 0
         self.checks_total = 0
+        self.engine = QualityRuleEngine(rules)
+    
+    def _run_rules(self, df, rules=None):
+        results, passed, counted = self.engine.run(df, rules)
+        self.checks_passed += passed
+        self.checks_total += counted
+        return results
     
     def check_completeness(self, df, critical_columns=['review_text', 'rating', 'bank_name']):
         """Check data completeness for critical columns"""
-        results = {}
-        
-        for column in critical_columns:
-            if column in df.columns:
-                missing = df[column].isnull().sum()
-                total = len(df)
-                completeness = (total - missing) / total if total > 0 else 0
-                
-                results[column] = {
-                    'missing': missing,
-                    'total': total,
-                    'completeness': round(completeness * 100, 2),
-                    'status': 'PASS' if completeness >= 0.95 else 'FAIL'
-                }
-        
-        self.checks_total += 1
-        if all(r['status'] == 'PASS' for r in results.values()):
-            self.checks_passed += 1
-        
-        return {'completeness': results}
+        return self._run_rules(df, [{'name': 'completeness', 'check': 'completeness',
+                                     'columns': critical_columns, 'min_completeness': 0.95}])
     
     def check_duplicates(self, df, subset=['review_text', 'user_name', 'bank_name']):
         """Check for duplicate records"""
-        duplicates = df.duplicated(subset=subset).sum()
-        duplicate_rate = duplicates / len(df) if len(df) > 0 else 0
-        
-        result = {
-            'duplicate_count': int(duplicates),
-            'total_records': len(df),
-            'duplicate_rate': round(duplicate_rate * 100, 2),
-            'status': 'PASS' if duplicate_rate <= 0.05 else 'FAIL'
-        }
-        
-        self.checks_total += 1
-        if result['status'] == 'PASS':
-            self.checks_passed += 1
-        
-        return {'duplicates': result}
+        return self._run_rules(df, [{'name': 'duplicates', 'check': 'duplicates',
+                                     'subset': subset, 'max_rate': 0.05}])
     
     def check_date_format(self, df, date_column='review_date'):
         """Validate date format is YYYY-MM-DD"""
-        if date_column not in df.columns:
-            return {'date_format': {'status': 'SKIP', 'reason': f'Column {date_column} not found'}}
-        
-        # Check if dates match YYYY-MM-DD pattern
-        date_pattern = r'^\d{4}-\d{2}-\d{2}$'
-        valid_dates = df[date_column].astype(str).str.match(date_pattern).sum()
-        invalid_dates = len(df) - valid_dates
-        
-        result = {
-            'valid_dates': int(valid_dates),
-            'invalid_dates': int(invalid_dates),
-            'valid_percentage': round(valid_dates / len(df) * 100, 2) if len(df) > 0 else 0,
-            'status': 'PASS' if invalid_dates == 0 else 'FAIL'
-        }
-        
-        self.checks_total += 1
-        if result['status'] == 'PASS':
-            self.checks_passed += 1
-        
-        return {'date_format': result}
+        return self._run_rules(df, [{'name': 'date_format', 'check': 'pattern', 'column': date_column,
+                                     'pattern': r'^\d{4}-\d{2}-\d{2}$', 'label': 'dates'}])
     
     def check_rating_range(self, df, rating_column='rating'):
         """Check that ratings are within valid range (1-5)"""
-        if rating_column not in df.columns:
-            return {'rating_range': {'status': 'SKIP', 'reason': f'Column {rating_column} not found'}}
-        
-        valid_ratings = df[rating_column].between(1, 5).sum()
-        invalid_ratings = len(df) - valid_ratings
-        
-        result = {
-            'valid_ratings': int(valid_ratings),
-            'invalid_ratings': int(invalid_ratings),
-            'valid_percentage': round(valid_ratings / len(df) * 100, 2) if len(df) > 0 else 0,
-            'status': 'PASS' if invalid_ratings == 0 else 'FAIL'
-        }
-        
-        self.checks_total += 1
-        if result['status'] == 'PASS':
-            self.checks_passed += 1
-        
-        return {'rating_range': result}
+        return self._run_rules(df, [{'name': 'rating_range', 'check': 'range', 'column': rating_column,
+                                     'min': 1, 'max': 5, 'label': 'ratings'}])
     
     def check_bank_coverage(self, df, expected_banks=5):
         """Check that all expected banks are covered"""
-        if 'bank_name' not in df.columns:
-            return {'bank_coverage': {'status': 'SKIP', 'reason': 'bank_name column not found'}}
-        
-        unique_banks = df['bank_name'].nunique()
-        bank_list = df['bank_name'].unique().tolist()
-        
-        result = {
-            'unique_banks': int(unique_banks),
-            'expected_banks': expected_banks,
-            'bank_list': bank_list,
-            'status': 'PASS' if unique_banks >= expected_banks else 'FAIL'
-        }
-        
-        self.checks_total += 1
-        if result['status'] == 'PASS':
-            self.checks_passed += 1
-        
-        return {'bank_coverage': result}
+        return self._run_rules(df, [{'name': 'bank_coverage', 'check': 'coverage',
+                                     'column': 'bank_name', 'expected': expected_banks}])
     
     def calculate_missing_rates(self, df):
         """Calculate missing rates for all columns"""
-        missing_rates = {}
-        
-        for column in df.columns:
-            missing_count = df[column].isnull().sum()
-            total = len(df)
-            missing_rate = (missing_count / total * 100) if total > 0 else 0
-            
-            missing_rates[column] = {
-                'missing_count': int(missing_count),
-                'total': total,
-                'missing_rate': round(missing_rate, 2),
-                'severity': 'HIGH' if missing_rate > 20 else 'MEDIUM' if missing_rate > 5 else 'LOW'
-            }
-        
-        return {'missing_rates': missing_rates}
+        return self._run_rules(df, [{'name': 'missing_rates', 'check': 'missing_rates',
+                                     'high': 20, 'medium': 5}])
     
     def run_all_checks(self, df):
-        """Run all quality checks"""
+        """Run all registered quality rules over one profile of `df`"""
         print("[INFO] Running comprehensive quality checks...")
         
-        all_results = {}
-        
-        # Run individual checks
-        all_results.update(self.check_completeness(df))
-        all_results.update(self.check_duplicates(df))
-        all_results.update(self.check_date_format(df))
-        all_results.update(self.check_rating_range(df))
-        all_results.update(self.check_bank_coverage(df))
-        all_results.update(self.calculate_missing_rates(df))
+        all_results = self._run_rules(df)
         
         # Calculate overall score
         overall_score = (self.checks_passed / self.checks_total * 100) if self.checks_total > 0 else 0
@@ -157,6 +480,69 @@ class DataQualityChecker:
         
         return all_results
     
+    def run_approximate_checks(self, df, sample_size=APPROXIMATE_SAMPLE_SIZE, confidence=0.95,
+                               strata_column='bank_name', seed=42):
+        """
+        Estimate the completeness, duplicate and missing-rate rules with
+        confidence intervals (see the module docstring). Tables of at most
+        `sample_size` rows are checked exactly.
+        """
+        print("[INFO] Running approximate quality checks...")
+        rules = [rule for rule in self.engine.rules if rule['check'] in APPROXIMATE_CHECKS]
+        
+        if len(df) <= sample_size:
+            results, passed, counted = self.engine.run(df, rules)
+            escalated = [rule['name'] for rule in rules]
+        else:
+            z = NormalDist().inv_cdf(0.5 + confidence / 2)
+            sample = StratifiedSample(df, sample_size, strata_column, seed)
+            results, exact_rules = {}, []
+            for rule in rules:
+                if rule['check'] == 'duplicates':
+                    result, uncertain = _approximate_duplicates(rule, df, sample, z)
+                    if uncertain:
+                        exact_rules.append(rule)
+                else:
+                    estimate = _approximate_completeness if rule['check'] == 'completeness' else _approximate_missing_rates
+                    result, uncertain_columns = estimate(rule, df, sample, z)
+                    if uncertain_columns:
+                        exact_rules.append({**rule, 'columns': uncertain_columns})
+                results[rule['name']] = result
+            
+            # Thresholds inside an interval: decide those exactly, in one pass
+            exact_results, _, _ = self.engine.run(df, exact_rules)
+            for rule in exact_rules:
+                exact = exact_results[rule['name']]
+                if rule['check'] == 'duplicates':
+                    results[rule['name']] = dict(exact, method='exact')
+                else:
+                    for column, column_result in exact.items():
+                        results[rule['name']][column] = dict(column_result, method='exact')
+            escalated = [rule['name'] for rule in exact_rules]
+            
+            passed = counted = 0
+            for rule in rules:
+                if rule['check'] == 'missing_rates':
+                    continue
+                result = results[rule['name']]
+                statuses = [result['status']] if rule['check'] == 'duplicates' else [r['status'] for r in result.values()]
+                counted += 1
+                passed += int(all(status == 'PASS' for status in statuses))
+        
+        self.checks_passed += passed
+        self.checks_total += counted
+        overall_score = (self.checks_passed / self.checks_total * 100) if self.checks_total > 0 else 0
+        results['overall'] = {
+            'checks_passed': self.checks_passed,
+            'checks_total': self.checks_total,
+            'score': round(overall_score, 2),
+            'status': 'PASS' if overall_score >= 90 else 'FAIL',
+            'method': 'approximate',
+            'confidence': confidence,
+            'escalated_to_exact': escalated
+        }
+        return results
+    
     def generate_quality_report(self, quality_results):
         """Generate a comprehensive quality report"""
         report_lines = []
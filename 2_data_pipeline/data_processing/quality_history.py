@@ -0,0 +1,179 @@
+# data_processing/quality_history.py
+"""
+Quality metrics of every pipeline run, kept as a time series in SQLite.
+
+Each run records a few per-bank metrics (missing rates, duplicate rate,
+short-text rate, average rating, review count) plus the same metrics over
+all banks, one row per (run, bank, metric). The table is indexed by bank,
+metric and run time, so comparing a run against the last N runs is one
+indexed query instead of re-reading old reports or data.
+
+A metric regresses when it moves in its bad direction by more than both
+Z_THRESHOLD standard deviations of its recent history and the metric's
+minimum change (e.g. a 2-point jump in one bank's missing-text rate).
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ALL_BANKS = '__all__'
+UNKNOWN_BANK = 'unknown'
+
+# metric -> (direction that is worse, smallest change worth flagging);
+# metrics without a direction are tracked but never flagged
+METRICS = {
+    'reviews': (None, None),
+    'missing_text_rate': ('up', 2.0),
+    'missing_rating_rate': ('up', 2.0),
+    'missing_date_rate': ('up', 2.0),
+    'duplicate_rate': ('up', 2.0),
+    'short_text_rate': ('up', 5.0),
+    'average_rating': (None, None),
+}
+
+LAST_RUNS = 10
+MIN_HISTORY = 3
+Z_THRESHOLD = 3.0
+
+
+def bank_quality_metrics(df, bank_column='bank_name'):
+    """{bank: {metric: value}} for `df`, plus the ALL_BANKS totals. Rates are percentages."""
+    if len(df) == 0:
+        return {}
+    banks = (
+        df[bank_column].astype(object).fillna(UNKNOWN_BANK).astype(str).to_numpy()
+        if bank_column in df.columns else np.full(len(df), UNKNOWN_BANK, dtype=object)
+    )
+    missing = pd.Series(False, index=df.index)
+    flags = pd.DataFrame({
+        'missing_text_rate': df['review_text'].isnull() if 'review_text' in df.columns else missing,
+        'missing_rating_rate': df['rating'].isnull() if 'rating' in df.columns else missing,
+        'missing_date_rate': df['review_date'].isnull() if 'review_date' in df.columns else missing,
+        'short_text_rate': (df['review_text'].str.len() < 20) if 'review_text' in df.columns else missing,
+    }).astype(float) * 100
+    subset = [c for c in ('review_text', 'user_name', 'bank_name') if c in df.columns]
+    flags['duplicate_rate'] = df.duplicated(subset=subset or None).to_numpy(dtype=float) * 100
+    flags['average_rating'] = pd.to_numeric(df['rating'], errors='coerce').to_numpy(dtype=float) if 'rating' in df.columns else np.nan
+    flags['bank'] = banks
+
+    per_bank = flags.groupby('bank').mean()
+    per_bank['reviews'] = flags.groupby('bank').size()
+    totals = flags.drop(columns='bank').mean()
+    totals['reviews'] = len(df)
+    per_bank.loc[ALL_BANKS] = totals
+
+    return {
+        bank: {metric: float(value) for metric, value in row.items() if not pd.isna(value)}
+        for bank, row in per_bank.iterrows()
+    }
+
+
+class QualityHistoryStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS quality_runs (
+                run_id TEXT PRIMARY KEY,
+                run_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS quality_metrics (
+                run_id TEXT NOT NULL,
+                run_at TEXT NOT NULL,
+                bank_name TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (run_id, bank_name, metric)
+            );
+            CREATE INDEX IF NOT EXISTS idx_quality_metrics_series
+                ON quality_metrics (bank_name, metric, run_at);
+            """
+        )
+
+    def record_run(self, run_id, bank_metrics, run_at=None):
+        """Append one run's {bank: {metric: value}} (replacing a run with the same id)"""
+        run_at = run_at or datetime.now().isoformat()
+        rows = [
+            (run_id, run_at, bank, metric, value)
+            for bank, metrics in bank_metrics.items()
+            for metric, value in metrics.items()
+        ]
+        with self.conn:
+            self.conn.execute("DELETE FROM quality_metrics WHERE run_id = ?", (run_id,))
+            self.conn.execute("INSERT OR REPLACE INTO quality_runs VALUES (?, ?)", (run_id, run_at))
+            self.conn.executemany("INSERT INTO quality_metrics VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def history(self, bank_name=None, metric=None, last_runs=None):
+        """Recorded values as a DataFrame, newest first; optionally the last N runs per series"""
+        query = """
+            SELECT run_id, run_at, bank_name, metric, value,
+                   ROW_NUMBER() OVER (PARTITION BY bank_name, metric ORDER BY run_at DESC) AS age
+            FROM quality_metrics WHERE 1 = 1
+        """
+        params = []
+        if bank_name is not None:
+            query += " AND bank_name = ?"
+            params.append(bank_name)
+        if metric is not None:
+            query += " AND metric = ?"
+            params.append(metric)
+        df = pd.read_sql_query(query + " ORDER BY bank_name, metric, run_at DESC", self.conn, params=params)
+        if last_runs is not None:
+            df = df[df['age'] <= last_runs]
+        return df.drop(columns='age').reset_index(drop=True)
+
+    def detect_regressions(self, run_id, last_runs=LAST_RUNS, z_threshold=Z_THRESHOLD):
+        """
+        Metrics of `run_id` that regressed against the `last_runs` runs
+        before it, as a list of dicts (worst first)
+        """
+        run = self.conn.execute("SELECT run_at FROM quality_runs WHERE run_id = ?", (run_id,)).fetchone()
+        if run is None:
+            return []
+        rows = self.conn.execute(
+            """
+            WITH current AS (
+                SELECT bank_name, metric, value FROM quality_metrics WHERE run_id = ?
+            ),
+            recent AS (
+                SELECT q.bank_name, q.metric, q.value,
+                       ROW_NUMBER() OVER (PARTITION BY q.bank_name, q.metric ORDER BY q.run_at DESC) AS age
+                FROM current c
+                JOIN quality_metrics q ON q.bank_name = c.bank_name AND q.metric = c.metric
+                WHERE q.run_at < ?
+            )
+            SELECT c.bank_name, c.metric, c.value, COUNT(r.value), AVG(r.value), AVG(r.value * r.value)
+            FROM current c
+            JOIN recent r ON r.bank_name = c.bank_name AND r.metric = c.metric AND r.age <= ?
+            GROUP BY c.bank_name, c.metric
+            """,
+            (run_id, run[0], last_runs),
+        ).fetchall()
+
+        regressions = []
+        for bank, metric, value, runs, mean, mean_square in rows:
+            direction, min_change = METRICS.get(metric, (None, None))
+            if direction is None or runs < MIN_HISTORY:
+                continue
+            change = value - mean if direction == 'up' else mean - value
+            std = float(np.sqrt(max(mean_square - mean * mean, 0.0)))
+            if change > max(z_threshold * std, min_change):
+                regressions.append({
+                    'bank_name': bank,
+                    'metric': metric,
+                    'value': round(value, 2),
+                    'baseline': round(mean, 2),
+                    'baseline_std': round(std, 2),
+                    'runs_compared': runs,
+                    'change': round(value - mean, 2),
+                })
+        return sorted(regressions, key=lambda r: -abs(r['change']))
+
+    def close(self):
+        self.conn.close()
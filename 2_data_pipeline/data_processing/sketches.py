@@ -0,0 +1,120 @@
+# data_processing/sketches.py
+"""
+Mergeable summaries for statistics that need the whole table.
+
+The chunked pipeline sees one chunk at a time, so global values such as
+the median rating or the date range are kept in small summaries that are
+updated per chunk and can be merged with each other. Memory depends on
+the number of distinct values summarized, not on the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+
+class HistogramSketch:
+    """
+    Exact value counts of a numeric column. Ratings have a handful of
+    distinct values, so the median and distribution stay exact while the
+    summary stays tiny.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def update(self, values):
+        # float64, so small integer dtypes (e.g. Int8 ratings) cannot overflow the sums
+        values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().astype('float64')
+        for value, count in values.value_counts().items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        return self
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        return self
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def mean(self):
+        total = self.total
+        if not total:
+            return np.nan
+        return sum(value * count for value, count in self.counts.items()) / total
+
+    def median(self):
+        """Same as Series.median(): the mean of the two middle values for an even count"""
+        total = self.total
+        if not total:
+            return np.nan
+        lower_rank, upper_rank = (total - 1) // 2, total // 2
+        lower = upper = None
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if lower is None and seen > lower_rank:
+                lower = value
+            if seen > upper_rank:
+                upper = value
+                break
+        return (lower + upper) / 2
+
+    def min(self):
+        return min(self.counts) if self.counts else np.nan
+
+    def max(self):
+        return max(self.counts) if self.counts else np.nan
+
+    def distribution(self):
+        """{value: count}, most frequent first like value_counts().to_dict()"""
+        return dict(sorted(self.counts.items(), key=lambda item: -item[1]))
+
+
+class MinMaxSketch:
+    """Running minimum and maximum of a column"""
+
+    def __init__(self):
+        self.minimum = None
+        self.maximum = None
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        if not values.empty:
+            self._include(values.min(), values.max())
+        return self
+
+    def merge(self, other):
+        if other.minimum is not None:
+            self._include(other.minimum, other.maximum)
+        return self
+
+    def _include(self, low, high):
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+
+class SumSketch:
+    """Count, sum, min and max of a numeric column (for means)"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.range = MinMaxSketch()
+
+    def update(self, values):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').dropna()
+        self.count += int(len(values))
+        self.sum += float(values.sum())
+        self.range.update(values)
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.range.merge(other.range)
+        return self
+
+    def mean(self):
+        return self.sum / self.count if self.count else np.nan
+
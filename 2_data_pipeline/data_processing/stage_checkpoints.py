@@ -0,0 +1,89 @@
+# data_processing/stage_checkpoints.py
+"""
+Checkpointed pipeline stages.
+
+Each stage is a function df -> (df, details). After a stage completes, its
+output frame and details are written to an artifact file, and a manifest
+records the content fingerprint of the input it ran on and of the output
+it produced. When the same stage is run again on an input with the same
+fingerprint, the artifact is loaded instead of recomputing. So:
+    ✓ A re-run after a failure resumes after the last completed stage
+    ✓ A re-run on unchanged data skips every stage
+    ✓ Each stage's input fingerprint is the previous stage's output
+      fingerprint, so only the raw input is hashed
+"""
+import os
+import json
+import pickle
+from datetime import datetime
+
+from fingerprints import fingerprint, frame_fingerprint
+
+
+class StageCheckpoints:
+    def __init__(self, checkpoint_dir):
+        self.checkpoint_dir = checkpoint_dir
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.manifest_path = os.path.join(checkpoint_dir, 'manifest.json')
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Ignoring unreadable checkpoint manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def artifact_path(self, stage):
+        return os.path.join(self.checkpoint_dir, f"{stage}.pkl")
+
+    def run(self, stages, df, input_fingerprint=None):
+        """
+        Run `stages` ([(name, function)] or [(name, function, version)]) in
+        order on `df`. Bump a stage's version when its code changes to
+        invalidate its artifact. Returns (df, {stage: details}).
+        """
+        current = input_fingerprint or frame_fingerprint(df)
+        details = {}
+        for stage in stages:
+            name, function = stage[0], stage[1]
+            version = stage[2] if len(stage) > 2 else '1'
+            # The key covers the stage, its version and what it runs on
+            key = fingerprint(name, version, current)
+
+            entry = self.manifest.get(name)
+            artifact = self.artifact_path(name)
+            if entry and entry.get('input') == key and os.path.exists(artifact):
+                with open(artifact, 'rb') as f:
+                    saved = pickle.load(f)
+                df, details[name] = saved['df'], saved['details']
+                current = entry['output']
+                print(f"[INFO] Stage '{name}': input unchanged, loaded checkpoint ({len(df):,} rows)")
+                continue
+
+            print(f"[INFO] Stage '{name}': running...")
+            df, details[name] = function(df)
+            current = frame_fingerprint(df)
+
+            tmp_path = artifact + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'df': df, 'details': details[name]}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, artifact)
+            self.manifest[name] = {
+                'input': key,
+                'output': current,
+                'rows': len(df),
+                'completed_at': datetime.now().isoformat(),
+            }
+            self._save_manifest()
+            print(f"[INFO] Stage '{name}': checkpoint saved ({len(df):,} rows)")
+        return df, details
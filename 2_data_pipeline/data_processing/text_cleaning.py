@@ -0,0 +1,113 @@
+# data_processing/text_cleaning.py
+"""
+Review text cleaning used by DataCleaner.clean_text_content.
+
+A text is cleaned by collapsing whitespace runs to one space, dropping
+every character that is not a word character, whitespace or one of
+.,!?- and trimming the ends. clean_text() is the reference for one value.
+clean_text_series() gives the same output for a whole column, faster:
+    ✓ Each distinct text is cleaned once
+    ✓ Whitespace is collapsed with str.split()/join, which splits on the
+      same characters as the regex \\s
+    ✓ ASCII texts drop characters with str.translate; only non-ASCII
+      texts go through the precompiled regex
+    ✓ Very large columns are cleaned in chunks on a process pool
+"""
+import os
+import re
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+DISALLOWED_PATTERN = re.compile(r'[^\w\s.,!?\-]')
+
+# ASCII characters DISALLOWED_PATTERN removes, once whitespace is a single space
+_ASCII_KEEP = set(string.ascii_letters + string.digits + '_.,!?- ')
+ASCII_DELETE_TABLE = {code: None for code in range(128) if chr(code) not in _ASCII_KEEP}
+
+# Distinct texts from which clean_text_series uses a process pool
+PARALLEL_THRESHOLD = 500_000
+
+
+def clean_text(text):
+    """Clean one review text; missing values are returned unchanged"""
+    if pd.isna(text):
+        return text
+
+    text = str(text)
+    # Remove excessive whitespace
+    text = WHITESPACE_PATTERN.sub(' ', text)
+    # Remove special characters but keep basic punctuation
+    text = DISALLOWED_PATTERN.sub('', text)
+    # Trim
+    return text.strip()
+
+
+def clean_texts(texts):
+    """Clean a list of strings; same result as clean_text on each"""
+    delete_disallowed = DISALLOWED_PATTERN.sub
+    cleaned = []
+    for text in texts:
+        # split() drops the leading/trailing run that sub(' ') would keep
+        # as one space; the final strip() removes it either way
+        text = ' '.join(text.split())
+        if text.isascii():
+            cleaned.append(text.translate(ASCII_DELETE_TABLE).strip())
+        else:
+            cleaned.append(delete_disallowed('', text).strip())
+    return cleaned
+
+
+def _clean_in_parallel(texts, workers):
+    size = -(-len(texts) // (workers * 4))
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [text for chunk in pool.map(clean_texts, chunks) for text in chunk]
+
+
+def factorize_texts(series):
+    """
+    (present, codes, uniques): which rows have text, and for those rows
+    the position of their text in the list of distinct texts.
+    """
+    present = series.notna().to_numpy()
+    # str() everything first so values that compare equal but print
+    # differently (1, 1.0, True) are not merged by factorize
+    texts = [text if type(text) is str else str(text) for text in series[present]]
+    codes, uniques = factorize_strings(texts)
+    return present, codes, uniques
+
+
+def factorize_strings(texts):
+    """
+    (codes, uniques) of a list of strings, uniques in order of first
+    appearance. pd.factorize on objects compares strings only up to a NUL
+    character ('\\x00abc', '\\x00' and '' become one value); a dict keeps
+    every string apart and is as fast.
+    """
+    ids = {}
+    codes = np.fromiter((ids.setdefault(text, len(ids)) for text in texts), dtype=np.intp, count=len(texts))
+    return codes, list(ids)
+
+
+def clean_text_series(series, workers=None, parallel_threshold=PARALLEL_THRESHOLD, factorized=None):
+    """
+    series.apply(clean_text), computed once per distinct text. With at
+    least `parallel_threshold` distinct texts the work is spread over
+    `workers` processes (default: all CPUs); workers=1 disables that.
+    Pass `factorized` to reuse a factorize_texts(series) result.
+    """
+    present, codes, uniques = factorized or factorize_texts(series)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(uniques) >= parallel_threshold:
+        cleaned = _clean_in_parallel(uniques, workers)
+    else:
+        cleaned = clean_texts(uniques)
+
+    values = series.to_numpy(dtype=object, copy=True)
+    values[present] = np.array(cleaned, dtype=object)[codes] if len(cleaned) else []
+    return pd.Series(values.tolist(), index=series.index, name=series.name)
@@ -0,0 +1,105 @@
+"""
+benchmarks/clean_text_benchmark.py
+
+Purpose:
+--------
+Rows/sec of review text cleaning before and after vectorization:
+    ✓ before: Series.apply with two re.sub calls per row (the original
+      DataCleaner.clean_text_content)
+    ✓ after:  text_cleaning.clean_text_series, single process and on a
+      process pool
+    ✓ checks the outputs are identical at every size, including empty,
+      whitespace-only and NUL-containing texts
+
+Reviews are synthetic: a mix of English, Amharic and emoji text with the
+repetition of real app reviews (many short "good app" style texts).
+
+    python benchmarks/clean_text_benchmark.py --sizes 10000 100000 1000000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "2_data_pipeline", "data_processing"))
+
+from text_cleaning import clean_text_series
+
+COMMON_REVIEWS = ["good", "Good app", "nice", "very good app 👍", "bad", "It's not working!!", "ጥሩ ነው"]
+WORDS = (
+    "app bank transfer balance login otp update slow fast crash great worst service "
+    "money account mobile banking please fix error network ethiopia birr ጥሩ መተግበሪያ"
+).split()
+NOISE = ["", "", "!", "?", "...", " 😡", " 🙏", " #CBE", " @support", " :)", "\n", "  ", " & "]
+# Texts that must stay apart from each other: empty, whitespace-only and
+# NUL-containing strings
+EDGE_REVIEWS = ["", " ", "\t\n ", "\x00", "\x00abc", "abc\x00", "\x00\x00 ok"]
+
+
+def legacy_clean(series):
+    """DataCleaner.clean_text_content before vectorization"""
+    def clean_text(text):
+        if pd.isna(text):
+            return text
+
+        text = str(text)
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'[^\w\s.,!?\-]', '', text)
+        text = text.strip()
+        return text
+
+    return series.apply(clean_text)
+
+
+def synthetic_reviews(n, seed=42):
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.35:
+            reviews.append(rng.choice(COMMON_REVIEWS))
+        elif roll < 0.37:
+            reviews.append(None)
+        elif roll < 0.38:
+            reviews.append(rng.choice(EDGE_REVIEWS))
+        else:
+            words = rng.choices(WORDS, k=rng.randint(3, 60))
+            reviews.append(" ".join(w + rng.choice(NOISE) for w in words))
+    return pd.Series(reviews, dtype=object)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark review text cleaning")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for the parallel run")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'before rows/s':>15} {'after rows/s':>15} {'parallel rows/s':>16} {'speedup':>8}  identical")
+    for size in args.sizes:
+        series = synthetic_reviews(size)
+        before, before_s = timed(legacy_clean, series)
+        after, after_s = timed(clean_text_series, series, workers=1)
+        parallel, parallel_s = timed(clean_text_series, series, workers=args.workers, parallel_threshold=0)
+
+        identical = before.equals(after) and before.equals(parallel)
+        print(
+            f"{size:>10,} {size / before_s:>15,.0f} {size / after_s:>15,.0f} {size / parallel_s:>16,.0f} "
+            f"{before_s / after_s:>7.1f}x  {'✅' if identical else '❌'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
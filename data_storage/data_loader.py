@@ -2,6 +2,10 @@
 import psycopg2
 import pandas as pd
 from datetime import datetime
+from review_store import load_reviews
+from review_schema import apply_review_schema
+from pipeline_metrics import track_stage
+from fingerprints import FINGERPRINT_COLUMN, fingerprint, text_fingerprint
 
 class DataLoader:
     def __init__(self):
@@ -25,7 +29,7 @@ class DataLoader:
     def load_cleaned_data(self):
         try:
             data_path = "2_data_pipeline/data/processed/all_sentiment_reviews.csv"
-            df = pd.read_csv(data_path)
+            df = apply_review_schema(load_reviews(data_path))
             print(f"Loaded {len(df)} reviews from Task 2")
             return df
         except Exception as e:
@@ -70,13 +74,21 @@ class DataLoader:
             print("No banks found in database!")
             return False
         inserted_count = 0
+        stage = track_stage("database_load")
         try:
             with self.conn.cursor() as cursor:
-                for index, row in df.iterrows():
+                for position, (index, row) in enumerate(df.iterrows(), 1):
+                    if position % 1000 == 0:
+                        stage.add_rows(1000)
                     bank_name = row['bank_name']
                     bank_id = bank_mapping.get(bank_name)
                     if bank_id:
-                        review_id = f"review_{index}_{hash(str(row['review_text'])) % 10000}"
+                        # Stable across runs (keyed by the scraped review_id when
+                        # present), so reloading the same reviews hits ON CONFLICT
+                        text_key = row.get(FINGERPRINT_COLUMN)
+                        if pd.isna(text_key):
+                            text_key = text_fingerprint(row['review_text'])
+                        review_id = f"review_{fingerprint(bank_name, text_key, row.get('review_id', index))}"
                         cursor.execute("""
                             INSERT INTO reviews 
                             (review_id, bank_id, review_text, rating, review_date, sentiment_label, sentiment_score, source)
@@ -86,7 +98,8 @@ class DataLoader:
                             review_id,
                             bank_id,
                             row['review_text'],
-                            row['rating'],
+                            # A missing Int8 rating is pd.NA, which psycopg2 cannot adapt
+                            None if pd.isna(row['rating']) else row['rating'],
                             datetime.now(),
                             row.get('ensemble_label', 'neutral'),
                             row.get('vader_score', 0.0),
@@ -95,6 +108,7 @@ class DataLoader:
                         if cursor.rowcount > 0:
                             inserted_count += 1
                 self.conn.commit()
+                stage.add_rows(len(df) % 1000)
                 print(f"Inserted {inserted_count} reviews into database")
                 return True
         except Exception as e:
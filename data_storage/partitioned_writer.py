@@ -0,0 +1,146 @@
+# data_storage/partitioned_writer.py
+"""
+Per-bank output files written from one table in one pass.
+
+The table is grouped by bank once (row positions per bank), and each
+bank's file is serialized and written on a thread pool, so banks no
+longer wait on each other. Files are CSV or Parquet, optionally
+compressed:
+
+    processed/commercial_bank_of_ethiopia_clean.csv
+    processed/commercial_bank_of_ethiopia_clean.csv.gz     (csv + gzip)
+    processed/commercial_bank_of_ethiopia_clean.parquet    (compression inside)
+
+Every call writes a JSON manifest next to the files with the rows and
+SHA-256 checksum of each partition. A partition whose bytes match the
+manifest of the previous run, with the file still in place, is not
+rewritten.
+"""
+import io
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from data_storage.review_store import STORAGE_CONFIG, UNKNOWN_PARTITION, pa, pq
+
+PARTITION_FORMAT = STORAGE_CONFIG.get("partition_format", "csv")
+PARTITION_COMPRESSION = STORAGE_CONFIG.get("partition_compression")
+PARTITION_WORKERS = max(1, int(STORAGE_CONFIG.get("partition_workers", 4)))
+
+FORMATS = ("csv", "parquet")
+# File suffix of each CSV compression pandas can write
+CSV_COMPRESSION_SUFFIXES = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "zstd": ".zst"}
+
+
+def partition_filename(value, suffix="", fmt="csv", compression=None):
+    """`Commercial Bank of Ethiopia` -> `commercial_bank_of_ethiopia<suffix>.csv[.gz]`"""
+    name = str(value).lower().replace(" ", "_") + suffix
+    if fmt == "parquet":
+        return name + ".parquet"
+    return name + ".csv" + (CSV_COMPRESSION_SUFFIXES[compression] if compression else "")
+
+
+def serialize_partition(part, fmt="csv", compression=None):
+    """The bytes of one partition's file"""
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        pq.write_table(table, buffer, compression=compression or "none")
+    else:
+        if compression == "gzip":
+            # gzip stamps the write time into its header; a fixed one keeps
+            # the checksum of unchanged data the same between runs
+            options = {"method": "gzip", "mtime": 0}
+        else:
+            options = compression
+        part.to_csv(buffer, index=False, encoding="utf-8", compression=options)
+    return buffer.getvalue()
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_partitions(df, out_dir, by="bank_name", suffix="", fmt=None, compression=None,
+                     manifest_name=None, max_workers=None):
+    """
+    Write one file per value of `by` into `out_dir` and return the manifest:
+
+        {'format', 'compression', 'written_at',
+         'partitions': {filename: {'partition', 'rows', 'bytes', 'sha256', 'written'}}}
+
+    `fmt` and `compression` default to storage.partition_format and
+    storage.partition_compression in config.yaml. The manifest is saved
+    as `manifest_name` (default `<suffix>_manifest.json`) in `out_dir`.
+    """
+    fmt = fmt or PARTITION_FORMAT
+    compression = compression if compression is not None else PARTITION_COMPRESSION
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown partition format {fmt!r}, expected one of {FORMATS}")
+    if fmt == "parquet" and pa is None:
+        raise ImportError("Parquet partitions need pyarrow")
+    if fmt == "csv" and compression and compression not in CSV_COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown CSV compression {compression!r}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_name = manifest_name or f"{suffix.strip('_') or 'partitions'}_manifest.json"
+    manifest_path = os.path.join(out_dir, manifest_name)
+    previous = load_manifest(manifest_path).get("partitions", {})
+
+    # One pass over the rows: positions of every partition, in the order
+    # their values first appear
+    # (on the values: a categorical column would leave out the missing ones)
+    groups = df.groupby(df[by].astype(object), sort=False, dropna=False).indices
+    targets = [
+        (UNKNOWN_PARTITION if pd.isna(value) else value, positions)
+        for value, positions in groups.items()
+    ]
+
+    def write(value, positions):
+        filename = partition_filename(value, suffix, fmt, compression)
+        path = os.path.join(out_dir, filename)
+        data = serialize_partition(df.iloc[positions], fmt, compression)
+        checksum = hashlib.sha256(data).hexdigest()
+
+        entry = previous.get(filename, {})
+        unchanged = entry.get("sha256") == checksum and os.path.exists(path) and os.path.getsize(path) == len(data)
+        if not unchanged:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return filename, {
+            "partition": str(value),
+            "rows": len(positions),
+            "bytes": len(data),
+            "sha256": checksum,
+            "written": not unchanged,
+        }
+
+    max_workers = max_workers or PARTITION_WORKERS
+    workers = max(1, min(max_workers, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="partition") as pool:
+        futures = [pool.submit(write, value, positions) for value, positions in targets]
+        partitions = dict(future.result() for future in futures)
+
+    manifest = {
+        "format": fmt,
+        "compression": compression,
+        "written_at": datetime.now().isoformat(),
+        "partitions": partitions,
+    }
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
@@ -0,0 +1,124 @@
+# data_storage/review_schema.py
+"""
+Canonical in-memory dtypes of the review tables.
+
+Stages used to pass every column around as Python object strings.
+apply_review_schema() gives the known columns compact dtypes instead:
+
+    category  - bank, source, app package, locale, review date and the
+                sentiment labels: a handful of distinct values, stored once
+                and compared as integer codes (fast `bank_name == bank`)
+    Int8      - rating and theme cluster, when every value is a whole
+                number (a median-filled 3.5 keeps the column float)
+    str       - free text, Arrow-backed; missing values stay NaN, so
+                comparisons and fillna behave as on object columns
+
+Columns that are not listed, or already have another type (e.g. a
+datetime review_date), are left alone, so the schema can be applied to
+any stage's table, and applied again after a step adds object columns.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - only needed for the Arrow string dtype
+except ImportError:  # pragma: no cover - object strings without pyarrow
+    pyarrow = None
+
+CATEGORY = "category"
+INT8 = "Int8"
+TEXT = "text"
+
+REVIEW_SCHEMA = {
+    "bank_name": CATEGORY,
+    "source": CATEGORY,
+    "app_package": CATEGORY,
+    "locale": CATEGORY,
+    "review_date": CATEGORY,
+    "vader_label": CATEGORY,
+    "textblob_label": CATEGORY,
+    "ml_label": CATEGORY,
+    "ml_label_pred": CATEGORY,
+    "bert_label": CATEGORY,
+    "ensemble_label": CATEGORY,
+    "rating": INT8,
+    "theme_cluster": INT8,
+    "review_id": TEXT,
+    "review_text": TEXT,
+    "review_text_cleaned": TEXT,
+    "user_name": TEXT,
+    "reply_text": TEXT,
+    "text_fingerprint": TEXT,
+}
+
+TEXT_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan) if pyarrow is not None else object
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _to_int8(series):
+    """Int8 copy of `series`, or None if it holds anything but whole numbers in range"""
+    if isinstance(series.dtype, pd.Int8Dtype):
+        return series
+    values = pd.to_numeric(series, errors="coerce")
+    # Values that were there but are not numbers would be lost
+    if (values.isna() & series.notna()).any():
+        return None
+    present = values.dropna()
+    if not ((present % 1 == 0).all() and present.between(-128, 127).all()):
+        return None
+    return values.astype(INT8)
+
+
+def apply_review_schema(df, schema=None):
+    """Return `df` with the schema's dtypes applied to the columns it has"""
+    schema = REVIEW_SCHEMA if schema is None else schema
+    df = df.copy()
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if kind == CATEGORY:
+            if isinstance(series.dtype, pd.CategoricalDtype) or not _is_text(series):
+                continue
+            df[column] = series.astype(CATEGORY)
+        elif kind == INT8:
+            converted = _to_int8(series)
+            if converted is not None:
+                df[column] = converted
+        elif kind == TEXT:
+            if series.dtype == TEXT_DTYPE or not _is_text(series):
+                continue
+            # Mixed columns (e.g. numbers read from CSV) become their text
+            df[column] = series.map(lambda value: value if pd.isna(value) else str(value)).astype(TEXT_DTYPE)
+    return df
+
+
+# ---------------------------------------------------------
+# Memory report
+# ---------------------------------------------------------
+def memory_report(before, after):
+    """Per-column dtypes and deep memory use of two versions of a table"""
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.reindex(before.columns).astype(str),
+        "bytes_before": before.memory_usage(deep=True, index=False),
+        "bytes_after": after.memory_usage(deep=True, index=False).reindex(before.columns),
+    })
+    report.loc["TOTAL"] = ["", "", report["bytes_before"].sum(), report["bytes_after"].sum()]
+    return report
+
+
+def print_memory_report(before, after):
+    report = memory_report(before, after)
+    print("[INFO] Memory by column (before -> after schema):")
+    for column, row in report.drop(index="TOTAL").iterrows():
+        if row["dtype_before"] != row["dtype_after"]:
+            print(f"  {column}: {row['bytes_before'] / 1e6:.2f} MB ({row['dtype_before']}) -> "
+                  f"{row['bytes_after'] / 1e6:.2f} MB ({row['dtype_after']})")
+    total_before, total_after = report.loc["TOTAL", ["bytes_before", "bytes_after"]]
+    saved = (1 - total_after / total_before) * 100 if total_before else 0
+    print(f"[INFO] Total: {total_before / 1e6:.2f} MB -> {total_after / 1e6:.2f} MB ({saved:.0f}% smaller)")
+    return report
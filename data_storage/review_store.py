@@ -0,0 +1,310 @@
+# data_storage/review_store.py
+"""
+Parquet interchange format for review tables passed between pipeline stages.
+
+Every table is stored as a hive-partitioned dataset next to its CSV name
+(`all_reviews.csv` -> `all_reviews.parquet/`), partitioned by bank_name and
+review month:
+
+    all_reviews.parquet/bank_name=Zemen%20Bank/review_month=2024-05/<part>.parquet
+
+Loaders read only the columns and partitions they ask for. The CSV copy
+is still written when `storage.csv_export` is on in config.yaml, and is
+the fallback whenever pyarrow is missing or no dataset exists yet.
+"""
+import os
+import uuid
+import shutil
+from urllib.parse import quote
+
+import pandas as pd
+import yaml
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - CSV-only environments
+    pa = None
+    ds = None
+    pq = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CONFIG_PATH = os.path.join(ROOT, "3_configuration", "config.yaml")
+
+PARTITION_COLS = ["bank_name", "review_month"]
+UNKNOWN_PARTITION = "unknown"
+
+
+def _load_storage_config():
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return (yaml.safe_load(f) or {}).get("storage", {}) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+
+
+STORAGE_CONFIG = _load_storage_config()
+PARQUET_ENABLED = pa is not None and STORAGE_CONFIG.get("format", "parquet") == "parquet"
+CSV_EXPORT = bool(STORAGE_CONFIG.get("csv_export", True)) or not PARQUET_ENABLED
+COMPRESSION = STORAGE_CONFIG.get("compression", "zstd")
+
+# Typed schema of the raw rows written by scraper.py. Partition columns
+# live in the directory names, not in the files.
+RAW_REVIEW_SCHEMA = (
+    pa.schema([
+        ("review_id", pa.string()),
+        ("review", pa.string()),
+        ("score", pa.int8()),
+        ("at", pa.timestamp("us")),
+        ("user_name", pa.string()),
+        ("reply_text", pa.string()),
+        ("reply_date", pa.timestamp("us")),
+        ("package_name", pa.string()),
+        ("source", pa.string()),
+        ("locale", pa.string()),
+    ])
+    if pa is not None else None
+)
+
+
+# ---------------------------------------------------------
+# Paths and partitions
+# ---------------------------------------------------------
+def dataset_path(csv_path):
+    """`.../all_reviews.csv` -> `.../all_reviews.parquet`"""
+    base, _ = os.path.splitext(csv_path)
+    return base + ".parquet"
+
+
+def partition_dir(root, bank_name, review_month=None):
+    """Directory of one partition, uri-encoded the same way pyarrow decodes it."""
+    path = os.path.join(root, f"bank_name={quote(str(bank_name), safe='')}")
+    if review_month is not None:
+        path = os.path.join(path, f"review_month={quote(str(review_month), safe='')}")
+    return path
+
+
+def add_review_month(df, date_column):
+    """Add the `review_month` partition column (YYYY-MM) derived from `date_column`."""
+    if date_column in df.columns:
+        months = pd.to_datetime(df[date_column], errors="coerce").dt.strftime("%Y-%m")
+        df["review_month"] = months.fillna(UNKNOWN_PARTITION)
+    else:
+        df["review_month"] = UNKNOWN_PARTITION
+    # object first: a categorical bank_name cannot be filled with a new value
+    df["bank_name"] = df["bank_name"].astype(object).fillna(UNKNOWN_PARTITION).astype(str)
+    return df
+
+
+def write_partitioned(df, root, schema=None, basename=None):
+    """
+    Write `df` (which must carry the partition columns) into `root` as one
+    new file per partition. Existing files are left alone, so repeated
+    calls append fragments. Returns the partition directories written.
+    """
+    basename = basename or uuid.uuid4().hex
+    if schema is None:
+        # One schema for every partition, so all fragments read back alike
+        schema = pa.Schema.from_pandas(df.drop(columns=PARTITION_COLS), preserve_index=False)
+        # Categorical columns are stored as their values; loaders apply the
+        # in-memory schema (review_schema.py) again
+        schema = pa.schema([
+            field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+            for field in schema
+        ], metadata=schema.metadata)
+
+    written = []
+    for (bank, month), part in df.groupby(PARTITION_COLS, sort=False, observed=True):
+        part = part.drop(columns=PARTITION_COLS)
+        table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+
+        out_dir = partition_dir(root, bank, month)
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = os.path.join(out_dir, f"{basename}.parquet")
+        with open(out_path, "wb") as f:
+            pq.write_table(table, f, compression=COMPRESSION)
+            f.flush()
+            os.fsync(f.fileno())
+        written.append(out_dir)
+    return written
+
+
+def compact_partition(part_dir, transform=None):
+    """
+    Merge the fragment files of one partition into a single file. With
+    `transform`, the merged table is passed through it first and the
+    partition is rewritten even if it has one file; a transform that
+    returns None leaves the partition untouched.
+    """
+    files = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+    if not files or (len(files) <= 1 and transform is None):
+        return False
+    table = pa.concat_tables(
+        [pq.read_table(os.path.join(part_dir, f)) for f in files], promote_options="default"
+    )
+    if transform is not None:
+        table = transform(table)
+        if table is None:
+            return False
+    tmp_path = os.path.join(part_dir, f"compacted-{uuid.uuid4().hex}.parquet.tmp")
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, tmp_path[:-len(".tmp")])
+    for f in files:
+        os.remove(os.path.join(part_dir, f))
+    return True
+
+
+def swap_directory(staging_dir, final_dir):
+    """Move a fully written staging directory into place."""
+    old_dir = final_dir + ".old"
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    if os.path.exists(final_dir):
+        os.replace(final_dir, old_dir)
+    os.replace(staging_dir, final_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+
+# ---------------------------------------------------------
+# Whole-frame save / load
+# ---------------------------------------------------------
+def write_reviews_dataset(df, path, date_column="review_date"):
+    """Replace the dataset at `path` with `df`, partitioned by bank and month."""
+    staging_dir = path + ".part"
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+
+    df = add_review_month(df.copy(), date_column)
+    write_partitioned(df, staging_dir)
+    swap_directory(staging_dir, path)
+
+
+def save_reviews(df, csv_path, date_column="review_date", export_csv=None):
+    """
+    Save a stage's output table: a Parquet dataset next to `csv_path` when
+    pyarrow is available, plus the CSV itself if CSV export is enabled.
+    """
+    export_csv = CSV_EXPORT if export_csv is None else export_csv
+    saved = []
+    if PARQUET_ENABLED:
+        write_reviews_dataset(df, dataset_path(csv_path), date_column=date_column)
+        saved.append(dataset_path(csv_path))
+    if export_csv or not PARQUET_ENABLED:
+        df.to_csv(csv_path, index=False, encoding="utf-8")
+        saved.append(csv_path)
+    return saved
+
+
+def read_reviews_dataset(path, columns=None, banks=None, months=None):
+    """
+    Read a partitioned dataset, pruning to the requested columns, banks and
+    months. Partition columns come back as plain strings; `review_month`
+    is only returned when asked for.
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    # Fragments written before a column was added lack it; read every
+    # fragment under the union of their schemas instead of the first one's
+    file_schema = pa.unify_schemas(
+        [fragment.physical_schema for fragment in dataset.get_fragments()] or [dataset.schema]
+    )
+    partition_fields = [f for f in dataset.schema if f.name in PARTITION_COLS and f.name not in file_schema.names]
+    dataset = ds.dataset(
+        path, format="parquet", partitioning="hive",
+        schema=pa.schema(list(file_schema) + partition_fields),
+    )
+
+    expr = None
+    if banks is not None:
+        expr = ds.field("bank_name").isin([str(b) for b in banks])
+    if months is not None:
+        month_expr = ds.field("review_month").isin([str(m) for m in months])
+        expr = month_expr if expr is None else expr & month_expr
+
+    read_columns = None
+    if columns is not None:
+        read_columns = [c for c in columns if c in dataset.schema.names]
+
+    df = dataset.to_table(columns=read_columns, filter=expr).to_pandas()
+
+    for col in PARTITION_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    if "bank_name" in df.columns:
+        # Rows without a bank were stored under the "unknown" partition
+        df["bank_name"] = df["bank_name"].mask(df["bank_name"] == UNKNOWN_PARTITION)
+    if "review_month" in df.columns and (columns is None or "review_month" not in columns):
+        df = df.drop(columns=["review_month"])
+    return df
+
+
+def update_reviews_dataset(path, updates, banks=None, months=None, key="review_id"):
+    """
+    Overwrite fields of existing rows in place. `updates` maps a key value
+    to {column: new value}; rows whose key is not in `updates` are left
+    alone, and only partitions (restricted to `banks`/`months`) holding at
+    least one updated row are rewritten. Returns the number of rows updated.
+    """
+    if not updates or not os.path.isdir(path):
+        return 0
+
+    updated = 0
+
+    def apply(table):
+        nonlocal updated
+        df = table.to_pandas()
+        mask = df[key].isin(list(updates))
+        if not mask.any():
+            return None
+        for idx in df.index[mask]:
+            for column, value in updates[df.at[idx, key]].items():
+                df.at[idx, column] = value
+        for field in table.schema:
+            if pa.types.is_timestamp(field.type):
+                df[field.name] = pd.to_datetime(df[field.name].replace("", None), errors="coerce")
+        updated += int(mask.sum())
+        return pa.Table.from_pandas(df, schema=table.schema, preserve_index=False)
+
+    bank_dirs = (
+        [partition_dir(path, bank) for bank in banks] if banks is not None
+        else [os.path.join(path, d) for d in os.listdir(path) if d.startswith("bank_name=")]
+    )
+    for bank_dir in bank_dirs:
+        if not os.path.isdir(bank_dir):
+            continue
+        month_dirs = (
+            [os.path.join(bank_dir, f"review_month={quote(str(m), safe='')}") for m in months]
+            if months is not None
+            else [os.path.join(bank_dir, d) for d in os.listdir(bank_dir) if d.startswith("review_month=")]
+        )
+        for month_dir in month_dirs:
+            if os.path.isdir(month_dir):
+                compact_partition(month_dir, transform=apply)
+    return updated
+
+
+def reviews_exist(csv_path):
+    """True if a stage's table exists as a Parquet dataset or as CSV."""
+    return os.path.isdir(dataset_path(csv_path)) or os.path.exists(csv_path)
+
+
+def load_reviews(csv_path, columns=None, banks=None, months=None, **csv_kwargs):
+    """
+    Load a stage's table, preferring its Parquet dataset over the CSV.
+
+    `columns`, `banks` and `months` are pushed down to the Parquet reader.
+    On the CSV fallback `columns` and `banks` are applied while/after
+    parsing; `months` needs the dataset and is ignored.
+    """
+    parquet_path = dataset_path(csv_path)
+    if pa is not None and os.path.isdir(parquet_path):
+        return read_reviews_dataset(parquet_path, columns=columns, banks=banks, months=months)
+
+    usecols = None
+    if columns is not None:
+        usecols = [c for c in columns if c != "review_month"]
+    df = pd.read_csv(csv_path, usecols=usecols, **csv_kwargs)
+    if banks is not None and "bank_name" in df.columns:
+        df = df[df["bank_name"].isin(list(banks))]
+    return df
@@ -9,6 +9,8 @@ import seaborn as sns
 import os
 from datetime import datetime
 
+from data_storage.review_store import load_reviews
+
 print("="*70)
 print("ENHANCING TASK 4 ANALYSIS WITH REAL SENTIMENT DATA")
 print("="*70)
@@ -18,8 +20,8 @@ clean_path = "2_data_pipeline/data/processed/all_clean_reviews.csv"
 sentiment_path = "2_data_pipeline/data/processed/all_sentiment_reviews.csv"
 
 print(f"\n📊 Loading data...")
-df = pd.read_csv(clean_path)
-sentiment_df = pd.read_csv(sentiment_path)
+df = load_reviews(clean_path)
+sentiment_df = load_reviews(sentiment_path)
 
 print(f"✓ Clean reviews: {len(df):,}")
 print(f"✓ Sentiment data: {len(sentiment_df):,}")
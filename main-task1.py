@@ -5,9 +5,13 @@ Matches your existing scraper.py structure
 
 import sys
 import os
-import pandas as pd
 from datetime import datetime
 
+from data_storage.review_store import load_reviews, save_reviews, reviews_exist, CSV_EXPORT
+from data_storage.review_schema import apply_review_schema, print_memory_report
+from data_storage.partitioned_writer import write_partitions
+from pipeline_metrics import start_metrics_server, track_stage, record_duplicate_rate
+
 print("=" * 60)
 print("🚀 TASK 1: DATA COLLECTION & PROCESSING PIPELINE")
 print("=" * 60)
@@ -24,6 +28,13 @@ sys.path.insert(0, data_processing_path)
 if config_path not in sys.path:
     sys.path.insert(0, config_path)
 
+from data_cleaning import DataCleaner
+from stage_checkpoints import StageCheckpoints
+from quality_history import QualityHistoryStore, bank_quality_metrics
+
+# Stage artifacts and fingerprints of the preprocessing run
+CHECKPOINT_DIR = os.path.join(current_dir, '2_data_pipeline', 'data', 'checkpoints', 'task1')
+
 print(f"[INFO] Current directory: {current_dir}")
 print(f"[INFO] Data collection path: {data_collection_path}")
 print(f"[INFO] Data processing path: {data_processing_path}")
@@ -56,16 +67,17 @@ def run_scraping():
                 print("[INFO] Running scraper.main()...")
                 scraper_module.main()
                 
-                # Check for output files
-                raw_dir = os.path.join(current_dir, '2_data_pipeline', 'data', 'raw')
+                # Check for output files, where the scraper wrote them (an
+                # offline source backend writes under its own data directory)
+                raw_dir = scraper_module.PROCESSED_DIR
                 if os.path.exists(raw_dir):
                     files = os.listdir(raw_dir)
                     print(f"[INFO] Files in raw directory: {files}")
                     
-                    # Load the combined file
-                    combined_file = os.path.join(raw_dir, 'all_reviews.csv')
-                    if os.path.exists(combined_file):
-                        df = pd.read_csv(combined_file)
+                    # Load the combined dataset (Parquet, or the CSV export)
+                    combined_file = scraper_module.ALL_RAW_PATH
+                    if reviews_exist(combined_file):
+                        df = load_reviews(combined_file)
                         print(f"[SUCCESS] Collected {len(df)} reviews")
                         return df
                     else:
@@ -95,6 +107,7 @@ def run_preprocessing(raw_df):
         print("[ERROR] No data to preprocess!")
         return None
     
+    stage = track_stage("preprocessing")
     try:
         # Check column names
         print(f"[INFO] Data shape: {raw_df.shape}")
@@ -120,71 +133,56 @@ def run_preprocessing(raw_df):
         for col in raw_df.columns:
             print(f"  - {col}")
         
-        # Basic preprocessing steps
-        print("\n[STEP 1] Handling missing values...")
-        
-        # Check missing values
-        missing_report = {}
-        for column in raw_df.columns:
-            missing = raw_df[column].isnull().sum()
-            if missing > 0:
-                missing_report[column] = missing
-                print(f"  {column}: {missing} missing values")
-        
-        # Fill missing ratings with median
-        if 'rating' in raw_df.columns:
-            median_rating = raw_df['rating'].median()
-            raw_df['rating'] = raw_df['rating'].fillna(median_rating)
-            print(f"  Filled missing ratings with median: {median_rating}")
-        
-        # Fill missing text
-        if 'review_text' in raw_df.columns:
-            raw_df['review_text'] = raw_df['review_text'].fillna('No review text')
-            print(f"  Filled missing review text")
-        
-        print("\n[STEP 2] Removing duplicates...")
+        # Compact dtypes (categories, Int8, Arrow strings) for every later step
+        typed_df = apply_review_schema(raw_df)
+        print_memory_report(raw_df, typed_df)
+        raw_df = typed_df
+        
+        # Per-bank quality of the incoming data, for the run history
+        bank_metrics = bank_quality_metrics(raw_df)
         before = len(raw_df)
-        raw_df = raw_df.drop_duplicates(subset=['review_text', 'user_name', 'bank_name'], keep='first')
-        after = len(raw_df)
-        print(f"  Removed {before - after} duplicates")
-        
-        print("\n[STEP 3] Normalizing dates...")
-        if 'review_date' in raw_df.columns:
-            # Convert to datetime
-            raw_df['review_date'] = pd.to_datetime(raw_df['review_date'], errors='coerce')
-            
-            # Format to YYYY-MM-DD
-            raw_df['review_date'] = raw_df['review_date'].dt.strftime('%Y-%m-%d')
-            
-            # Check for invalid dates
-            invalid_dates = raw_df['review_date'].isnull().sum()
-            if invalid_dates > 0:
-                print(f"  Warning: {invalid_dates} invalid dates found")
         
-        print("\n[STEP 4] Calculating data quality metrics...")
+        # The library pipeline, as checkpointed stages: a re-run on the same
+        # data (e.g. after a failure) picks up after the last completed stage
+        processed_dir = os.path.join(current_dir, '2_data_pipeline', 'data', 'processed')
+        os.makedirs(processed_dir, exist_ok=True)
+        cleaner = DataCleaner()
+        preprocessor = cleaner.preprocessor
+        preprocessing_report = os.path.join(processed_dir, 'preprocessing_quality_report.txt')
+        
+        def preprocess_stage(df):
+            df, report = preprocessor.preprocess_pipeline(df, report_path=preprocessing_report)
+            return df, dict(report)
+        
+        checkpoints = StageCheckpoints(CHECKPOINT_DIR)
+        raw_df, stage_details = checkpoints.run([
+            ('clean', cleaner.clean_stage),
+            ('preprocess', preprocess_stage),
+        ], raw_df)
+        quality_report = stage_details['preprocess']
+        
+        dedup = quality_report.get('duplicate_removal', {})
+        record_duplicate_rate("preprocessing", dedup.get('duplicates_removed', 0), dedup.get('original_count', before))
+        
+        print("\n[INFO] Calculating data quality metrics...")
+        metrics = quality_report.get('quality_metrics', {})
         quality_metrics = {
             'total_reviews': len(raw_df),
             'banks_covered': raw_df['bank_name'].nunique() if 'bank_name' in raw_df.columns else 0,
-            'date_range': {},
+            'date_range': metrics.get('date_range', {}),
             'rating_stats': {},
-            'missing_values': missing_report
+            'missing_values': {
+                col: stats['missing_count']
+                for col, stats in quality_report.get('missing_values', {}).items()
+            },
+            'bank_metrics': bank_metrics
         }
         
-        # Date range
-        if 'review_date' in raw_df.columns:
-            valid_dates = pd.to_datetime(raw_df['review_date'], errors='coerce')
-            valid_dates = valid_dates.dropna()
-            if not valid_dates.empty:
-                quality_metrics['date_range'] = {
-                    'earliest': valid_dates.min().strftime('%Y-%m-%d'),
-                    'latest': valid_dates.max().strftime('%Y-%m-%d')
-                }
-        
         # Rating statistics
-        if 'rating' in raw_df.columns:
+        if metrics.get('rating_distribution'):
             quality_metrics['rating_stats'] = {
-                'average': round(raw_df['rating'].mean(), 2),
-                'median': raw_df['rating'].median(),
+                'average': metrics['rating_distribution']['average'],
+                'median': metrics['rating_distribution']['median'],
                 'min': raw_df['rating'].min(),
                 'max': raw_df['rating'].max()
             }
@@ -195,9 +193,13 @@ def run_preprocessing(raw_df):
         if 'date_range' in quality_metrics and quality_metrics['date_range']:
             print(f"[INFO] Date range: {quality_metrics['date_range']['earliest']} to {quality_metrics['date_range']['latest']}")
         
-        if 'rating_stats' in quality_metrics:
+        if quality_metrics.get('rating_stats'):
             print(f"[INFO] Average rating: {quality_metrics['rating_stats']['average']}/5")
         
+        # Columns rewritten above (rating, review_date) get their dtypes back
+        raw_df = apply_review_schema(raw_df)
+        
+        stage.add_rows(before)
         return raw_df, quality_metrics
         
     except Exception as e:
@@ -216,6 +218,7 @@ def save_processed_data(df, quality_metrics):
         print("[ERROR] No data to save!")
         return False
     
+    stage = track_stage("save_processed")
     try:
         # Create processed directory
         processed_dir = os.path.join(current_dir, '2_data_pipeline', 'data', 'processed')
@@ -223,19 +226,19 @@ def save_processed_data(df, quality_metrics):
         
         # Save main cleaned file
         main_output = os.path.join(processed_dir, 'all_clean_reviews.csv')
-        df.to_csv(main_output, index=False, encoding='utf-8')
-        print(f"[SUCCESS] Saved main file: {main_output}")
+        for saved_path in save_reviews(df, main_output, date_column='review_date'):
+            print(f"[SUCCESS] Saved main file: {saved_path}")
         print(f"  Reviews: {len(df)}")
         print(f"  Columns: {len(df.columns)}")
         
-        # Save bank-specific files
-        if 'bank_name' in df.columns:
-            for bank in df['bank_name'].unique():
-                bank_df = df[df['bank_name'] == bank]
-                bank_filename = bank.lower().replace(' ', '_') + '_clean.csv'
-                bank_output = os.path.join(processed_dir, bank_filename)
-                bank_df.to_csv(bank_output, index=False, encoding='utf-8')
-                print(f"  Saved {len(bank_df)} reviews for {bank}")
+        # Save bank-specific exports (the Parquet dataset is already partitioned by bank).
+        # Banks are written concurrently; one whose file has the checksum in
+        # the manifest of the last run is not rewritten.
+        if CSV_EXPORT and 'bank_name' in df.columns:
+            manifest = write_partitions(df, processed_dir, suffix='_clean')
+            for filename, partition in manifest['partitions'].items():
+                status = "Saved" if partition['written'] else "Unchanged:"
+                print(f"  {status} {partition['rows']} reviews for {partition['partition']} ({filename})")
         
         # Save quality report
         if quality_metrics:
@@ -251,7 +254,7 @@ def save_processed_data(df, quality_metrics):
                 if 'date_range' in quality_metrics and quality_metrics['date_range']:
                     f.write(f"Date Range: {quality_metrics['date_range']['earliest']} to {quality_metrics['date_range']['latest']}\n")
                 
-                if 'rating_stats' in quality_metrics:
+                if quality_metrics.get('rating_stats'):
                     f.write(f"\nRating Statistics:\n")
                     f.write(f"  Average: {quality_metrics['rating_stats']['average']}/5\n")
                     f.write(f"  Median: {quality_metrics['rating_stats']['median']}/5\n")
@@ -272,7 +275,10 @@ def save_processed_data(df, quality_metrics):
                 f.write("=" * 60 + "\n")
             
             print(f"[SUCCESS] Quality report saved: {report_path}")
+            
+            record_quality_history(quality_metrics, report_path)
         
+        stage.add_rows(len(df))
         print(f"\n[SUCCESS] All files saved to: {processed_dir}")
         return True
         
@@ -280,6 +286,35 @@ def save_processed_data(df, quality_metrics):
         print(f"[ERROR] Failed to save data: {e}")
         return False
 
+def record_quality_history(quality_metrics, report_path):
+    """Append this run's per-bank metrics to the history and report regressions"""
+    bank_metrics = quality_metrics.get('bank_metrics')
+    if not bank_metrics:
+        return []
+    
+    history_path = os.path.join(current_dir, '2_data_pipeline', 'data', 'state', 'quality_history.sqlite')
+    history = QualityHistoryStore(history_path)
+    try:
+        run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
+        history.record_run(run_id, bank_metrics)
+        regressions = history.detect_regressions(run_id)
+    finally:
+        history.close()
+    print(f"[INFO] Quality metrics recorded for run {run_id}: {history_path}")
+    
+    with open(report_path, 'a') as f:
+        f.write(f"\nQUALITY TREND (run {run_id}):\n")
+        if not regressions:
+            f.write("  No regressions against recent runs\n")
+        for r in regressions:
+            f.write(f"  {r['bank_name']}: {r['metric']} {r['value']} "
+                    f"(recent average {r['baseline']} over {r['runs_compared']} runs)\n")
+    
+    for r in regressions:
+        print(f"  ⚠️ Regression for {r['bank_name']}: {r['metric']} = {r['value']} "
+              f"(recent average {r['baseline']} ± {r['baseline_std']})")
+    return regressions
+
 def generate_final_report(df, quality_metrics):
     """Generate final execution report"""
     print("\n" + "=" * 60)
@@ -314,6 +349,7 @@ def generate_final_report(df, quality_metrics):
 
 def main():
     """Main execution function"""
+    start_metrics_server()
     try:
         # Step 1: Run scraping
         raw_df = run_scraping()
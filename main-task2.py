@@ -23,6 +23,11 @@ from sentiment_analysis.ensemble_sentiment import ensemble_sentiment
 from thematic_analysis.keyword_extraction import extract_keywords
 from thematic_analysis.theme_clustering import cluster_themes
 
+from data_storage.review_store import load_reviews, save_reviews
+from data_storage.review_schema import apply_review_schema, print_memory_report
+from data_storage.partitioned_writer import write_partitions
+from pipeline_metrics import start_metrics_server, track_stage
+
 # -------------------------------
 #  PATHS
 # -------------------------------
@@ -30,15 +35,22 @@ PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 PROCESSED_DIR = os.path.join(PROJECT_ROOT, "2_data_pipeline", "data", "processed")
 ALL_CLEAN_PATH = os.path.join(PROCESSED_DIR, "all_clean_reviews.csv")
 
+start_metrics_server()
+
 print("📂 PROJECT ROOT:", PROJECT_ROOT)
 print("📂 LOADING CLEAN DATA FROM:", ALL_CLEAN_PATH)
 
 # -------------------------------
 #  LOAD CLEAN DATA
 # -------------------------------
-df_clean = pd.read_csv(ALL_CLEAN_PATH)
+df_clean = load_reviews(ALL_CLEAN_PATH)
 print(f"✅ Loaded {len(df_clean):,} cleaned reviews")
 
+# Categorical banks/dates, Int8 ratings and Arrow strings
+df_typed = apply_review_schema(df_clean)
+print_memory_report(df_clean, df_typed)
+df_clean = df_typed
+
 # Get unique banks for per-bank processing
 unique_banks = df_clean['bank_name'].unique()
 print(f"🏦 Found {len(unique_banks)} banks: {list(unique_banks)}")
@@ -47,6 +59,7 @@ print(f"🏦 Found {len(unique_banks)} banks: {list(unique_banks)}")
 #  SENTIMENT ANALYSIS - PER BANK
 # -------------------------------
 bank_sentiment_dfs = []
+sentiment_stage = track_stage("sentiment")
 
 for bank in unique_banks:
     print(f"\n{'='*50}")
@@ -83,12 +96,15 @@ for bank in unique_banks:
     
     # Store the processed bank data
     bank_sentiment_dfs.append(bank_df)
+    sentiment_stage.add_rows(len(bank_df))
     
     print(f"✅ Completed sentiment analysis for {bank}")
     print(f"🔥 Top keywords for {bank}: {bank_keywords[:5]}")
 
 # Combine all bank data back together
 df_final = pd.concat(bank_sentiment_dfs, ignore_index=True)
+# The sentiment labels and theme clusters were added as plain columns
+df_final = apply_review_schema(df_final)
 print(f"\n🎉 Combined {len(bank_sentiment_dfs)} banks into final dataset")
 
 # -------------------------------
@@ -97,22 +113,20 @@ print(f"\n🎉 Combined {len(bank_sentiment_dfs)} banks into final dataset")
 print("\n💾 SAVING PER-BANK SENTIMENT FILES:")
 print("-" * 40)
 
-for bank in unique_banks:
-    bank_df = df_final[df_final['bank_name'] == bank].copy()
-    
-    # Save individual bank sentiment file
-    bank_filename = f"{bank.lower().replace(' ', '_')}_sentiment_reviews.csv"
-    bank_filepath = os.path.join(PROCESSED_DIR, bank_filename)
-    bank_df.to_csv(bank_filepath, index=False)
-    
+# One pass over the rows, banks written concurrently
+manifest = write_partitions(df_final, PROCESSED_DIR, suffix="_sentiment_reviews")
+bank_files = {entry["partition"]: filename for filename, entry in manifest["partitions"].items()}
+
+for bank, bank_df in df_final.groupby("bank_name", sort=False, observed=True):
     # Calculate bank-specific stats
     total_reviews = len(bank_df)
-    positive_reviews = len(bank_df[bank_df['ensemble_label'] == 'positive'])
-    negative_reviews = len(bank_df[bank_df['ensemble_label'] == 'negative'])
-    neutral_reviews = len(bank_df[bank_df['ensemble_label'] == 'neutral'])
+    label_counts = bank_df['ensemble_label'].value_counts()
+    positive_reviews = int(label_counts.get('positive', 0))
+    negative_reviews = int(label_counts.get('negative', 0))
+    neutral_reviews = int(label_counts.get('neutral', 0))
     
     print(f"🏦 {bank}:")
-    print(f"   📁 {bank_filename}")
+    print(f"   📁 {bank_files[str(bank)]}")
     print(f"   📊 {total_reviews:,} reviews")
     print(f"   👍 {positive_reviews} positive ({positive_reviews/total_reviews*100:.1f}%)")
     print(f"   👎 {negative_reviews} negative ({negative_reviews/total_reviews*100:.1f}%)")
@@ -120,5 +134,5 @@ for bank in unique_banks:
 
 # Also save the combined file (optional)
 combined_output_path = os.path.join(PROCESSED_DIR, "all_sentiment_reviews.csv")
-df_final.to_csv(combined_output_path, index=False)
-print(f"\n💾 Combined file saved: {combined_output_path}")
\ No newline at end of file
+for saved_path in save_reviews(df_final, combined_output_path, date_column="review_date"):
+    print(f"\n💾 Combined file saved: {saved_path}")
\ No newline at end of file
@@ -10,10 +10,13 @@ import pandas as pd
 
 # Add the data_storage directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'data_storage'))
+# and data_processing, for the shared review fingerprints
+sys.path.append(os.path.join(os.path.dirname(__file__), '2_data_pipeline', 'data_processing'))
 
 from database_setup import DatabaseSetup
 from data_loader import DataLoader
 from database_queries import DatabaseQueries
+from pipeline_metrics import start_metrics_server
 
 def check_postgresql_service():
     """Check if PostgreSQL service is running"""
@@ -83,6 +86,7 @@ def display_database_tables():
 def main():
     print("🚀 STARTING TASK 3: PostgreSQL Database Setup")
     print("=" * 60)
+    start_metrics_server()
     
     # Check if PostgreSQL is running first
     if not check_postgresql_service():
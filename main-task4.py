@@ -13,6 +13,10 @@ import sys
 import os
 from datetime import datetime
 
+from data_storage.review_store import load_reviews, reviews_exist
+from data_storage.review_schema import apply_review_schema
+from pipeline_metrics import start_metrics_server, track_stage
+
 # Get current directory
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -20,6 +24,8 @@ def main():
     print("="*70)
     print("TASK 4: INSIGHTS & RECOMMENDATIONS - USING REAL SENTIMENT DATA")
     print("="*70)
+    start_metrics_server()
+    stage = track_stage("insights")
     
     try:
         # ============================================================
@@ -29,19 +35,19 @@ def main():
         
         # Load clean reviews
         clean_path = os.path.join(current_dir, "2_data_pipeline", "data", "processed", "all_clean_reviews.csv")
-        if not os.path.exists(clean_path):
+        if not reviews_exist(clean_path):
             print(f"❌ ERROR: Clean data not found at {clean_path}")
             return False
         
-        df = pd.read_csv(clean_path)
+        df = load_reviews(clean_path)
         print(f"✓ Loaded {len(df):,} clean reviews")
         
         # Load sentiment data - YOUR ACTUAL SENTIMENT DATA
         sentiment_path = os.path.join(current_dir, "2_data_pipeline", "data", "processed", "all_sentiment_reviews.csv")
         
-        if os.path.exists(sentiment_path):
+        if reviews_exist(sentiment_path):
             print(f"✓ Found real sentiment data at: {sentiment_path}")
-            sentiment_df = pd.read_csv(sentiment_path)
+            sentiment_df = load_reviews(sentiment_path)
             print(f"✓ Loaded {len(sentiment_df):,} sentiment records")
             
             # Check sentiment columns
@@ -72,6 +78,9 @@ def main():
             print("⚠️  No sentiment file found - using ratings to infer sentiment")
             df['ensemble_label'] = df['rating'].apply(lambda x: 'positive' if x >= 4 else 'negative' if x <= 2 else 'neutral')
         
+        # Merged columns come back as objects: one pass to the canonical dtypes
+        df = apply_review_schema(df)
+        
         # ============================================================
         # 2. PREPARE DATA FOR ANALYSIS
         # ============================================================
@@ -548,6 +557,7 @@ def main():
         print("✅ TASK 4 - INSIGHTS & RECOMMENDATIONS COMPLETE!")
         print("="*70)
         
+        stage.add_rows(len(df))
         return True
         
     except Exception as e:
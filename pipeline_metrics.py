@@ -0,0 +1,197 @@
+"""
+Opt-in Prometheus metrics for scraper.py and the main-task pipelines.
+
+Turned on by `metrics.enabled` in 3_configuration/config.yaml or by
+setting PIPELINE_METRICS_PORT; the endpoint is then served at
+http://localhost:<port>/metrics while the script runs. Every function
+here is a cheap no-op when metrics are off or prometheus_client is not
+installed, so callers never need to check.
+
+Exposed metrics:
+    scraper_reviews_fetched_total{package, locale}
+    scraper_fetch_latency_seconds{package}          (histogram)
+    scraper_fetch_errors_total{package, kind}       (kind: error / throttled)
+    scraper_fetch_retries_total{package}
+    scraper_duplicates_skipped_total{package}
+    pipeline_stage_rows_total{stage}
+    pipeline_stage_rows_per_second{stage}
+    pipeline_stage_duration_seconds{stage}
+    pipeline_stage_last_progress_timestamp_seconds{stage}
+    pipeline_duplicate_ratio{stage}
+"""
+import os
+import time
+import threading
+
+import yaml
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, start_http_server
+except ImportError:  # pragma: no cover - metrics are optional
+    Counter = Gauge = Histogram = start_http_server = None
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+CONFIG_PATH = os.path.join(ROOT, "3_configuration", "config.yaml")
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf"))
+
+
+def _load_metrics_config():
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return (yaml.safe_load(f) or {}).get("metrics", {}) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+
+
+METRICS_CONFIG = _load_metrics_config()
+PORT = int(os.environ.get("PIPELINE_METRICS_PORT") or METRICS_CONFIG.get("port", 9108))
+ENABLED = start_http_server is not None and (
+    bool(os.environ.get("PIPELINE_METRICS_PORT")) or bool(METRICS_CONFIG.get("enabled", False))
+)
+
+if ENABLED:
+    REVIEWS_FETCHED = Counter(
+        "scraper_reviews_fetched_total", "Reviews kept by the scraper", ["package", "locale"]
+    )
+    FETCH_LATENCY = Histogram(
+        "scraper_fetch_latency_seconds", "Latency of review page requests", ["package"],
+        buckets=LATENCY_BUCKETS,
+    )
+    FETCH_ERRORS = Counter("scraper_fetch_errors_total", "Failed page requests", ["package", "kind"])
+    FETCH_RETRIES = Counter("scraper_fetch_retries_total", "Page requests retried", ["package"])
+    DUPLICATES_SKIPPED = Counter(
+        "scraper_duplicates_skipped_total", "Already-seen reviews dropped while scraping", ["package"]
+    )
+    STAGE_ROWS = Counter("pipeline_stage_rows_total", "Rows processed per pipeline stage", ["stage"])
+    STAGE_ROWS_PER_SECOND = Gauge(
+        "pipeline_stage_rows_per_second", "Average throughput of the running/last stage run", ["stage"]
+    )
+    STAGE_DURATION = Gauge("pipeline_stage_duration_seconds", "Elapsed time of the stage run", ["stage"])
+    STAGE_LAST_PROGRESS = Gauge(
+        "pipeline_stage_last_progress_timestamp_seconds", "Unix time rows were last reported", ["stage"]
+    )
+    DUPLICATE_RATIO = Gauge("pipeline_duplicate_ratio", "Share of rows found to be duplicates", ["stage"])
+
+_server_started = False
+_lock = threading.Lock()
+_stages = {}
+_duplicate_tallies = {}
+
+
+def start_metrics_server():
+    """Serve /metrics on PORT once per process. Returns True if metrics are on."""
+    global _server_started
+    if not ENABLED:
+        return False
+    with _lock:
+        if not _server_started:
+            try:
+                start_http_server(PORT)
+                print(f"📡 Prometheus metrics at http://localhost:{PORT}/metrics")
+            except OSError as e:
+                print(f"⚠️ Could not start metrics server on port {PORT}: {e}")
+            _server_started = True
+    return True
+
+
+# ---------------------------------------------------------
+# Scraper
+# ---------------------------------------------------------
+def record_fetch(package, latency, error=None, throttled=False):
+    if not ENABLED:
+        return
+    FETCH_LATENCY.labels(package).observe(latency)
+    if error is not None:
+        FETCH_ERRORS.labels(package, "throttled" if throttled else "error").inc()
+
+
+def record_retry(package):
+    if ENABLED:
+        FETCH_RETRIES.labels(package).inc()
+
+
+def record_reviews(package, locale, count):
+    """Reviews kept from one page; also counts as progress of the "scrape" stage."""
+    if not ENABLED or not count:
+        return
+    REVIEWS_FETCHED.labels(package, locale).inc(count)
+    stage_progress("scrape", count)
+    record_duplicate_rate("scrape", duplicates=0, total=count)
+
+
+def record_duplicates(package, count):
+    if not ENABLED or not count:
+        return
+    DUPLICATES_SKIPPED.labels(package).inc(count)
+    record_duplicate_rate("scrape", duplicates=count, total=count)
+
+
+def record_duplicate_rate(stage, duplicates, total):
+    """Add to a stage's running duplicate tally and update its ratio."""
+    if not ENABLED:
+        return
+    with _lock:
+        seen = _duplicate_tallies.setdefault(stage, [0, 0])
+        seen[0] += duplicates
+        seen[1] += total
+        ratio = seen[0] / seen[1] if seen[1] else 0.0
+    DUPLICATE_RATIO.labels(stage).set(ratio)
+
+
+# ---------------------------------------------------------
+# Pipeline stages
+# ---------------------------------------------------------
+class StageTracker:
+    """
+    Rows processed by one stage run. Use as a context manager:
+
+        with track_stage("preprocessing") as stage:
+            ...
+            stage.add_rows(len(df))
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add_rows(self, count):
+        if not ENABLED or not count:
+            return
+        with self._lock:
+            self.rows += count
+            elapsed = time.monotonic() - self.started
+            rows = self.rows
+        STAGE_ROWS.labels(self.name).inc(count)
+        STAGE_DURATION.labels(self.name).set(elapsed)
+        STAGE_ROWS_PER_SECOND.labels(self.name).set(rows / elapsed if elapsed > 0 else 0.0)
+        STAGE_LAST_PROGRESS.labels(self.name).set(time.time())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if ENABLED:
+            elapsed = time.monotonic() - self.started
+            STAGE_DURATION.labels(self.name).set(elapsed)
+            STAGE_ROWS_PER_SECOND.labels(self.name).set(self.rows / elapsed if elapsed > 0 else 0.0)
+        return False
+
+
+def track_stage(name):
+    """Start (or restart) timing a stage and return its tracker."""
+    tracker = StageTracker(name)
+    with _lock:
+        _stages[name] = tracker
+    return tracker
+
+
+def stage_progress(name, rows):
+    """Report rows for a stage from anywhere, starting its timer on first use."""
+    with _lock:
+        tracker = _stages.get(name)
+    if tracker is None:
+        tracker = track_stage(name)
+    tracker.add_rows(rows)